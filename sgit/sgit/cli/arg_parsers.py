@@ -8,9 +8,9 @@ def build_arg_parser() -> ArgumentParser:
     """
     Build and return the top-level argument parser for sgit.
 
-    This parser defines all supported subcommands (init, cat-file, hash-object,
-    log, ls-tree, checkout, tag, rev-parse, ls-files, check-ignore, status,
-    rm, add, commit).
+    This parser defines all supported subcommands (init, clone, cat-file, hash-object,
+    log, ls-tree, diff, fast-export, fast-import, diff-tree, checkout, switch, sparse-checkout, tag, pack-refs, for-each-ref, reflog, rev-parse, merge, merge-base, merge-tree, cherry-pick, rebase, reset, ls-files, check-ignore, status,
+    rm, mv, add, commit, commit-graph).
     """
     argparser = argparse.ArgumentParser(description="Write yourself a git!")
     argsubparsers = argparser.add_subparsers(title="Commands", dest="command")
@@ -28,6 +28,30 @@ def build_arg_parser() -> ArgumentParser:
         help="Where to create the repository.",
     )
 
+    # clone command
+    argsp = argsubparsers.add_parser("clone", help="Clone a local repository into a new directory.")
+    argsp.add_argument(
+        "--no-hardlinks",
+        dest="no_hardlinks",
+        action="store_true",
+        help="Copy the object files instead of hardlinking them.",
+    )
+    argsp.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=None,
+        help="Number of parallel workers (defaults to the CPU count).",
+    )
+    argsp.add_argument("repository", help="Path of the repository to clone.")
+    argsp.add_argument(
+        "directory",
+        nargs="?",
+        default=None,
+        help="Where to clone to (defaults to the name of the source).",
+    )
+
     # cat-file command
     argsp = argsubparsers.add_parser(
         "cat-file", help="Provide content of repository objects"
@@ -59,6 +83,26 @@ def build_arg_parser() -> ArgumentParser:
 
     # log command
     argsp = argsubparsers.add_parser("log", help="Display history of a given commit.")
+    argsp.add_argument(
+        "--oneline",
+        action="store_true",
+        help="Show one line per commit instead of a Graphviz graph.",
+    )
+    argsp.add_argument(
+        "--abbrev",
+        dest="abbrev",
+        type=int,
+        default=7,
+        help="Minimum length of abbreviated commit IDs (extended until unique).",
+    )
+    argsp.add_argument(
+        "-n",
+        "--max-count",
+        dest="max_count",
+        type=int,
+        default=None,
+        help="Limit the number of commits shown.",
+    )
     argsp.add_argument(
         "commit", default="HEAD", nargs="?", help="Commit to start at."
     )
@@ -73,12 +117,204 @@ def build_arg_parser() -> ArgumentParser:
     )
     argsp.add_argument("tree", help="The tree-ish object to list.")
 
+    # diff command
+    argsp = argsubparsers.add_parser(
+        "diff", help="Show changes between the worktree, the index and commits."
+    )
+    argsp.add_argument(
+        "--cached",
+        "--staged",
+        dest="cached",
+        action="store_true",
+        help="Compare the index with HEAD (or the given commit).",
+    )
+    argsp.add_argument(
+        "--stat",
+        action="store_true",
+        help="Show a per-file summary instead of the patch.",
+    )
+    argsp.add_argument(
+        "--diff-algorithm",
+        dest="algorithm",
+        choices=["myers", "histogram", "patience"],
+        default=None,
+        help="Line diff algorithm (defaults to diff.algorithm or myers).",
+    )
+    argsp.add_argument(
+        "--histogram",
+        dest="algorithm",
+        action="store_const",
+        const="histogram",
+        help="Use the histogram diff algorithm.",
+    )
+    argsp.add_argument(
+        "-U",
+        "--unified",
+        dest="context",
+        type=int,
+        default=3,
+        help="Number of context lines.",
+    )
+    argsp.add_argument(
+        "-M",
+        "--find-renames",
+        dest="find_renames",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="n",
+        help="Detect renames, optionally with a similarity threshold (e.g. -M60%%).",
+    )
+    argsp.add_argument(
+        "-C",
+        "--find-copies",
+        dest="find_copies",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="n",
+        help="Detect copies as well as renames.",
+    )
+    argsp.add_argument(
+        "-l",
+        dest="rename_limit",
+        type=int,
+        default=1000,
+        help="Skip inexact rename detection above n*n candidate pairs.",
+    )
+    argsp.add_argument("revisions", nargs="*", help="Zero, one or two commits, or a range A..B.")
+
+    # diff-tree command
+    argsp = argsubparsers.add_parser(
+        "diff-tree", help="Compare the content of two trees, or a commit and its parent."
+    )
+    argsp.add_argument(
+        "-r",
+        dest="recursive",
+        action="store_true",
+        help="Recurse into subtrees.",
+    )
+    argsp.add_argument(
+        "--name-status",
+        dest="name_status",
+        action="store_true",
+        help="Show only the status letter and path of each change.",
+    )
+    argsp.add_argument(
+        "-M",
+        "--find-renames",
+        dest="find_renames",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="n",
+        help="Detect renames, optionally with a similarity threshold (e.g. -M60%%).",
+    )
+    argsp.add_argument(
+        "-C",
+        "--find-copies",
+        dest="find_copies",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="n",
+        help="Detect copies as well as renames.",
+    )
+    argsp.add_argument(
+        "-l",
+        dest="rename_limit",
+        type=int,
+        default=1000,
+        help="Skip inexact rename detection above n*n candidate pairs.",
+    )
+    argsp.add_argument("objects", nargs="*", help="A commit, or two tree-ish objects.")
+
     # checkout command
     argsp = argsubparsers.add_parser(
-        "checkout", help="Checkout a commit inside a directory."
+        "checkout", help="Switch branches, or checkout a commit inside a directory."
+    )
+    argsp.add_argument(
+        "-b",
+        dest="create",
+        action="store_true",
+        help="Create a new branch at HEAD and switch to it.",
+    )
+    argsp.add_argument(
+        "-f",
+        "--force",
+        dest="force",
+        action="store_true",
+        help="Discard local changes to paths that differ.",
+    )
+    argsp.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=None,
+        help="Number of parallel workers (defaults to checkout.workers or CPU count).",
+    )
+    argsp.add_argument("commit", help="The branch or commit to checkout.")
+    argsp.add_argument(
+        "path",
+        nargs="?",
+        default=None,
+        help="An EMPTY directory to checkout into (omit to switch the worktree).",
+    )
+
+    # switch command
+    argsp = argsubparsers.add_parser("switch", help="Switch branches.")
+    argsp.add_argument(
+        "-c",
+        "--create",
+        dest="create",
+        action="store_true",
+        help="Create a new branch at HEAD and switch to it.",
+    )
+    argsp.add_argument(
+        "-f",
+        "--force",
+        dest="force",
+        action="store_true",
+        help="Discard local changes to paths that differ.",
+    )
+    argsp.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        type=int,
+        default=None,
+        help="Number of parallel workers (defaults to checkout.workers or CPU count).",
+    )
+    argsp.add_argument("branch", help="Branch to switch to.")
+
+    # sparse-checkout command
+    argsp = argsubparsers.add_parser(
+        "sparse-checkout", help="Restrict the worktree to a set of directories."
     )
-    argsp.add_argument("commit", help="The commit to checkout.")
-    argsp.add_argument("path", help="An EMPTY directory to checkout into.")
+    sparse_actions = argsp.add_subparsers(title="Actions", dest="action")
+    sparse_actions.required = True
+    for action, action_help in (
+        ("set", "Replace the sparse-checkout cone."),
+        ("add", "Add directories to the sparse-checkout cone."),
+    ):
+        actionsp = sparse_actions.add_parser(action, help=action_help)
+        actionsp.add_argument(
+            "--sparse-index",
+            dest="sparse_index",
+            action="store_true",
+            default=None,
+            help="Store out-of-cone directories as single tree entries in the index.",
+        )
+        actionsp.add_argument(
+            "--no-sparse-index",
+            dest="sparse_index",
+            action="store_false",
+            help="Keep one index entry per file.",
+        )
+        actionsp.add_argument("dirs", nargs="+", help="Directories to include in the cone.")
+    sparse_actions.add_parser("list", help="List the directories in the cone.")
+    sparse_actions.add_parser("disable", help="Restore the full worktree.")
 
     # tag command
     argsp = argsubparsers.add_parser("tag", help="List or create tags")
@@ -91,6 +327,181 @@ def build_arg_parser() -> ArgumentParser:
     argsp.add_argument("name", nargs="?", help="The new tag's name.")
     argsp.add_argument("object", default="HEAD", nargs="?", help="The object to tag.")
 
+    # pack-refs command
+    argsp = argsubparsers.add_parser(
+        "pack-refs", help="Pack heads and tags for efficient repository access."
+    )
+    argsp.add_argument(
+        "--all",
+        dest="all",
+        action="store_true",
+        help="Pack all refs, not only tags and already-packed refs.",
+    )
+
+    # for-each-ref command
+    argsp = argsubparsers.add_parser(
+        "for-each-ref", help="Output information on each ref."
+    )
+    argsp.add_argument(
+        "--format",
+        dest="format",
+        default="%(objectname) %(objecttype)\t%(refname)",
+        help="Format string with %%(atom) placeholders.",
+    )
+    argsp.add_argument(
+        "--sort",
+        dest="sort",
+        action="append",
+        default=None,
+        help="Atom to sort by; prefix with '-' for descending order. May be repeated.",
+    )
+    argsp.add_argument(
+        "--count",
+        dest="count",
+        type=int,
+        default=None,
+        help="Show at most this many refs.",
+    )
+    argsp.add_argument("pattern", nargs="*", help="Only list refs matching these patterns.")
+
+    # commit-graph command
+    argsp = argsubparsers.add_parser(
+        "commit-graph", help="Maintain the changed-path Bloom filters used by path-limited log."
+    )
+    graph_actions = argsp.add_subparsers(title="Actions", dest="action")
+    graph_actions.required = True
+    graph_actions.add_parser("write", help="Write filters for all reachable commits.")
+    graph_actions.add_parser("verify", help="Check the filters and report false-positive statistics.")
+
+    # reflog command
+    argsp = argsubparsers.add_parser("reflog", help="Show the history of a ref's values.")
+    argsp.add_argument(
+        "-n",
+        "--max-count",
+        dest="max_count",
+        type=int,
+        default=None,
+        help="Show only the most recent entries.",
+    )
+    argsp.add_argument("ref", nargs="?", default="HEAD", help="The ref whose log to show.")
+
+    # merge command
+    argsp = argsubparsers.add_parser("merge", help="Join another line of history into the current branch.")
+    argsp.add_argument("-m", metavar="message", dest="message", default=None, help="Message of the merge commit.")
+    argsp.add_argument(
+        "--no-ff",
+        dest="no_ff",
+        action="store_true",
+        help="Create a merge commit even when a fast-forward is possible.",
+    )
+    argsp.add_argument("commit", help="The commit to merge.")
+
+    # merge-tree command
+    argsp = argsubparsers.add_parser(
+        "merge-tree", help="Merge two commits in memory and print the resulting tree."
+    )
+    argsp.add_argument(
+        "--name-only",
+        dest="name_only",
+        action="store_true",
+        help="List only the names of conflicted files.",
+    )
+    argsp.add_argument("ours", help="Our commit.")
+    argsp.add_argument("theirs", help="Their commit.")
+
+    # cherry-pick command
+    argsp = argsubparsers.add_parser("cherry-pick", help="Apply the changes introduced by existing commits.")
+    argsp.add_argument(
+        "--branch",
+        default=None,
+        help="Apply onto this branch instead of HEAD (the worktree is not touched).",
+    )
+    argsp.add_argument("commits", nargs="+", help="Commits (or A..B ranges) to apply.")
+
+    # rebase command
+    argsp = argsubparsers.add_parser("rebase", help="Reapply commits on top of another base.")
+    argsp.add_argument(
+        "--onto",
+        default=None,
+        help="Starting point for the new commits (default: upstream).",
+    )
+    argsp.add_argument("upstream", help="Commits reachable from here are not replayed.")
+    argsp.add_argument("branch", nargs="?", default=None, help="Branch to rebase (default: HEAD).")
+
+    # fast-export command
+    argsp = argsubparsers.add_parser("fast-export", help="Write history as a git fast-import stream.")
+    argsp.add_argument("--all", action="store_true", help="Export all refs.")
+    argsp.add_argument(
+        "--import-marks",
+        dest="import_marks",
+        metavar="file",
+        default=None,
+        help="Treat the objects in this marks file as already exported.",
+    )
+    argsp.add_argument(
+        "--export-marks",
+        dest="export_marks",
+        metavar="file",
+        default=None,
+        help="Write the marks table to this file at the end.",
+    )
+    argsp.add_argument("refs", nargs="*", help="Refs to export.")
+
+    # fast-import command
+    argsp = argsubparsers.add_parser("fast-import", help="Import a git fast-import stream from stdin.")
+    argsp.add_argument(
+        "--force",
+        action="store_true",
+        help="Update branches even if they lose commits.",
+    )
+    argsp.add_argument(
+        "--import-marks",
+        dest="import_marks",
+        metavar="file",
+        default=None,
+        help="Load marks from this file first (if it exists).",
+    )
+    argsp.add_argument(
+        "--export-marks",
+        dest="export_marks",
+        metavar="file",
+        default=None,
+        help="Write the marks table to this file at the end.",
+    )
+
+    # reset command
+    argsp = argsubparsers.add_parser("reset", help="Reset current HEAD to the specified state.")
+    modes = argsp.add_mutually_exclusive_group()
+    for mode, mode_help in (
+        ("soft", "Only move HEAD."),
+        ("mixed", "Move HEAD and reset the index (default)."),
+        ("hard", "Move HEAD and reset the index and the working tree."),
+    ):
+        modes.add_argument(
+            "--" + mode,
+            dest="mode",
+            action="store_const",
+            const=mode,
+            help=mode_help,
+        )
+    argsp.add_argument("commit", nargs="?", default="HEAD", help="The commit to reset to (default: HEAD).")
+
+    # merge-base command
+    argsp = argsubparsers.add_parser("merge-base", help="Find as good common ancestors as possible for a merge.")
+    argsp.add_argument(
+        "-a",
+        "--all",
+        action="store_true",
+        help="Output all merge bases instead of just one.",
+    )
+    argsp.add_argument(
+        "--is-ancestor",
+        dest="is_ancestor",
+        action="store_true",
+        help="Exit with status 0 if the first commit is an ancestor of the second, 1 otherwise.",
+    )
+    argsp.add_argument("commits", nargs="+", help="Commits to compare.")
+
     # rev-parse command
     argsp = argsubparsers.add_parser("rev-parse", help="Parse revision identifiers.")
     argsp.add_argument(
@@ -100,7 +511,9 @@ def build_arg_parser() -> ArgumentParser:
         default=None,
         help="Specify the expected type",
     )
-    argsp.add_argument("name", help="The name to resolve.")
+    argsp.add_argument(
+        "name", nargs="+", help="Names, revision expressions (HEAD~2, v1^{tree}, @{1}, HEAD:path) or ranges (A..B)."
+    )
 
     # ls-files command
     argsp = argsubparsers.add_parser("ls-files", help="List all the staged files")
@@ -123,6 +536,15 @@ def build_arg_parser() -> ArgumentParser:
     )
     argsp.add_argument("path", nargs="+", help="Files to remove")
 
+    # mv command
+    argsp = argsubparsers.add_parser(
+        "mv", help="Move or rename a file, a directory, or a symlink."
+    )
+    argsp.add_argument("-f", "--force", action="store_true", help="Overwrite an existing destination file.")
+    argsp.add_argument("-v", "--verbose", action="store_true", help="Report the names of files as they are moved.")
+    argsp.add_argument("source", nargs="+", help="Files or directories to move")
+    argsp.add_argument("destination", help="New name, or an existing directory")
+
     # add command
     argsp = argsubparsers.add_parser("add", help="Add file contents to the index.")
     argsp.add_argument("path", nargs="+", help="Files to add")
@@ -137,5 +559,11 @@ def build_arg_parser() -> ArgumentParser:
         dest="message",
         help="Message to associate with this commit.",
     )
+    argsp.add_argument(
+        "-a",
+        "--all",
+        action="store_true",
+        help="Stage modified and deleted tracked files before committing.",
+    )
 
     return argparser
\ No newline at end of file
@@ -28,17 +28,71 @@ def cmd_check_ignore(args: Namespace) -> None:
 
 
 def cmd_checkout(args: Namespace) -> None:
-    """Checkout a commit inside a directory."""
+    """Switch branches, or checkout a commit inside a directory."""
     from ..operations.checkout import cmd_checkout as _cmd_checkout
     _cmd_checkout(args)
 
 
+def cmd_switch(args: Namespace) -> None:
+    """Switch branches."""
+    from ..operations.checkout import cmd_switch as _cmd_switch
+    _cmd_switch(args)
+
+
+def cmd_commit_graph(args: Namespace) -> None:
+    """Write or verify the changed-path Bloom filters."""
+    from ..operations.commit_graph import cmd_commit_graph as _cmd_commit_graph
+    _cmd_commit_graph(args)
+
+
+def cmd_cherry_pick(args: Namespace) -> None:
+    """Apply the changes introduced by existing commits."""
+    from ..operations.rebase import cmd_cherry_pick as _cmd_cherry_pick
+    _cmd_cherry_pick(args)
+
+
+def cmd_clone(args: Namespace) -> None:
+    """Clone a local repository."""
+    from ..operations.clone import cmd_clone as _cmd_clone
+    _cmd_clone(args)
+
+
 def cmd_commit(args: Namespace) -> None:
     """Record changes to the repository."""
     from ..operations.commit import cmd_commit as _cmd_commit
     _cmd_commit(args)
 
 
+def cmd_diff(args: Namespace) -> None:
+    """Show changes between the worktree, the index and commits."""
+    from ..operations.diff import cmd_diff as _cmd_diff
+    _cmd_diff(args)
+
+
+def cmd_diff_tree(args: Namespace) -> None:
+    """Compare the content of two trees."""
+    from ..operations.diff_tree import cmd_diff_tree as _cmd_diff_tree
+    _cmd_diff_tree(args)
+
+
+def cmd_fast_export(args: Namespace) -> None:
+    """Write history as a git fast-import stream."""
+    from ..operations.fast_export import cmd_fast_export as _cmd_fast_export
+    _cmd_fast_export(args)
+
+
+def cmd_fast_import(args: Namespace) -> None:
+    """Import a git fast-import stream from stdin."""
+    from ..operations.fast_import import cmd_fast_import as _cmd_fast_import
+    _cmd_fast_import(args)
+
+
+def cmd_for_each_ref(args: Namespace) -> None:
+    """List refs with formatted fields."""
+    from ..core.refs import cmd_for_each_ref as _cmd_for_each_ref
+    _cmd_for_each_ref(args)
+
+
 def cmd_hash_object(args: Namespace) -> None:
     """Compute object ID and optionally create a blob from a file."""
     from ..utils.hashing import cmd_hash_object as _cmd_hash_object
@@ -63,6 +117,54 @@ def cmd_ls_tree(args: Namespace) -> None:
     _cmd_ls_tree(args)
 
 
+def cmd_merge(args: Namespace) -> None:
+    """Join another line of history into the current branch."""
+    from ..operations.merge import cmd_merge as _cmd_merge
+    _cmd_merge(args)
+
+
+def cmd_merge_base(args: Namespace) -> None:
+    """Find common ancestors of commits."""
+    from ..operations.merge_base import cmd_merge_base as _cmd_merge_base
+    _cmd_merge_base(args)
+
+
+def cmd_merge_tree(args: Namespace) -> None:
+    """Merge two commits without touching the worktree or index."""
+    from ..operations.merge import cmd_merge_tree as _cmd_merge_tree
+    _cmd_merge_tree(args)
+
+
+def cmd_mv(args: Namespace) -> None:
+    """Move or rename a file, a directory, or a symlink."""
+    from ..operations.add_remove import cmd_mv as _cmd_mv
+    _cmd_mv(args)
+
+
+def cmd_pack_refs(args: Namespace) -> None:
+    """Pack heads and tags for efficient repository access."""
+    from ..core.refs import cmd_pack_refs as _cmd_pack_refs
+    _cmd_pack_refs(args)
+
+
+def cmd_rebase(args: Namespace) -> None:
+    """Reapply commits on top of another base."""
+    from ..operations.rebase import cmd_rebase as _cmd_rebase
+    _cmd_rebase(args)
+
+
+def cmd_reflog(args: Namespace) -> None:
+    """Show the reflog of a ref."""
+    from ..core.reflog import cmd_reflog as _cmd_reflog
+    _cmd_reflog(args)
+
+
+def cmd_reset(args: Namespace) -> None:
+    """Reset current HEAD to the specified state."""
+    from ..operations.reset import cmd_reset as _cmd_reset
+    _cmd_reset(args)
+
+
 def cmd_rev_parse(args: Namespace) -> None:
     """Parse revision identifiers."""
     from ..core.refs import cmd_rev_parse as _cmd_rev_parse
@@ -75,6 +177,12 @@ def cmd_rm(args: Namespace) -> None:
     _cmd_rm(args)
 
 
+def cmd_sparse_checkout(args: Namespace) -> None:
+    """Restrict the worktree to a set of directories."""
+    from ..operations.sparse_checkout import cmd_sparse_checkout as _cmd_sparse_checkout
+    _cmd_sparse_checkout(args)
+
+
 def cmd_status(args: Namespace) -> None:
     """Show the working tree status."""
     from ..operations.status import cmd_status as _cmd_status
@@ -6,6 +6,9 @@ from typing import List
 from .arg_parsers import build_arg_parser
 from . import commands
 
+# Commands that take a pathspec after a "--" separator
+PATHSPEC_COMMANDS = ("log",)
+
 
 def main(argv: List[str] | None = None) -> None:
     """
@@ -17,6 +20,8 @@ def main(argv: List[str] | None = None) -> None:
 
     Behavior:
         - Builds the argument parser with all supported commands.
+        - Splits off the pathspec after "--" for commands that take one
+          (argparse would otherwise bind it to optional positionals).
         - Parses the provided arguments.
         - Looks up the corresponding command handler in the dispatch table.
         - Executes the handler or prints an error if the command is unknown.
@@ -24,8 +29,14 @@ def main(argv: List[str] | None = None) -> None:
     if argv is None:
         argv = sys.argv[1:]
 
+    pathspec: List[str] = []
+    if argv and argv[0] in PATHSPEC_COMMANDS and "--" in argv:
+        split = argv.index("--")
+        argv, pathspec = argv[:split], argv[split + 1:]
+
     parser = build_arg_parser()
     args: Namespace = parser.parse_args(argv)
+    args.pathspec = pathspec
 
     if not args.command:
         parser.print_help()
@@ -36,14 +47,32 @@ def main(argv: List[str] | None = None) -> None:
         "cat-file": commands.cmd_cat_file,
         "check-ignore": commands.cmd_check_ignore,
         "checkout": commands.cmd_checkout,
+        "cherry-pick": commands.cmd_cherry_pick,
+        "clone": commands.cmd_clone,
         "commit": commands.cmd_commit,
+        "commit-graph": commands.cmd_commit_graph,
+        "diff": commands.cmd_diff,
+        "diff-tree": commands.cmd_diff_tree,
+        "fast-export": commands.cmd_fast_export,
+        "fast-import": commands.cmd_fast_import,
+        "for-each-ref": commands.cmd_for_each_ref,
         "hash-object": commands.cmd_hash_object,
         "log": commands.cmd_log,
         "ls-files": commands.cmd_ls_files,
         "ls-tree": commands.cmd_ls_tree,
+        "merge": commands.cmd_merge,
+        "merge-base": commands.cmd_merge_base,
+        "merge-tree": commands.cmd_merge_tree,
+        "mv": commands.cmd_mv,
+        "pack-refs": commands.cmd_pack_refs,
+        "rebase": commands.cmd_rebase,
+        "reflog": commands.cmd_reflog,
+        "reset": commands.cmd_reset,
         "rev-parse": commands.cmd_rev_parse,
         "rm": commands.cmd_rm,
+        "sparse-checkout": commands.cmd_sparse_checkout,
         "status": commands.cmd_status,
+        "switch": commands.cmd_switch,
         "tag": commands.cmd_tag,
         "add": commands.cmd_add,
     }
@@ -4,7 +4,7 @@ import os
 from datetime import datetime
 import pwd
 import grp
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
 class GitIndexEntry:
@@ -25,6 +25,7 @@ class GitIndexEntry:
         flag_assume_valid: Optional[bool] = None,
         flag_stage: Optional[int] = None,
         name: Optional[str] = None,
+        flag_skip_worktree: bool = False,
     ) -> None:
         self.ctime = ctime
         self.mtime = mtime
@@ -39,6 +40,7 @@ class GitIndexEntry:
         self.flag_assume_valid = flag_assume_valid
         self.flag_stage = flag_stage
         self.name = name
+        self.flag_skip_worktree = flag_skip_worktree
 
 
 class GitIndex:
@@ -49,6 +51,104 @@ class GitIndex:
         self.entries: List[GitIndexEntry] = entries if entries is not None else []
 
 
+def index_entry_from_stat(
+    name: str,
+    sha: str,
+    stat: Optional[os.stat_result],
+    mode_type: int = 0b1000,
+    mode_perms: int = 0o644,
+) -> GitIndexEntry:
+    """
+    Build an index entry for a worktree file from its stat data.
+
+    Args:
+        name: Path relative to the worktree.
+        sha: SHA-1 of the blob holding the file contents.
+        stat: Result of os.stat/os.lstat on the file, or None for a path
+              that is not present in the worktree (marked skip-worktree).
+        mode_type: Object type bits (0b1000 regular file, 0b1010 symlink).
+        mode_perms: Permission bits.
+
+    Returns:
+        GitIndexEntry populated with the file's stat data.
+    """
+    if stat is None:
+        return GitIndexEntry(
+            ctime=(0, 0), mtime=(0, 0), dev=0, ino=0,
+            mode_type=mode_type, mode_perms=mode_perms,
+            uid=0, gid=0, fsize=0, sha=sha,
+            flag_assume_valid=False, flag_stage=0, name=name,
+            flag_skip_worktree=True,
+        )
+
+    return GitIndexEntry(
+        ctime=(int(stat.st_ctime), stat.st_ctime_ns % 10 ** 9),
+        mtime=(int(stat.st_mtime), stat.st_mtime_ns % 10 ** 9),
+        dev=stat.st_dev & 0xFFFFFFFF,
+        ino=stat.st_ino & 0xFFFFFFFF,
+        mode_type=mode_type,
+        mode_perms=mode_perms,
+        uid=stat.st_uid,
+        gid=stat.st_gid,
+        fsize=stat.st_size & 0xFFFFFFFF,
+        sha=sha,
+        flag_assume_valid=False,
+        flag_stage=0,
+        name=name,
+    )
+
+
+def tree_mode_to_index(mode: bytes) -> Tuple[int, int]:
+    """
+    Convert a tree entry mode into index (mode_type, mode_perms).
+
+    Args:
+        mode: Tree entry mode such as b'100644'.
+
+    Returns:
+        Tuple of (mode_type, mode_perms) as stored in GitIndexEntry.
+    """
+    if mode.startswith(b'04'):
+        return 0b0100, 0
+    if mode == b'120000':
+        return 0b1010, 0
+    if mode == b'160000':
+        return 0b1110, 0
+    return 0b1000, 0o755 if mode == b'100755' else 0o644
+
+
+def index_entry_tree_mode(entry: GitIndexEntry) -> bytes:
+    """Return the tree mode matching an index entry (e.g. b'100644')."""
+    return f"{entry.mode_type:02o}{entry.mode_perms:04o}".encode("ascii")
+
+
+def index_entry_is_sparse_dir(entry: GitIndexEntry) -> bool:
+    """Check whether an entry is a collapsed sparse directory (a tree entry)."""
+    return entry.mode_type == 0b0100
+
+
+def index_entry_stat_matches(entry: GitIndexEntry, stat: os.stat_result) -> bool:
+    """
+    Check whether a file's stat data still matches its index entry.
+
+    A match means the file can be assumed unchanged without rehashing it.
+
+    Args:
+        entry: Index entry to compare against.
+        stat: Result of os.stat/os.lstat on the worktree file.
+
+    Returns:
+        True if ctime, mtime and size are unchanged.
+    """
+    ctime_ns = entry.ctime[0] * 10**9 + entry.ctime[1]
+    mtime_ns = entry.mtime[0] * 10**9 + entry.mtime[1]
+    return (
+        stat.st_ctime_ns == ctime_ns
+        and stat.st_mtime_ns == mtime_ns
+        and (stat.st_size & 0xFFFFFFFF) == entry.fsize
+    )
+
+
 def index_read(repo) -> GitIndex:
     """
     Read and parse the index file of the given repository.
@@ -77,7 +177,7 @@ def index_read(repo) -> GitIndex:
         return GitIndex()
 
     version = int.from_bytes(header[4:8], "big")
-    if version != 2:
+    if version not in (2, 3):
         return GitIndex()
 
     count = int.from_bytes(header[8:12], "big")
@@ -111,17 +211,27 @@ def index_read(repo) -> GitIndex:
 
         flags = int.from_bytes(content[idx + 60:idx + 62], "big")
         flag_assume_valid = (flags & 0x8000) != 0
+        flag_extended = (flags & 0x4000) != 0
         flag_stage = flags & 0x3000
         name_length = flags & 0x0FFF
 
         idx += 62
 
+        # Version 3 extended flags
+        flag_skip_worktree = False
+        if flag_extended:
+            if version < 3 or idx + 2 > len(content):
+                return GitIndex()
+            ext_flags = int.from_bytes(content[idx:idx + 2], "big")
+            flag_skip_worktree = (ext_flags & 0x4000) != 0
+            idx += 2
+
         # Parse name
         if name_length < 0x0FFF:
             if idx + name_length > len(content):
                 return GitIndex()
             name_bytes = content[idx:idx + name_length]
-            idx += name_length
+            idx += name_length + 1  # Skip the NUL terminator
         else:
             null_idx = content.find(b"\x00", idx)
             if null_idx == -1:
@@ -153,12 +263,109 @@ def index_read(repo) -> GitIndex:
                 flag_assume_valid=flag_assume_valid,
                 flag_stage=flag_stage,
                 name=name,
+                flag_skip_worktree=flag_skip_worktree,
             )
         )
 
     return GitIndex(version=version, entries=entries)
 
 
+def index_expand(repo, index: GitIndex, paths: Optional[List[str]] = None) -> bool:
+    """
+    Replace sparse directory entries by the file entries of their trees.
+
+    Args:
+        repo: Repository object providing object access.
+        index: GitIndex to expand in place.
+        paths: Only expand directories containing (or equal to) one of these
+               worktree-relative paths; expand everything if None.
+
+    Returns:
+        True if any entry was expanded.
+    """
+    from ..utils.hashing import object_read
+
+    result: List[GitIndexEntry] = []
+    expanded = False
+
+    for e in index.entries:
+        if not index_entry_is_sparse_dir(e) or (
+            paths is not None
+            and not any(p.rstrip("/") == e.name[:-1] or p.startswith(e.name) for p in paths)
+        ):
+            result.append(e)
+            continue
+
+        expanded = True
+        stack = [(e.name[:-1], e.sha)]
+        while stack:
+            base, sha = stack.pop()
+            for leaf in object_read(repo, sha).items:
+                name = base + "/" + leaf.path
+                if leaf.mode.startswith(b'04'):
+                    stack.append((name, leaf.sha))
+                else:
+                    mode_type, mode_perms = tree_mode_to_index(leaf.mode)
+                    result.append(index_entry_from_stat(name, leaf.sha, None, mode_type, mode_perms))
+
+    if expanded:
+        result.sort(key=lambda entry: entry.name)
+        index.entries = result
+    return expanded
+
+
+def index_collapse(repo, index: GitIndex, cone) -> int:
+    """
+    Collapse every directory outside a sparse cone into a single tree entry.
+
+    A directory is only collapsed when all of its entries are skip-worktree
+    and none are conflicted; its entry then points at the tree built from them.
+
+    Args:
+        repo: Repository object used to write tree objects.
+        index: GitIndex to collapse in place.
+        cone: SparseCone defining which directories stay expanded.
+
+    Returns:
+        Number of sparse directory entries in the resulting index.
+    """
+    from ..operations.commit import tree_from_index
+
+    groups: Dict[str, List[GitIndexEntry]] = {}
+    result: List[GitIndexEntry] = []
+
+    for e in index.entries:
+        parts = e.name.rstrip("/").split("/")
+        if not index_entry_is_sparse_dir(e):
+            parts = parts[:-1]
+        top = None
+        for i in range(1, len(parts) + 1):
+            d = "/".join(parts[:i])
+            if not cone.contains_dir(d):
+                top = d
+                break
+        if top is None:
+            result.append(e)
+        else:
+            groups.setdefault(top, []).append(e)
+
+    count = 0
+    for top, group in groups.items():
+        if not all(e.flag_skip_worktree and not e.flag_stage for e in group):
+            result.extend(group)
+            continue
+        count += 1
+        if len(group) == 1 and group[0].name == top + "/":
+            result.append(group[0])
+            continue
+        sha = tree_from_index(repo, GitIndex(entries=group), prefix=top)
+        result.append(index_entry_from_stat(top + "/", sha, None, 0b0100, 0))
+
+    result.sort(key=lambda entry: entry.name)
+    index.entries = result
+    return count
+
+
 def index_write(repo, index: GitIndex) -> None:
     """
     Write the given Git index to disk.
@@ -169,6 +376,9 @@ def index_write(repo, index: GitIndex) -> None:
     """
     from ..utils.file_io import repo_file
 
+    # Extended flags (skip-worktree) need index format version 3
+    index.version = 3 if any(e.flag_skip_worktree for e in index.entries) else 2
+
     with open(repo_file(repo, "index"), "wb") as f:
         f.write(b"DIRC")
         f.write(index.version.to_bytes(4, "big"))
@@ -196,7 +406,11 @@ def index_write(repo, index: GitIndex) -> None:
             bytes_len = len(name_bytes)
             name_length = 0xFFF if bytes_len >= 0xFFF else bytes_len
 
-            f.write((flag_assume_valid | e.flag_stage | name_length).to_bytes(2, "big"))
+            flag_extended = 0x1 << 14 if e.flag_skip_worktree else 0
+            f.write((flag_assume_valid | flag_extended | e.flag_stage | name_length).to_bytes(2, "big"))
+            if flag_extended:
+                f.write((0x1 << 14).to_bytes(2, "big"))
+                idx += 2
             f.write(name_bytes)
             f.write((0).to_bytes(1, "big"))
 
@@ -225,7 +439,12 @@ def cmd_ls_files(args) -> None:
     for e in index.entries:
         print(e.name)
         if args.verbose:
-            entry_type = {0b1000: "regular file", 0b1010: "symlink", 0b1110: "git link"}[e.mode_type]
+            entry_type = {
+                0b1000: "regular file",
+                0b1010: "symlink",
+                0b1110: "git link",
+                0b0100: "sparse directory",
+            }[e.mode_type]
             print(f"  {entry_type} with perms: {e.mode_perms:o}")
             print(f"  on blob: {e.sha}")
             print(
@@ -235,7 +454,8 @@ def cmd_ls_files(args) -> None:
             print(f"  device: {e.dev}, inode: {e.ino}")
             print(f"  user: {pwd.getpwuid(e.uid).pw_name} ({e.uid})  "
                   f"group: {grp.getgrgid(e.gid).gr_name} ({e.gid})")
-            print(f"  flags: stage={e.flag_stage} assume_valid={e.flag_assume_valid}")
+            print(f"  flags: stage={e.flag_stage} assume_valid={e.flag_assume_valid} "
+                  f"skip_worktree={e.flag_skip_worktree}")
 
 
 def cmd_ls_tree(args) -> None:
@@ -1,5 +1,5 @@
 from .base import GitObject
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 
 class GitCommit(GitObject):
@@ -32,3 +32,60 @@ class GitCommit(GitObject):
         Initialize an empty commit object.
         """
         self.kvlm: Dict[bytes, Any] = {}
+
+
+class GitCommitView:
+    """
+    Lightweight, read-only view of a commit's graph fields.
+
+    Only `tree`, `parents` and the committer timestamp are extracted, which is
+    all that history walks and ancestry queries need. The message and the
+    remaining headers are never parsed or copied.
+    """
+
+    __slots__ = ("sha", "tree", "parents", "committer_time")
+
+    def __init__(self, sha: str, tree: Optional[str], parents: List[str], committer_time: int) -> None:
+        self.sha = sha
+        self.tree = tree
+        self.parents = parents
+        self.committer_time = committer_time
+
+
+def commit_view_read(repo: Any, sha: str, cache: Optional[Dict[str, GitCommitView]] = None) -> GitCommitView:
+    """
+    Read a commit as a `GitCommitView`, optionally memoized in `cache`.
+
+    Args:
+        repo: The Git repository object.
+        sha: SHA-1 of the commit.
+        cache: Optional dictionary used to memoize views by SHA.
+
+    Returns:
+        The GitCommitView for the commit.
+
+    Raises:
+        Exception: If the object is not a commit.
+    """
+    if cache is not None:
+        view = cache.get(sha)
+        if view is not None:
+            return view
+
+    from ...utils.hashing import object_read_raw
+    from ...utils.kvlm import kvlm_parse_header
+
+    fmt, data = object_read_raw(repo, sha)
+    if fmt != b'commit':
+        raise Exception(f"Object {sha} is not a commit")
+
+    tree, parents, when = kvlm_parse_header(data)
+    view = GitCommitView(
+        sha,
+        tree.decode("ascii") if tree is not None else None,
+        [p.decode("ascii") for p in parents],
+        when,
+    )
+    if cache is not None:
+        cache[sha] = view
+    return view
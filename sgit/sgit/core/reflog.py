@@ -0,0 +1,161 @@
+import os
+from typing import Any, Iterator, NamedTuple, Optional
+
+
+# Size of the blocks read backwards from the end of a reflog
+REFLOG_BLOCK_SIZE = 8192
+
+
+class ReflogEntry(NamedTuple):
+    """One line of a reflog: a ref moving from `old_sha` to `new_sha`."""
+
+    old_sha: str
+    new_sha: str
+    ident: str
+    message: str
+
+
+def reflog_should_log(ref: str) -> bool:
+    """Check whether updates to `ref` are recorded (HEAD and branches, like core.logAllRefUpdates)."""
+    return ref == "HEAD" or ref.startswith(("refs/heads/", "refs/remotes/"))
+
+
+def reflog_path(repo: Any, ref: str) -> str:
+    """Return the path of the reflog file of a full ref name."""
+    return os.path.join(repo.gitdir, "logs", *ref.split("/"))
+
+
+def reflog_ident() -> str:
+    """Return the "Name <email> <timestamp> <tz>" identity for a new reflog entry."""
+    import time
+    from ..utils.config import gitconfig_read, gitconfig_user_get
+
+    user = gitconfig_user_get(gitconfig_read()) or "Unknown User <unknown@example.com>"
+    now = time.time()
+    offset = int(time.localtime(now).tm_gmtoff)
+    tz = "{}{:02}{:02}".format("+" if offset >= 0 else "-", abs(offset) // 3600, (abs(offset) % 3600) // 60)
+    return f"{user} {int(now)} {tz}"
+
+
+def reflog_append(repo: Any, ref: str, old_sha: Optional[str], new_sha: str, message: str = "") -> None:
+    """
+    Append an entry to the reflog of `ref`.
+
+    The whole line is written with a single write(2) on an O_APPEND file
+    descriptor, so entries from concurrent writers never interleave.
+
+    Args:
+        repo: The repository object.
+        ref: Full ref name (e.g. "HEAD" or "refs/heads/master").
+        old_sha: Previous value, or None if the ref did not exist.
+        new_sha: New value.
+        message: Short description of the move (e.g. "commit: Fix typo").
+    """
+    from .refs import ZERO_OID
+
+    message = " ".join(message.split())
+    line = f"{old_sha or ZERO_OID} {new_sha} {reflog_ident()}\t{message}\n".encode("utf-8")
+
+    path = reflog_path(repo, ref)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def reflog_delete(repo: Any, ref: str) -> None:
+    """Remove the reflog of a deleted ref, if any."""
+    try:
+        os.unlink(reflog_path(repo, ref))
+    except FileNotFoundError:
+        pass
+
+
+def reflog_parse_line(line: bytes) -> ReflogEntry:
+    """
+    Parse one reflog line.
+
+    Raises:
+        Exception: If the line is malformed.
+    """
+    text = line.decode("utf-8", errors="replace")
+    head, _, message = text.partition("\t")
+    parts = head.split(" ", 2)
+    if len(parts) != 3:
+        raise Exception(f"Malformed reflog line: {text!r}")
+    return ReflogEntry(parts[0], parts[1], parts[2], message)
+
+
+def reflog_read_reverse(repo: Any, ref: str) -> Iterator[ReflogEntry]:
+    """
+    Iterate over the reflog of `ref`, newest entry first.
+
+    The file is read backwards in fixed-size blocks starting with a single
+    seek to its end, so fetching the last few entries costs one or two reads
+    regardless of how long the log is.
+
+    Args:
+        repo: The repository object.
+        ref: Full ref name.
+
+    Yields:
+        ReflogEntry objects, most recent first. Nothing if there is no log.
+    """
+    path = reflog_path(repo, ref)
+    if not os.path.isfile(path):
+        return
+
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b''
+        while pos > 0:
+            step = min(REFLOG_BLOCK_SIZE, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step) + tail
+            lines = block.split(b'\n')
+            # The first piece may be the end of a line that starts in an earlier block
+            tail = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield reflog_parse_line(line)
+        if tail:
+            yield reflog_parse_line(tail)
+
+
+def reflog_ref_name(repo: Any, name: str) -> str:
+    """
+    Map a user-supplied name ("HEAD", "master", "refs/heads/master") to the
+    full ref whose reflog should be read.
+    """
+    if name == "HEAD" or name.startswith("refs/"):
+        return name
+    for prefix in ("refs/heads/", "refs/remotes/", "refs/"):
+        if os.path.isfile(reflog_path(repo, prefix + name)):
+            return prefix + name
+    return "refs/heads/" + name
+
+
+def cmd_reflog(args: Any) -> None:
+    """
+    CLI command to show the reflog of a ref, newest entry first.
+
+    Args:
+        args: Parsed CLI arguments (expects 'ref' and 'max_count').
+    """
+    from itertools import islice
+    from ..utils.file_io import repo_find
+    from ..utils.oid_table import object_abbrev
+
+    repo = repo_find()
+    ref = reflog_ref_name(repo, args.ref)
+
+    entries = reflog_read_reverse(repo, ref)
+    if args.max_count is not None:
+        entries = islice(entries, args.max_count)
+    # Each SHA is abbreviated from its own fan-out directory, so `-n 1` stays
+    # cheap however many objects the repository holds
+    for i, entry in enumerate(entries):
+        print(f"{object_abbrev(repo, entry.new_sha)} {args.ref}@{{{i}}}: {entry.message}")
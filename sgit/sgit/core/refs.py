@@ -1,12 +1,134 @@
 import os
 import re
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+# Per-process cache of parsed packed-refs files, keyed by path
+_packed_refs_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Tuple[str, Optional[str]]]]] = {}
+
+
+def packed_refs_read(repo: Any, fresh: bool = False) -> Dict[str, Tuple[str, Optional[str]]]:
+    """
+    Read the repository's packed-refs file.
+
+    The parsed result is cached per process and invalidated when the file's
+    mtime or size changes.
+
+    Args:
+        repo: The repository object.
+        fresh: Always parse the file, e.g. while holding `packed-refs.lock`,
+               where a rewrite within the mtime granularity must not be
+               missed.
+
+    Returns:
+        Dictionary mapping full ref names (e.g. "refs/tags/v1.0") to
+        (SHA-1, peeled SHA-1 or None).
+    """
+    path = os.path.join(repo.gitdir, "packed-refs")
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _packed_refs_cache.get(path)
+    if cached and cached[0] == key and not fresh:
+        return cached[1]
+
+    refs: Dict[str, Tuple[str, Optional[str]]] = {}
+    last: Optional[str] = None
+    with open(path, "r") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("^"):
+                if last is not None:
+                    refs[last] = (refs[last][0], line[1:])
+                continue
+            sha, _, name = line.partition(" ")
+            refs[name] = (sha, None)
+            last = name
+
+    _packed_refs_cache[path] = (key, refs)
+    return refs
+
+
+def lock_acquire(path: str) -> int:
+    """
+    Take the `<path>.lock` file used to serialize writers of `path`.
+
+    The lock is created with O_EXCL, so exactly one process can hold it.
+
+    Args:
+        path: The file to be protected.
+
+    Returns:
+        Open file descriptor of the lock file.
+
+    Raises:
+        Exception: If another process holds the lock.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        return os.open(path + ".lock", os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    except FileExistsError:
+        raise Exception(
+            f"Unable to create '{path}.lock': File exists. "
+            "Another sgit process seems to be running in this repository."
+        )
+
+
+def lock_write(fd: int, data: bytes) -> None:
+    """Write `data` to a held lock file, fsync it and close it."""
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def packed_refs_render(refs: Dict[str, Tuple[str, Optional[str]]]) -> bytes:
+    """
+    Render packed refs in git's `packed-refs` file format.
+
+    Args:
+        refs: Dictionary of full ref name -> (SHA-1, peeled SHA-1 or None).
+
+    Returns:
+        The file contents as bytes.
+    """
+    lines = ["# pack-refs with: peeled fully-peeled sorted \n"]
+    for name in sorted(refs):
+        sha, peeled = refs[name]
+        lines.append(f"{sha} {name}\n")
+        if peeled:
+            lines.append(f"^{peeled}\n")
+    return "".join(lines).encode("ascii")
+
+
+def packed_refs_write(repo: Any, refs: Dict[str, Tuple[str, Optional[str]]]) -> None:
+    """
+    Atomically replace the repository's packed-refs file.
+
+    Args:
+        repo: The repository object.
+        refs: Dictionary of full ref name -> (SHA-1, peeled SHA-1 or None).
+    """
+    path = os.path.join(repo.gitdir, "packed-refs")
+    lock_write(lock_acquire(path), packed_refs_render(refs))
+    os.replace(path + ".lock", path)
+    _packed_refs_cache.pop(path, None)
 
 
 def ref_resolve(repo: Any, ref: str) -> Optional[str]:
     """
     Resolve a Git reference to its final SHA-1 commit hash.
 
+    Loose ref files take precedence over entries in packed-refs.
+
     Args:
         repo: The repository object.
         ref: The reference path (e.g., "HEAD", "refs/heads/master").
@@ -17,7 +139,8 @@ def ref_resolve(repo: Any, ref: str) -> Optional[str]:
     from ..utils.file_io import repo_file
     path = repo_file(repo, ref)
     if not path or not os.path.isfile(path):
-        return None
+        packed = packed_refs_read(repo).get(ref)
+        return packed[0] if packed else None
     with open(path, "r") as f:
         data = f.read().strip()
     if data.startswith("ref: "):
@@ -25,6 +148,54 @@ def ref_resolve(repo: Any, ref: str) -> Optional[str]:
     return data
 
 
+def ref_peeled(repo: Any, ref: str) -> Optional[str]:
+    """
+    Return the cached peeled target of a packed ref, without reading objects.
+
+    Args:
+        repo: The repository object.
+        ref: Full ref name (e.g. "refs/tags/v1.0").
+
+    Returns:
+        The peeled SHA-1 if the ref is only packed and has a `^` line, else None.
+    """
+    packed = packed_refs_read(repo).get(ref)
+    if not packed or not packed[1]:
+        return None
+    if os.path.isfile(os.path.join(repo.gitdir, ref)):
+        return None
+    return packed[1]
+
+
+def ref_list_flat(repo: Any, prefix: str = "refs/") -> Dict[str, str]:
+    """
+    List all references under `prefix`, merging loose and packed refs.
+
+    Args:
+        repo: The repository object.
+        prefix: Ref name prefix to list (e.g. "refs/tags/").
+
+    Returns:
+        Dictionary of full ref name -> SHA-1, sorted by name.
+    """
+    res: Dict[str, str] = {
+        name: sha for name, (sha, _) in packed_refs_read(repo).items() if name.startswith(prefix)
+    }
+
+    base = os.path.join(repo.gitdir, prefix.rstrip("/"))
+    for root, dirs, files in os.walk(base):
+        dirs.sort()
+        for f in files:
+            if f.endswith(".lock"):
+                continue
+            name = os.path.relpath(os.path.join(root, f), repo.gitdir).replace(os.sep, "/")
+            sha = ref_resolve(repo, name)
+            if sha:
+                res[name] = sha
+
+    return dict(sorted(res.items()))
+
+
 def ref_list(repo: Any, path: Optional[str] = None) -> Dict[str, Union[str, dict]]:
     """
     Recursively list all references under the refs directory.
@@ -37,21 +208,292 @@ def ref_list(repo: Any, path: Optional[str] = None) -> Dict[str, Union[str, dict
         A nested dictionary mapping reference names to their SHA-1 hashes
         or further dictionaries if subdirectories are present.
     """
-    from ..utils.file_io import repo_dir
-    if not path:
-        path = repo_dir(repo, "refs")
+    prefix = "refs/"
+    if path:
+        prefix = os.path.relpath(path, repo.gitdir).replace(os.sep, "/").rstrip("/") + "/"
+
     res: Dict[str, Union[str, dict]] = {}
-    if not path or not os.path.isdir(path):
-        return res
-    for f in sorted(os.listdir(path)):
-        can = os.path.join(path, f)
-        if os.path.isdir(can):
-            res[f] = ref_list(repo, can)
-        else:
-            res[f] = ref_resolve(repo, can)
+    for name, sha in ref_list_flat(repo, prefix).items():
+        node = res
+        parts = name[len(prefix):].split("/")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = sha
     return res
 
 
+def tag_peeled(repo: Any, sha: str) -> Optional[str]:
+    """
+    Follow a chain of tag objects to the object it finally points at.
+
+    Args:
+        repo: The repository object.
+        sha: SHA-1 a tag ref points at.
+
+    Returns:
+        The peeled SHA-1 if `sha` is a tag object, else None (the value a
+        fully-peeled packed-refs file records as "no `^` line").
+    """
+    from ..utils.hashing import object_read
+
+    target = sha
+    obj = object_read(repo, target)
+    while obj.fmt == b'tag':
+        target = obj.kvlm[b'object'].decode("ascii")
+        obj = object_read(repo, target)
+    return target if target != sha else None
+
+
+def refs_pack(repo: Any, pack_all: bool = False) -> int:
+    """
+    Move loose refs into packed-refs, recording peeled targets of tags.
+
+    Args:
+        repo: The repository object.
+        pack_all: If True pack every ref; otherwise only tags (and refs that
+                  are already packed), like `git pack-refs`.
+
+    Returns:
+        Number of loose refs that were packed.
+    """
+    # The snapshot is read and written back under the packed-refs lock, so
+    # a concurrent deletion from packed-refs is not undone
+    packed_path = os.path.join(repo.gitdir, "packed-refs")
+    packed_fd: Optional[int] = lock_acquire(packed_path)
+
+    # Hold each loose ref's lock so concurrent updates are not lost
+    held: List[str] = []
+    moved: List[str] = []
+    try:
+        packed = dict(packed_refs_read(repo, fresh=True))
+        candidates = [
+            name for name in ref_list_flat(repo, "refs/")
+            if (pack_all or name.startswith("refs/tags/") or name in packed)
+            and os.path.isfile(os.path.join(repo.gitdir, name))
+        ]
+        for name in candidates:
+            path = os.path.join(repo.gitdir, name)
+            os.close(lock_acquire(path))
+            held.append(path)
+
+            sha = ref_resolve(repo, name)
+            if not sha or ref_symbolic_target(repo, name):
+                continue
+
+            peeled = tag_peeled(repo, sha) if name.startswith("refs/tags/") else None
+            packed[name] = (sha, peeled)
+            moved.append(name)
+
+        fd, packed_fd = packed_fd, None
+        lock_write(fd, packed_refs_render(packed))
+        os.replace(packed_path + ".lock", packed_path)
+        _packed_refs_cache.pop(packed_path, None)
+
+        for name in moved:
+            os.unlink(os.path.join(repo.gitdir, name))
+    finally:
+        if os.path.exists(packed_path + ".lock"):
+            if packed_fd is not None:
+                os.close(packed_fd)
+            os.unlink(packed_path + ".lock")
+        for path in held:
+            os.unlink(path + ".lock")
+
+    for name in moved:
+        parent = os.path.dirname(name)
+        while parent not in ("refs", "refs/heads", "refs/tags", ""):
+            try:
+                os.rmdir(os.path.join(repo.gitdir, parent))
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+
+    return len(moved)
+
+
+ZERO_OID = "0" * 40
+
+
+def ref_symbolic_target(repo: Any, ref: str) -> Optional[str]:
+    """
+    Return the ref a symbolic ref (e.g. HEAD) points at, if it is symbolic.
+
+    Args:
+        repo: The repository object.
+        ref: Full ref name.
+
+    Returns:
+        Target ref name, or None if `ref` is not a symbolic ref.
+    """
+    path = os.path.join(repo.gitdir, ref)
+    if not os.path.isfile(path):
+        return None
+    with open(path, "r") as f:
+        data = f.read().strip()
+    return data[5:] if data.startswith("ref: ") else None
+
+
+class RefTransaction:
+    """
+    All-or-nothing batch of ref updates guarded by per-ref lock files.
+
+    Every ref is locked through `<ref>.lock` (in sorted order), its current
+    value is checked against the expected old value, and the new value is
+    written and fsynced into the lock file. Only once every update has been
+    prepared are the lock files renamed over the refs; on any failure all
+    locks are released and no ref changes.
+
+    Moves of HEAD and branches are then recorded in their reflogs; updating
+    the branch HEAD points at is logged for HEAD as well.
+    """
+
+    def __init__(self, repo: Any) -> None:
+        self.repo = repo
+        # (ref name, new content or None to delete, expected old SHA or None)
+        self.updates: List[Tuple[str, Optional[str], Optional[str]]] = []
+        self.messages: Dict[str, str] = {}
+
+    def update(self, ref: str, new_sha: str, old_sha: Optional[str] = None, deref: bool = True,
+               message: str = "") -> None:
+        """
+        Queue setting `ref` to `new_sha`.
+
+        Args:
+            ref: Full ref name (e.g. "refs/heads/master" or "HEAD").
+            new_sha: New SHA-1 value.
+            old_sha: Expected current value; None skips the check and
+                     ZERO_OID requires the ref not to exist.
+            deref: If `ref` is symbolic, update the ref it points at.
+            message: Reflog message for the move.
+        """
+        if deref:
+            ref = ref_symbolic_target(self.repo, ref) or ref
+        self.updates.append((ref, new_sha + "\n", old_sha))
+        self.messages[ref] = message
+
+    def symbolic_update(self, ref: str, target: str, old_sha: Optional[str] = None, message: str = "") -> None:
+        """Queue pointing symbolic ref `ref` (e.g. HEAD) at `target`."""
+        self.updates.append((ref, f"ref: {target}\n", old_sha))
+        self.messages[ref] = message
+
+    def delete(self, ref: str, old_sha: Optional[str] = None) -> None:
+        """Queue deleting `ref`, from both loose and packed storage."""
+        self.updates.append((ref, None, old_sha))
+
+    def commit(self) -> None:
+        """
+        Apply all queued updates atomically.
+
+        Raises:
+            Exception: If a lock is held elsewhere or a ref does not have
+                       its expected old value. No ref is modified then.
+        """
+        names = [ref for ref, _, _ in self.updates]
+        if len(set(names)) != len(names):
+            raise Exception("Multiple updates for the same ref in one transaction")
+
+        gitdir = self.repo.gitdir
+        packed_path = os.path.join(gitdir, "packed-refs")
+        held: List[str] = []
+        previous: Dict[str, Optional[str]] = {}
+        try:
+            for ref, content, old_sha in sorted(self.updates, key=lambda u: u[0]):
+                path = os.path.join(gitdir, ref)
+                fd = lock_acquire(path)
+                held.append(path)
+
+                current = previous[ref] = ref_resolve(self.repo, ref)
+                if old_sha is not None:
+                    if (current or ZERO_OID) != old_sha:
+                        os.close(fd)
+                        raise Exception(
+                            f"Cannot update ref '{ref}': expected {old_sha}, found {current or ZERO_OID}"
+                        )
+
+                lock_write(fd, content.encode("ascii") if content is not None else b"")
+
+            # Deletions are applied to a copy read under the packed-refs lock,
+            # so a concurrent pack-refs or deletion is not overwritten
+            deleted = [ref for ref, content, _ in self.updates if content is None]
+            if deleted:
+                fd = lock_acquire(packed_path)
+                held.append(packed_path)
+                try:
+                    packed = packed_refs_read(self.repo, fresh=True)
+                except BaseException:
+                    os.close(fd)
+                    raise
+                if any(ref in packed for ref in deleted):
+                    lock_write(fd, packed_refs_render({k: v for k, v in packed.items() if k not in deleted}))
+                else:
+                    os.close(fd)
+                    held.remove(packed_path)
+                    os.unlink(packed_path + ".lock")
+        except BaseException:
+            for path in held:
+                try:
+                    os.unlink(path + ".lock")
+                except FileNotFoundError:
+                    pass
+            raise
+
+        # packed-refs goes first: while a deleted ref's loose file exists it
+        # shadows the packed entry, so readers never see the stale packed value
+        contents = dict((ref, content) for ref, content, _ in self.updates)
+        if packed_path in held:
+            os.replace(packed_path + ".lock", packed_path)
+            _packed_refs_cache.pop(packed_path, None)
+        for path in held:
+            if path == packed_path:
+                continue
+            ref = os.path.relpath(path, gitdir).replace(os.sep, "/")
+            if contents[ref] is None:
+                if os.path.isfile(path):
+                    os.unlink(path)
+                os.unlink(path + ".lock")
+            else:
+                os.replace(path + ".lock", path)
+
+        self._reflog_write(previous, contents)
+
+    def _reflog_write(self, previous: Dict[str, Optional[str]], contents: Dict[str, Optional[str]]) -> None:
+        """Record the committed updates in the reflogs of HEAD and branches."""
+        from .reflog import reflog_append, reflog_delete, reflog_should_log
+
+        head_target = ref_symbolic_target(self.repo, "HEAD")
+        for ref, content in contents.items():
+            if content is None:
+                reflog_delete(self.repo, ref)
+                continue
+            new_sha = ref_resolve(self.repo, ref)
+            if not new_sha:
+                continue
+            message = self.messages.get(ref, "")
+            if reflog_should_log(ref):
+                reflog_append(self.repo, ref, previous[ref], new_sha, message)
+            if ref == head_target and "HEAD" not in contents:
+                reflog_append(self.repo, "HEAD", previous[ref], new_sha, message)
+
+
+def ref_update(repo: Any, ref: str, new_sha: str, old_sha: Optional[str] = None, deref: bool = True,
+               message: str = "") -> None:
+    """
+    Atomically update a single ref, optionally as a compare-and-swap.
+
+    Args:
+        repo: The repository object.
+        ref: Full ref name (e.g. "refs/heads/master" or "HEAD").
+        new_sha: New SHA-1 value.
+        old_sha: Expected current value; None skips the check and ZERO_OID
+                 requires the ref not to exist.
+        deref: If `ref` is symbolic, update the ref it points at.
+        message: Reflog message for the move.
+    """
+    tx = RefTransaction(repo)
+    tx.update(ref, new_sha, old_sha, deref=deref, message=message)
+    tx.commit()
+
+
 def ref_create(repo: Any, ref_name: str, sha: str) -> None:
     """
     Create or update a reference to point to a given SHA-1 hash.
@@ -61,9 +503,7 @@ def ref_create(repo: Any, ref_name: str, sha: str) -> None:
         ref_name: The reference name (e.g., "heads/main").
         sha: The commit SHA-1 hash to associate with the ref.
     """
-    from ..utils.file_io import repo_file
-    with open(repo_file(repo, "refs/" + ref_name), "w") as fp:
-        fp.write(sha + "\n")
+    ref_update(repo, "refs/" + ref_name, sha)
 
 
 def show_ref(repo: Any, refs: Dict[str, Union[str, dict]], with_hash: bool = True, prefix: str = "") -> None:
@@ -87,6 +527,275 @@ def show_ref(repo: Any, refs: Dict[str, Union[str, dict]], with_hash: bool = Tru
             show_ref(repo, v, with_hash, f"{prefix}{k}")
 
 
+def ref_short_name(name: str) -> str:
+    """Strip the well-known namespace from a full ref name (refs/heads/x -> x)."""
+    for prefix in ("refs/heads/", "refs/tags/", "refs/remotes/", "refs/"):
+        if name.startswith(prefix):
+            return name[len(prefix):]
+    return name
+
+
+def ident_date_format(ident: bytes, mode: str = "") -> str:
+    """
+    Format the timestamp of an ident line ("Name <email> 1700000000 +0100").
+
+    Args:
+        ident: Raw ident value from a commit or tag header.
+        mode: "" (git default), "unix", "raw", "iso" or "short".
+
+    Returns:
+        The formatted date, or "" if the ident has no timestamp.
+    """
+    from datetime import datetime, timedelta, timezone
+
+    parts = ident.rsplit(b' ', 2)
+    if len(parts) < 3 or not parts[1].isdigit():
+        return ""
+    ts, tz = int(parts[1]), parts[2].decode("ascii")
+
+    if mode == "unix":
+        return str(ts)
+    if mode == "raw":
+        return f"{ts} {tz}"
+
+    sign = -1 if tz.startswith("-") else 1
+    offset = timedelta(hours=int(tz[1:3] or 0), minutes=int(tz[3:5] or 0)) * sign
+    when = datetime.fromtimestamp(ts, timezone(offset))
+    if mode == "iso":
+        return when.strftime("%Y-%m-%d %H:%M:%S ") + tz
+    if mode == "short":
+        return when.strftime("%Y-%m-%d")
+    return when.strftime("%a %b ") + str(when.day) + when.strftime(" %H:%M:%S %Y ") + tz
+
+
+def ident_split(ident: bytes) -> Tuple[str, str]:
+    """Split an ident value into (name, "<email>")."""
+    text = ident.decode("utf-8", errors="replace")
+    lt, gt = text.find("<"), text.find(">")
+    if lt < 0 or gt < lt:
+        return text.strip(), ""
+    return text[:lt].strip(), text[lt:gt + 1]
+
+
+class RefFormatter:
+    """
+    Evaluates `for-each-ref` format atoms against refs.
+
+    Object data is fetched lazily and memoized per SHA, so refs sharing a
+    target are only read once. Type and header atoms inflate just the object
+    header (and the commit/tag headers); only %(subject) inflates the message.
+    """
+
+    DATE_ATOMS = ("committerdate", "authordate", "taggerdate", "creatordate")
+
+    def __init__(self, repo: Any) -> None:
+        self.repo = repo
+        self.head = branch_get_active(repo)
+        self.types: Dict[str, bytes] = {}
+        self.headers: Dict[str, Dict[Any, Any]] = {}
+        self.messages: Dict[str, bytes] = {}
+
+    def object_type(self, sha: str) -> bytes:
+        """Return the object type, inflating only the object header."""
+        from ..utils.hashing import object_read_head
+        if sha not in self.types:
+            self.types[sha] = object_read_head(self.repo, sha)[0]
+        return self.types[sha]
+
+    def object_headers(self, sha: str) -> Dict[Any, Any]:
+        """Return the kvlm headers of a commit or tag, without its message."""
+        from ..utils.hashing import object_read_head
+        from ..utils.kvlm import kvlm_parse
+
+        if sha not in self.headers:
+            fmt, head = object_read_head(self.repo, sha, until=b"\n\n")
+            self.types[sha] = fmt
+            self.headers[sha] = kvlm_parse(head) if fmt in (b'commit', b'tag') else {}
+        return self.headers[sha]
+
+    def object_message(self, sha: str) -> bytes:
+        """Return the message of a commit or tag."""
+        from ..utils.hashing import object_read_raw
+        from ..utils.kvlm import kvlm_parse
+
+        if sha not in self.messages:
+            fmt, data = object_read_raw(self.repo, sha)
+            self.messages[sha] = kvlm_parse(data).get(None, b'') if fmt in (b'commit', b'tag') else b''
+        return self.messages[sha]
+
+    def peel(self, name: str, sha: str) -> Optional[str]:
+        """Return the object a tag ref ultimately points at, or None for non-tags."""
+        if self.object_type(sha) != b'tag':
+            return None
+        peeled = ref_peeled(self.repo, name)
+        if peeled:
+            return peeled
+        while self.object_type(sha) == b'tag':
+            sha = self.object_headers(sha)[b'object'].decode("ascii")
+        return sha
+
+    def atom(self, name: str, sha: str, atom: str, sort: bool = False) -> Any:
+        """
+        Evaluate one atom for a ref.
+
+        Args:
+            name: Full ref name.
+            sha: SHA-1 the ref points at.
+            atom: Atom name, optionally with a ":modifier" and a "*" prefix
+                  to apply it to the peeled object of a tag.
+            sort: If True, return a sortable value (e.g. timestamps as ints).
+
+        Returns:
+            The atom's value (a string, or an int for dates when sorting).
+
+        Raises:
+            Exception: If the atom is unknown.
+        """
+        if atom.startswith("*"):
+            peeled = self.peel(name, sha)
+            if peeled is None:
+                return ""
+            sha, atom = peeled, atom[1:]
+
+        key, _, mod = atom.partition(":")
+
+        if key == "refname":
+            return ref_short_name(name) if mod in ("short", "lstrip=2") else name
+        if key == "objectname":
+            if mod.startswith("short"):
+                from ..utils.oid_table import oid_table, ABBREV_DEFAULT
+                return oid_table(self.repo).abbreviate(sha, int(mod[6:] or ABBREV_DEFAULT))
+            return sha
+        if key == "objecttype":
+            return self.object_type(sha).decode("ascii")
+        if key == "HEAD":
+            return "*" if self.head and name == "refs/heads/" + self.head else " "
+
+        if key in ("subject", "contents:subject", "body"):
+            message = self.object_message(sha).decode("utf-8", errors="replace")
+            subject, _, body = message.partition("\n\n")
+            return body.strip() if key == "body" else " ".join(subject.split())
+
+        headers = self.object_headers(sha)
+        if key in ("tree", "parent", "object", "type", "tag"):
+            value = headers.get(key.encode("ascii"), b'')
+            if isinstance(value, list):
+                value = b' '.join(value)
+            return value.decode("utf-8", errors="replace")
+
+        if key in self.DATE_ATOMS or key.endswith(("name", "email")):
+            person = key
+            for suffix in ("date", "name", "email"):
+                if person.endswith(suffix):
+                    person = person[:-len(suffix)]
+                    break
+            if person == "creator":
+                person = "tagger" if b'tagger' in headers else "committer"
+            if person not in ("committer", "author", "tagger"):
+                raise Exception(f"unknown field name: {atom}")
+            ident = headers.get(person.encode("ascii"), b'')
+            if isinstance(ident, list):
+                ident = ident[0]
+            if key.endswith("date"):
+                if sort:
+                    stamp = ident_date_format(ident, "unix")
+                    return int(stamp) if stamp else 0
+                return ident_date_format(ident, mod)
+            ident_name, email = ident_split(ident)
+            return ident_name if key.endswith("name") else email
+
+        raise Exception(f"unknown field name: {atom}")
+
+    def format(self, fmt: str, name: str, sha: str) -> str:
+        """
+        Expand a format string such as "%(objectname) %(refname)".
+
+        Args:
+            fmt: Format string; "%%" is a literal percent sign.
+            name: Full ref name.
+            sha: SHA-1 the ref points at.
+
+        Returns:
+            The expanded string.
+        """
+        out = []
+        pos = 0
+        while pos < len(fmt):
+            if fmt.startswith("%%", pos):
+                out.append("%")
+                pos += 2
+            elif fmt.startswith("%(", pos):
+                end = fmt.index(")", pos)
+                out.append(str(self.atom(name, sha, fmt[pos + 2:end])))
+                pos = end + 1
+            else:
+                nxt = fmt.find("%", pos + 1)
+                nxt = len(fmt) if nxt < 0 else nxt
+                out.append(fmt[pos:nxt])
+                pos = nxt
+        return "".join(out)
+
+
+def ref_pattern_match(name: str, patterns: List[str]) -> bool:
+    """
+    Check a ref against `for-each-ref` patterns.
+
+    A pattern matches as a glob against the full name, or as a prefix that
+    ends at a path component boundary ("refs/tags" matches "refs/tags/v1").
+    """
+    from fnmatch import fnmatchcase
+
+    if not patterns:
+        return True
+    for pattern in patterns:
+        if fnmatchcase(name, pattern) or name.startswith(pattern.rstrip("/") + "/"):
+            return True
+    return False
+
+
+def for_each_ref(
+    repo: Any,
+    patterns: Optional[List[str]] = None,
+    sort_keys: Optional[List[str]] = None,
+    count: Optional[int] = None,
+    fmt: str = "%(objectname) %(objecttype)\t%(refname)",
+) -> List[str]:
+    """
+    List refs with formatted fields, like `git for-each-ref`.
+
+    Args:
+        repo: The repository object.
+        patterns: Optional glob/prefix patterns limiting the refs listed.
+        sort_keys: Atoms to sort by; "-" prefix reverses. The last key is the
+                   primary one. Defaults to "refname".
+        count: Stop after this many refs (after sorting).
+        fmt: Output format string.
+
+    Returns:
+        List of formatted lines.
+    """
+    formatter = RefFormatter(repo)
+
+    prefix = "refs/"
+    if patterns and len(patterns) == 1:
+        # Only walk the ref directory the pattern can possibly match in
+        literal = re.split(r"[*?\[]", patterns[0], 1)[0]
+        if literal.startswith("refs/"):
+            prefix = literal[:literal.rfind("/") + 1]
+    refs = [(name, sha) for name, sha in ref_list_flat(repo, prefix).items()
+            if ref_pattern_match(name, patterns or [])]
+
+    for key in sort_keys or ["refname"]:
+        reverse = key.startswith("-")
+        atom = key.lstrip("-")
+        refs.sort(key=lambda ref: formatter.atom(ref[0], ref[1], atom, sort=True), reverse=reverse)
+
+    if count is not None:
+        refs = refs[:count]
+
+    return [formatter.format(fmt, name, sha) for name, sha in refs]
+
+
 def tag_create(repo: Any, name: str, ref: str, create_tag_object: bool = False) -> None:
     """
     Create a lightweight or annotated tag.
@@ -152,21 +861,67 @@ def cmd_tag(args: Any) -> None:
     if args.name:
         tag_create(repo, args.name, args.object, args.create_tag_object)
     else:
-        refs = ref_list(repo)
-        show_ref(repo, refs.get("tags", {}), with_hash=False)
+        for name in ref_list_flat(repo, "refs/tags/"):
+            print(name[len("refs/tags/"):])
+
+
+def cmd_for_each_ref(args: Any) -> None:
+    """
+    CLI command to list refs with formatted fields.
+
+    Args:
+        args: Parsed CLI arguments (expects 'pattern', 'sort', 'count', 'format').
+    """
+    from ..utils.file_io import repo_find
+    repo = repo_find()
+
+    lines = for_each_ref(
+        repo,
+        patterns=args.pattern,
+        sort_keys=args.sort,
+        count=args.count,
+        fmt=args.format,
+    )
+    for line in lines:
+        print(line)
+
+
+def cmd_pack_refs(args: Any) -> None:
+    """
+    CLI command to pack loose refs into .git/packed-refs.
+
+    Args:
+        args: Parsed CLI arguments (expects 'all').
+    """
+    from ..utils.file_io import repo_find
+    repo = repo_find()
+    refs_pack(repo, pack_all=args.all)
 
 
 def cmd_rev_parse(args: Any) -> None:
     """
-    CLI command to resolve a name to its SHA-1 object ID.
+    CLI command to resolve names, revision expressions and ranges to
+    SHA-1 object IDs. All names share one commit cache, so ancestry walks
+    are parsed once per process.
 
     Args:
         args: Parsed CLI arguments.
     """
     from ..utils.file_io import repo_find
     from ..utils.hashing import object_find
+    from .revision import rev_parse, rev_parse_range
 
     repo = repo_find()
     fmt = args.type.encode() if args.type else None
-    result = object_find(repo, args.name, fmt, follow=True)
-    print(result if result else "")
\ No newline at end of file
+    cache: Dict[str, Any] = {}
+
+    for name in args.name:
+        if fmt is None and (".." in name or name.startswith("^")):
+            for sha, excluded in rev_parse_range(repo, name, cache):
+                print(("^" if excluded else "") + sha)
+            continue
+        if fmt is None:
+            result = rev_parse(repo, name, cache)
+        else:
+            result = object_find(repo, name, fmt, follow=True)
+        print(result if result else "")
\ No newline at end of file
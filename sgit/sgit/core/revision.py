@@ -0,0 +1,262 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Suffix operators that may follow a revision name
+_SUFFIX_RE = re.compile(r"~(\d*)|\^\{([^}]*)\}|\^(\d*)|@\{(-?\d+)\}")
+
+
+def object_type(repo: Any, sha: str) -> bytes:
+    """Return the type of an object, inflating only its header."""
+    from ..utils.hashing import object_read_head
+    return object_read_head(repo, sha)[0]
+
+
+def object_peel(repo: Any, sha: str, fmt: Optional[bytes] = None,
+                cache: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    Peel an object until it has the requested type (`<rev>^{<type>}`).
+
+    Tags are followed to their target and commits to their tree. With `fmt`
+    None, tags are peeled to the first non-tag object (`<rev>^{}`).
+
+    Args:
+        repo: The repository object.
+        sha: SHA-1 of the object to peel.
+        fmt: Requested type, or None to peel tags only.
+        cache: Optional commit view cache shared between lookups.
+
+    Returns:
+        The SHA-1 of the peeled object, or None if it cannot be peeled to `fmt`.
+    """
+    from .objects.commit import commit_view_read
+    from ..utils.hashing import object_read_head
+    from ..utils.kvlm import kvlm_parse
+
+    while sha:
+        kind = object_type(repo, sha)
+        if kind == fmt or (fmt is None and kind != b'tag'):
+            return sha
+        if kind == b'tag':
+            _, head = object_read_head(repo, sha, until=b"\n\n")
+            sha = kvlm_parse(head)[b'object'].decode("ascii")
+        elif kind == b'commit' and fmt == b'tree':
+            sha = commit_view_read(repo, sha, cache).tree
+        else:
+            return None
+    return None
+
+
+def tree_lookup(repo: Any, tree: str, path: str) -> Optional[str]:
+    """
+    Find the object at `path` inside a tree (`<rev>:<path>`).
+
+    Args:
+        repo: The repository object.
+        tree: SHA-1 of the root tree.
+        path: Slash-separated path; "" returns the tree itself.
+
+    Returns:
+        SHA-1 of the blob or tree at `path`, or None if it does not exist.
+    """
+    from ..utils.hashing import object_read
+
+    sha = tree
+    for part in [p for p in path.split("/") if p]:
+        obj = object_read(repo, sha)
+        if obj.fmt != b'tree':
+            return None
+        for leaf in obj.items:
+            if leaf.path == part:
+                sha = leaf.sha
+                break
+        else:
+            return None
+    return sha
+
+
+def index_lookup(repo: Any, path: str, stage: int = 0) -> Optional[str]:
+    """
+    Find the blob staged for `path` (`:<path>` or `:<stage>:<path>`).
+
+    Paths inside a collapsed sparse directory are looked up in its tree.
+    """
+    from .index import index_read, index_entry_is_sparse_dir
+
+    path = path.strip("/")
+    for e in index_read(repo).entries:
+        if e.flag_stage >> 12 != stage:
+            continue
+        if e.name == path:
+            return e.sha
+        if index_entry_is_sparse_dir(e) and path.startswith(e.name):
+            return tree_lookup(repo, e.sha, path[len(e.name):])
+    return None
+
+
+def reflog_lookup(repo: Any, ref: str, n: int) -> str:
+    """
+    Resolve `<ref>@{n}` (the value `ref` had n moves ago) or `@{-n}` (the
+    n-th branch checked out before the current one).
+
+    Raises:
+        Exception: If the reflog is too short.
+    """
+    from .reflog import reflog_read_reverse, reflog_ref_name
+
+    if n < 0:
+        seen = 0
+        for entry in reflog_read_reverse(repo, "HEAD"):
+            match = re.match(r"checkout: moving from (\S+) to ", entry.message)
+            if match:
+                seen += 1
+                if seen == -n:
+                    return match.group(1)
+        raise Exception(f"@{{{n}}}: only {seen} checkout(s) found in the reflog")
+
+    full = reflog_ref_name(repo, ref)
+    count = 0
+    for count, entry in enumerate(reflog_read_reverse(repo, full), 1):
+        if count - 1 == n:
+            return entry.new_sha
+    raise Exception(f"log for '{ref}' only has {count} entries")
+
+
+def rev_parse(repo: Any, spec: str, cache: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    Resolve a single revision expression to an object SHA-1.
+
+    Supported syntax (combinable, evaluated left to right):
+        <name>          full or abbreviated SHA-1, HEAD/@, branch or tag
+        <rev>~<n>       n-th first-parent ancestor (`~` alone is `~1`)
+        <rev>^<n>       n-th parent (`^` alone is `^1`, `^0` the commit)
+        <rev>^{<type>}  peel to a tree/commit/blob/tag; `^{}` peels tags
+        <ref>@{<n>}     n-th prior value of a ref from its reflog
+        @{-<n>}         n-th previously checked-out branch
+        <rev>:<path>    blob or tree at path in the revision's tree
+        :<path>         blob staged in the index (also `:<stage>:<path>`)
+
+    Ancestry walks go through `commit_view_read`, memoized in `cache`, so
+    repeated lookups in one process never re-read a commit.
+
+    Args:
+        repo: The repository object.
+        spec: Revision expression.
+        cache: Optional commit view cache shared between lookups.
+
+    Returns:
+        SHA-1 string, or None if the base name does not exist.
+
+    Raises:
+        Exception: On malformed expressions, ambiguous names, or operators
+                   that do not apply (e.g. a parent of a root commit).
+    """
+    from .objects.commit import commit_view_read
+    from ..utils.hashing import object_find
+
+    if cache is None:
+        cache = {}
+
+    if spec.startswith(":"):
+        match = re.match(r":([0-3]):(.*)$", spec)
+        if match:
+            return index_lookup(repo, match.group(2), int(match.group(1)))
+        return index_lookup(repo, spec[1:])
+
+    colon = spec.find(":")
+    if colon > 0:
+        sha = rev_parse(repo, spec[:colon], cache)
+        tree = object_peel(repo, sha, b'tree', cache) if sha else None
+        if tree is None:
+            raise Exception(f"'{spec[:colon]}' is not a tree-ish")
+        return tree_lookup(repo, tree, spec[colon + 1:])
+
+    match = _SUFFIX_RE.search(spec)
+    base, rest = (spec[:match.start()], spec[match.start():]) if match else (spec, "")
+
+    if rest.startswith("@{"):
+        match = _SUFFIX_RE.match(rest)
+        n = int(match.group(4))
+        if n < 0:
+            if base:
+                raise Exception(f"Invalid revision: {spec}")
+            sha = object_find(repo, reflog_lookup(repo, "HEAD", n))
+        else:
+            if not base:
+                from .refs import branch_get_active
+                base = branch_get_active(repo) or "HEAD"
+            sha = reflog_lookup(repo, "HEAD" if base == "@" else base, n)
+        rest = rest[match.end():]
+    else:
+        sha = object_find(repo, "HEAD" if base == "@" else base)
+
+    pos = 0
+    while sha and pos < len(rest):
+        match = _SUFFIX_RE.match(rest, pos)
+        if not match or match.group(4) is not None:
+            raise Exception(f"Invalid revision: {spec}")
+        pos = match.end()
+
+        tilde, peel, caret = match.group(1), match.group(2), match.group(3)
+        if peel is not None:
+            target = peel.encode("ascii") if peel else None
+            if target not in (None, b'commit', b'tree', b'blob', b'tag'):
+                raise Exception(f"Invalid object type in {spec}")
+            peeled = object_peel(repo, sha, target, cache)
+            if peeled is None:
+                raise Exception(f"'{spec}' cannot be peeled to {peel or 'a non-tag object'}")
+            sha = peeled
+            continue
+
+        commit = object_peel(repo, sha, b'commit', cache)
+        if commit is None:
+            raise Exception(f"'{spec}' does not name a commit")
+
+        if tilde is not None:
+            for _ in range(int(tilde or 1)):
+                parents = commit_view_read(repo, commit, cache).parents
+                if not parents:
+                    raise Exception(f"'{spec}' goes past a root commit")
+                commit = parents[0]
+        else:
+            n = int(caret or 1)
+            if n:
+                parents = commit_view_read(repo, commit, cache).parents
+                if n > len(parents):
+                    raise Exception(f"'{spec}': commit has no parent {n}")
+                commit = parents[n - 1]
+        sha = commit
+
+    return sha
+
+
+def rev_parse_range(repo: Any, spec: str, cache: Optional[Dict[str, Any]] = None) -> List[Tuple[str, bool]]:
+    """
+    Resolve a revision or range to (sha, excluded) pairs.
+
+    `A..B` means commits reachable from B but not from A (either side
+    defaults to HEAD) and `^A` excludes A. Anything else is one revision.
+
+    Args:
+        repo: The repository object.
+        spec: Revision or range expression.
+        cache: Optional commit view cache shared between lookups.
+
+    Returns:
+        List of (sha, excluded) tuples, included revisions first.
+
+    Raises:
+        Exception: If a revision does not exist.
+    """
+    def resolve(name: str) -> str:
+        sha = rev_parse(repo, name or "HEAD", cache)
+        if sha is None:
+            raise Exception(f"Unknown revision: {name}")
+        return sha
+
+    if ".." in spec and not spec.startswith(":"):
+        left, right = spec.split("..", 1)
+        return [(resolve(right), False), (resolve(left), True)]
+    if spec.startswith("^") and len(spec) > 1:
+        return [(resolve(spec[1:]), True)]
+    return [(resolve(spec), False)]
@@ -1,9 +1,20 @@
 # operations package
 __all__ = [
     "init",
+    "clone",
     "add_remove",
     "commit",
     "checkout",
     "status",
     "log",
+    "diff",
+    "diff_tree",
+    "commit_graph",
+    "merge_base",
+    "merge",
+    "rebase",
+    "fast_import",
+    "fast_export",
+    "reset",
+    "sparse_checkout",
 ]
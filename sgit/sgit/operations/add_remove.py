@@ -1,5 +1,5 @@
 import os
-from typing import List, Set, Tuple
+from typing import Dict, List, Set, Tuple
 
 def rm(repo: "GitRepository", paths: List[str], delete: bool = True, skip_missing: bool = False) -> None:
     """
@@ -14,7 +14,7 @@ def rm(repo: "GitRepository", paths: List[str], delete: bool = True, skip_missin
     Raises:
         Exception: If paths are outside the worktree or not in the index.
     """
-    from ..core.index import index_read, index_write, GitIndex
+    from ..core.index import index_read, index_write, index_expand, GitIndex
 
     index = index_read(repo) or GitIndex()
     worktree = repo.worktree + os.sep
@@ -27,15 +27,19 @@ def rm(repo: "GitRepository", paths: List[str], delete: bool = True, skip_missin
         else:
             raise Exception(f"Cannot remove paths outside of worktree: {path}")
 
+    # Paths inside collapsed sparse directories need their file entries
+    index_expand(repo, index, [os.path.relpath(p, repo.worktree) for p in abspaths])
+
     kept_entries = []
     remove = []
 
+    # A path may have several entries (merge conflict stages 1-3)
     for e in index.entries:
         full_path = os.path.join(repo.worktree, e.name)
         if full_path in abspaths:
             remove.append(full_path)
             abspaths.remove(full_path)
-        else:
+        elif full_path not in remove:
             kept_entries.append(e)
 
     if abspaths and not skip_missing:
@@ -59,10 +63,13 @@ def add(repo: "GitRepository", paths: List[str]) -> None:
         paths: List of file paths to add.
 
     Raises:
-        Exception: If a path is not a file or is outside the repository.
+        Exception: If a path is not a file, is outside the repository, or is
+                   outside the sparse-checkout cone.
     """
-    rm(repo, paths, delete=False, skip_missing=True)
+    from ..utils.sparse import sparse_read
+
     worktree = repo.worktree + os.path.sep
+    cone = sparse_read(repo)
     clean_paths: Set[Tuple[str, str]] = set()
 
     for path in paths:
@@ -70,9 +77,13 @@ def add(repo: "GitRepository", paths: List[str]) -> None:
         if not (abspath.startswith(worktree) and os.path.isfile(abspath)):
             raise Exception(f"Not a file, or outside the worktree: {path}")
         relpath = os.path.relpath(abspath, repo.worktree)
+        if cone is not None and not cone.contains(relpath):
+            raise Exception(f"Path is outside of your sparse-checkout definition: {path}")
         clean_paths.add((abspath, relpath))
 
-    from ..core.index import index_read, index_write, GitIndex, GitIndexEntry
+    rm(repo, paths, delete=False, skip_missing=True)
+
+    from ..core.index import index_read, index_write, GitIndex, index_entry_from_stat
     from ..utils.hashing import object_hash
 
     index = index_read(repo) or GitIndex()
@@ -81,30 +92,126 @@ def add(repo: "GitRepository", paths: List[str]) -> None:
         with open(abspath, "rb") as fd:
             sha = object_hash(fd, b"blob", repo)
             stat = os.stat(abspath)
+            index.entries.append(index_entry_from_stat(relpath, sha, stat))
+
+    index_write(repo, index)
+
 
-            ctime_s = int(stat.st_ctime)
-            ctime_ns = stat.st_ctime_ns % 10 ** 9
-            mtime_s = int(stat.st_mtime)
-            mtime_ns = stat.st_mtime_ns % 10 ** 9
-
-            entry = GitIndexEntry(
-                ctime=(ctime_s, ctime_ns),
-                mtime=(mtime_s, mtime_ns),
-                dev=stat.st_dev,
-                ino=stat.st_ino,
-                mode_type=0b1000,
-                mode_perms=0o644,
-                uid=stat.st_uid,
-                gid=stat.st_gid,
-                fsize=stat.st_size,
-                sha=sha,
-                flag_assume_valid=False,
-                flag_stage=0,
-                name=relpath
-            )
-            index.entries.append(entry)
+def mv(repo: "GitRepository", sources: List[str], destination: str, force: bool = False) -> List[Tuple[str, str]]:
+    """
+    Move or rename tracked files and directories in the worktree and index.
+
+    Index entries are renamed in place, keeping their OIDs, so nothing is
+    rehashed; the index is read once and written once. Entries whose stat
+    data matched before the move get the stat data of the moved file, so a
+    following status does not rehash them either.
+
+    Args:
+        repo: The Git repository object.
+        sources: Files or directories to move.
+        destination: New name, or an existing directory to move them into.
+        force: Overwrite an existing destination file.
+
+    Returns:
+        (old path, new path) pairs, one per renamed index entry.
+
+    Raises:
+        Exception: If a path is outside the worktree or the sparse cone, a
+                   source is not tracked or is or contains a conflicted
+                   path, or the destination exists.
+    """
+    from bisect import bisect_left
+    from ..core.index import (
+        index_entry_from_stat,
+        index_entry_stat_matches,
+        index_expand,
+        index_read,
+        index_write,
+        GitIndex,
+    )
+    from ..utils.sparse import sparse_read
 
+    worktree = repo.worktree + os.sep
+    cone = sparse_read(repo)
+
+    def relpath(path: str) -> str:
+        abspath = os.path.abspath(path)
+        if not abspath.startswith(worktree):
+            raise Exception(f"Cannot move paths outside of worktree: {path}")
+        rel = os.path.relpath(abspath, repo.worktree)
+        if cone is not None and not cone.contains(rel):
+            raise Exception(f"Path is outside of your sparse-checkout definition: {path}")
+        return rel
+
+    dest = os.path.abspath(destination)
+    into = os.path.isdir(dest) and not os.path.islink(dest)
+    if len(sources) > 1 and not into:
+        raise Exception(f"destination '{destination}' is not a directory")
+    moves = []
+    for source in sources:
+        src = relpath(source)
+        dst = relpath(os.path.join(dest, os.path.basename(src)) if into else dest)
+        moves.append((src, dst))
+
+    index = index_read(repo) or GitIndex()
+    index_expand(repo, index, [src for src, _ in moves])
+    names = sorted(e.name for e in index.entries)
+    unmerged = {e.name for e in index.entries if e.flag_stage}
+
+    renames: Dict[str, str] = {}
+    for src, dst in moves:
+        if dst == src or dst.startswith(src + "/"):
+            raise Exception(f"can not move directory into itself, source={src}, destination={dst}")
+        if src in unmerged:
+            raise Exception(f"conflicted, source={src}, destination={dst}")
+        if os.path.lexists(os.path.join(repo.worktree, dst)) and not (force and os.path.isfile(
+                os.path.join(repo.worktree, dst))):
+            raise Exception(f"destination exists, source={src}, destination={dst}")
+        if not os.path.lexists(os.path.join(repo.worktree, src)):
+            raise Exception(f"bad source, source={src}, destination={dst}")
+        i = bisect_left(names, src)
+        if i < len(names) and names[i] == src:
+            renames[src] = dst
+            continue
+        prefix = src + "/"
+        i = bisect_left(names, prefix)
+        if i == len(names) or not names[i].startswith(prefix):
+            raise Exception(f"not under version control, source={src}, destination={dst}")
+        while i < len(names) and names[i].startswith(prefix):
+            if names[i] in unmerged:
+                raise Exception(f"conflicted, source={names[i]}, destination={dst + names[i][len(src):]}")
+            renames[names[i]] = dst + names[i][len(src):]
+            i += 1
+    targets = set(renames.values())
+
+    # Moved files whose stat data is current can keep being trusted
+    clean = set()
+    for e in index.entries:
+        if e.name in renames and not e.flag_skip_worktree:
+            full = os.path.join(repo.worktree, e.name)
+            if os.path.lexists(full) and index_entry_stat_matches(e, os.lstat(full)):
+                clean.add(e.name)
+
+    for src, dst in moves:
+        full = os.path.join(repo.worktree, dst)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        os.replace(os.path.join(repo.worktree, src), full)
+
+    entries = []
+    for e in index.entries:
+        if e.name in renames:
+            new = renames[e.name]
+            if e.name in clean:
+                e = index_entry_from_stat(new, e.sha, os.lstat(os.path.join(repo.worktree, new)),
+                                          e.mode_type, e.mode_perms)
+            else:
+                e.name = new
+        elif e.name in targets:
+            continue
+        entries.append(e)
+    index.entries = sorted(entries, key=lambda entry: (entry.name, entry.flag_stage))
     index_write(repo, index)
+    return sorted(renames.items())
 
 
 def cmd_add(args) -> None:
@@ -129,3 +236,18 @@ def cmd_rm(args) -> None:
     from ..utils.file_io import repo_find
     repo = repo_find()
     rm(repo, args.path)
+
+
+def cmd_mv(args) -> None:
+    """
+    Command handler to move or rename files, directories or symlinks.
+
+    Args:
+        args: Command-line arguments containing 'source', 'destination',
+              'force' and 'verbose'.
+    """
+    from ..utils.file_io import repo_find
+    repo = repo_find()
+    for old, new in mv(repo, args.source, args.destination, force=args.force):
+        if args.verbose:
+            print(f"Renaming {old} to {new}")
@@ -1,50 +1,482 @@
 import os
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
 
+# (relative path, blob SHA, tree mode)
+CheckoutEntry = Tuple[str, str, bytes]
 
-def tree_checkout(repo: "GitRepository", tree: Any, path: str) -> None:
+
+def tree_enumerate(
+    repo: "GitRepository",
+    tree: Any,
+    prefix: str = "",
+    cone: Optional["SparseCone"] = None,
+    collapse: bool = False,
+) -> Tuple[List[str], List[CheckoutEntry]]:
+    """
+    Enumerate every directory and file reachable from a tree object.
+
+    Subtrees are read directly by the OIDs stored in their parent entries, so
+    no name resolution (and no object directory listing) happens per entry.
+
+    Args:
+        repo: The Git repository object.
+        tree: A GitTree object to enumerate.
+        prefix: Path prefix for the entries of `tree`.
+        cone: Optional sparse-checkout cone; subtrees outside it are not read.
+        collapse: If True, report each out-of-cone subtree as a single
+                  ("dir/", tree SHA, b'040000') entry instead of dropping it.
+
+    Returns:
+        Tuple of (directories, file entries), with paths relative to the tree root.
+    """
+    from ..utils.hashing import object_read
+
+    dirs: List[str] = []
+    files: List[CheckoutEntry] = []
+    stack = [(prefix, tree)]
+
+    while stack:
+        base, obj = stack.pop()
+        for item in obj.items:
+            path = os.path.join(base, item.path)
+            if item.mode.startswith(b'04'):
+                if cone is not None and not cone.contains_dir(path):
+                    if collapse:
+                        files.append((path + "/", item.sha, b'040000'))
+                    continue
+                dirs.append(path)
+                stack.append((path, object_read(repo, item.sha)))
+            elif item.mode == b'160000':
+                # Submodule commits are not checked out
+                dirs.append(path)
+            elif cone is None or cone.contains(path):
+                files.append((path, item.sha, item.mode))
+
+    return dirs, files
+
+
+def checkout_workers(repo: "GitRepository", jobs: Optional[int] = None) -> int:
+    """
+    Determine the number of checkout worker threads.
+
+    Args:
+        repo: The Git repository object.
+        jobs: Explicit worker count; falls back to `checkout.workers` in the
+              repository config, then to the number of CPUs.
+
+    Returns:
+        Number of workers (at least 1).
+    """
+    if jobs is None and repo.conf is not None:
+        jobs = repo.conf.getint("checkout", "workers", fallback=0)
+    if not jobs or jobs < 1:
+        jobs = os.cpu_count() or 1
+    return jobs
+
+
+def blob_checkout(repo: "GitRepository", sha: str, mode: bytes, dest: str) -> None:
+    """
+    Inflate a single blob and write it to `dest` according to its tree mode.
+
+    Args:
+        repo: The Git repository object.
+        sha: SHA-1 of the blob.
+        mode: Tree entry mode (regular, executable or symlink).
+        dest: Absolute destination path.
+
+    Raises:
+        Exception: If the object is not a blob.
+    """
+    from ..utils.hashing import object_read_raw
+
+    fmt, data = object_read_raw(repo, sha)
+    if fmt != b'blob':
+        raise Exception(f"Unknown type {fmt} for object {sha}")
+
+    # Files are recreated rather than rewritten in place, so the kernel
+    # applies the umask to the new permissions
+    if os.path.lexists(dest):
+        os.unlink(dest)
+
+    if mode == b'120000':
+        os.symlink(data, dest)
+        return
+
+    perms = 0o755 if mode == b'100755' else 0o644
+    with os.fdopen(os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, perms), 'wb') as f:
+        f.write(data)
+
+
+def entries_checkout(
+    repo: "GitRepository",
+    entries: List[CheckoutEntry],
+    path: str,
+    dirs: Optional[List[str]] = None,
+    jobs: Optional[int] = None,
+) -> None:
     """
-    Recursively checkout a Git tree object into a specified directory.
+    Write a batch of blob entries below `path` using a worker pool.
+
+    All directories are created in one pass first, then blobs are inflated
+    and written concurrently (zlib releases the GIL while decompressing).
+
+    Args:
+        repo: The Git repository object.
+        entries: File entries as (relative path, SHA, mode) tuples.
+        path: Destination root directory.
+        dirs: Directories to create; derived from `entries` if omitted.
+        jobs: Number of worker threads (see `checkout_workers`).
+    """
+    if dirs is None:
+        dirs = sorted({os.path.dirname(rel) for rel, _, _ in entries} - {""})
+    for d in dirs:
+        os.makedirs(os.path.join(path, d), exist_ok=True)
+
+    workers = min(checkout_workers(repo, jobs), len(entries))
+    if workers <= 1:
+        for rel, sha, mode in entries:
+            blob_checkout(repo, sha, mode, os.path.join(path, rel))
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(blob_checkout, repo, sha, mode, os.path.join(path, rel))
+            for rel, sha, mode in entries
+        ]
+        for future in futures:
+            future.result()
+
+
+def tree_checkout(
+    repo: "GitRepository",
+    tree: Any,
+    path: str,
+    jobs: Optional[int] = None,
+    cone: Optional["SparseCone"] = None,
+) -> None:
+    """
+    Checkout a Git tree object into a specified directory.
 
     Args:
         repo: The Git repository object.
         tree: A GitTree object to checkout.
         path: Destination path to checkout files.
+        jobs: Number of worker threads used to write blobs.
+        cone: Optional sparse-checkout cone limiting what is written.
 
     Raises:
         Exception: If an object type is unknown.
     """
-    from ..utils.hashing import object_read, object_find
+    dirs, files = tree_enumerate(repo, tree, cone=cone)
+    entries_checkout(repo, files, path, dirs=dirs, jobs=jobs)
+
 
-    for item in tree.items:
-        obj = object_read(repo, object_find(repo, item.sha))
-        dest = os.path.join(path, item.path)
-
-        if obj.fmt == b'tree':
-            os.makedirs(dest, exist_ok=True)
-            tree_checkout(repo, obj, dest)
-        elif obj.fmt == b'blob':
-            os.makedirs(os.path.dirname(dest), exist_ok=True)
-            with open(dest, 'wb') as f:
-                f.write(obj.blobdata)
+def tree_changes(
+    repo: "GitRepository",
+    old_tree: Optional[str],
+    new_tree: Optional[str],
+    cone: Optional["SparseCone"] = None,
+    prefix: str = "",
+) -> Iterator["TreeChange"]:
+    """
+    List the file changes between two trees, for `worktree_update`.
+
+    Built on `tree_diff`, so subtrees with equal OIDs are skipped without
+    being read and the work is proportional to the change. Submodule
+    entries are left out, as they are never checked out.
+
+    Args:
+        repo: The Git repository object.
+        old_tree: SHA-1 of the tree checked out now, or None for none.
+        new_tree: SHA-1 of the target tree, or None for none.
+        cone: If given, directories outside this sparse cone are reported as
+              single "dir/" tree entries, matching a sparse index.
+        prefix: Path prefix of the trees being compared.
+
+    Yields:
+        TreeChange records ("A", "D" or "M") of files and collapsed
+        directories.
+    """
+    from .diff_tree import ZERO_MODE, tree_diff
+
+    for change in tree_diff(repo, old_tree, new_tree, prefix, recursive=False):
+        old_mode, old_sha = change.old_mode, change.old_sha
+        new_mode, new_sha = change.new_mode, change.new_sha
+        if old_mode == "160000":
+            old_mode, old_sha = ZERO_MODE, None
+        if new_mode == "160000":
+            new_mode, new_sha = ZERO_MODE, None
+        if old_sha is None and new_sha is None:
+            continue
+        status = "A" if old_sha is None else "D" if new_sha is None else "M"
+        change = change._replace(status=status, old_mode=old_mode, new_mode=new_mode,
+                                 old_sha=old_sha, new_sha=new_sha)
+
+        if not (old_mode if old_sha else new_mode).startswith("04"):
+            yield change
+        elif cone is not None and not cone.contains_dir(change.path):
+            yield change._replace(path=change.path + "/")
         else:
-            raise Exception(f"Unknown type {obj.fmt} for object {item.sha}")
+            yield from tree_changes(repo, old_sha, new_sha, cone, change.path + "/")
+
+
+def commit_tree(repo: "GitRepository", commit_sha: Optional[str]) -> Optional[str]:
+    """Return the tree of a commit, or None for an unborn branch (no commit)."""
+    from ..core.objects.commit import commit_view_read
+
+    return commit_view_read(repo, commit_sha).tree if commit_sha else None
+
+
+def worktree_remove_path(repo: "GitRepository", rel: str) -> None:
+    """
+    Delete a worktree file and prune any parent directories left empty.
+
+    Args:
+        repo: The Git repository object.
+        rel: Path relative to the worktree.
+    """
+    full = os.path.join(repo.worktree, rel)
+    if os.path.lexists(full):
+        os.unlink(full)
+
+    parent = os.path.dirname(rel)
+    while parent:
+        try:
+            os.rmdir(os.path.join(repo.worktree, parent))
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+
+def worktree_update(
+    repo: "GitRepository",
+    index: "GitIndex",
+    changes: Iterable["TreeChange"],
+    force: bool = False,
+    jobs: Optional[int] = None,
+    cone: Optional["SparseCone"] = None,
+) -> Tuple[int, int]:
+    """
+    Move the worktree and index from one tree to another, touching only the
+    paths in `changes` (see `tree_changes`).
+
+    Index entries for unchanged paths keep their stat data, so local changes
+    to those paths are carried over untouched. Paths outside the sparse
+    `cone` are recorded as skip-worktree entries and never written.
+
+    Args:
+        repo: The Git repository object.
+        index: The current index; its entries are replaced in place.
+        changes: Differences between the tree the worktree is based on and
+                 the target tree.
+        force: If True, discard local changes to the differing paths.
+        jobs: Number of checkout worker threads.
+        cone: Optional sparse-checkout cone.
+
+    Returns:
+        Tuple of (paths written, paths deleted).
+
+    Raises:
+        Exception: If local changes or untracked files would be overwritten.
+    """
+    from ..core.index import (
+        index_entry_from_stat,
+        index_entry_stat_matches,
+        index_entry_tree_mode,
+        tree_mode_to_index,
+    )
+    from ..utils.hashing import object_hash
+
+    entries = {e.name: e for e in index.entries}
+    changes = list(changes)
+    changed = [c.path for c in changes]
+    old_files = {c.path: (c.old_sha, c.old_mode.encode("ascii")) for c in changes if c.old_sha is not None}
+    new_files = {c.path: (c.new_sha, c.new_mode.encode("ascii")) for c in changes if c.new_sha is not None}
+
+    if not force:
+        dirty = []
+        for rel in changed:
+            entry = entries.get(rel)
+            full = os.path.join(repo.worktree, rel)
+            if entry is None:
+                if rel in old_files or os.path.lexists(full):
+                    dirty.append(rel)
+                continue
+            if (entry.sha, index_entry_tree_mode(entry)) != old_files.get(rel):
+                dirty.append(rel)
+                continue
+            if entry.flag_skip_worktree or not os.path.lexists(full):
+                continue
+            stat = os.lstat(full)
+            if index_entry_stat_matches(entry, stat):
+                continue
+            with open(full, "rb") as f:
+                if object_hash(f, b"blob", None) != entry.sha:
+                    dirty.append(rel)
+        if dirty:
+            raise Exception(
+                "Your local changes to the following files would be overwritten:\n  "
+                + "\n  ".join(sorted(dirty))
+            )
+
+    removed = [rel for rel in changed if rel not in new_files]
+    written = [(rel,) + new_files[rel] for rel in changed if rel in new_files]
+    skipped: List[CheckoutEntry] = []
+    if cone is not None:
+        skipped = [e for e in written if not cone.contains(e[0])]
+        written = [e for e in written if cone.contains(e[0])]
+        for rel, _, mode in skipped:
+            if not mode.startswith(b'04'):
+                worktree_remove_path(repo, rel)
+
+    for rel in removed:
+        if not rel.endswith("/"):
+            worktree_remove_path(repo, rel)
+        entries.pop(rel, None)
+
+    for rel, _, _ in written:
+        full = os.path.join(repo.worktree, rel)
+        if os.path.isdir(full) and not os.path.islink(full):
+            raise Exception(f"Cannot overwrite directory {rel}")
+    entries_checkout(repo, written, repo.worktree, jobs=jobs)
+
+    for rel, sha, mode in written:
+        mode_type, mode_perms = tree_mode_to_index(mode)
+        stat = os.lstat(os.path.join(repo.worktree, rel))
+        entries[rel] = index_entry_from_stat(rel, sha, stat, mode_type, mode_perms)
+    for rel, sha, mode in skipped:
+        mode_type, mode_perms = tree_mode_to_index(mode)
+        entries[rel] = index_entry_from_stat(rel, sha, None, mode_type, mode_perms)
+
+    index.entries = [entries[name] for name in sorted(entries)]
+    return len(written), len(removed) + len(skipped)
+
+
+def worktree_move(
+    repo: "GitRepository",
+    old_commit: Optional[str],
+    new_commit: str,
+    force: bool = False,
+    jobs: Optional[int] = None,
+) -> None:
+    """
+    Move the checked-out worktree and index from one commit to another,
+    writing only the paths whose blobs differ (see `worktree_update`).
+
+    With a sparse index, the index is collapsed to the cone first and
+    changes outside it are compared as whole directories, like its entries.
+
+    Args:
+        repo: The Git repository object.
+        old_commit: Commit the worktree is currently based on (HEAD).
+        new_commit: Commit to move to.
+        force: If True, discard local changes to paths that differ.
+        jobs: Number of checkout worker threads.
+
+    Raises:
+        Exception: If local changes would be overwritten.
+    """
+    from ..core.index import index_collapse, index_read, index_write
+    from ..utils.sparse import sparse_index_enabled, sparse_read
+
+    cone = sparse_read(repo)
+    collapsed = cone if cone is not None and sparse_index_enabled(repo) else None
+    index = index_read(repo)
+    if collapsed is not None:
+        index_collapse(repo, index, collapsed)
+    worktree_update(
+        repo,
+        index,
+        tree_changes(repo, commit_tree(repo, old_commit), commit_tree(repo, new_commit), collapsed),
+        force=force,
+        jobs=jobs,
+        cone=cone,
+    )
+    index_write(repo, index)
+
+
+def branch_switch(
+    repo: "GitRepository",
+    name: str,
+    create: bool = False,
+    force: bool = False,
+    jobs: Optional[int] = None,
+) -> Optional[str]:
+    """
+    Switch the worktree, index and HEAD to a branch or commit.
+
+    Args:
+        repo: The Git repository object.
+        name: Branch name, or any commit-ish (which detaches HEAD).
+        create: If True, create branch `name` at the current HEAD first.
+        force: If True, discard local changes to paths that differ.
+        jobs: Number of checkout worker threads.
+
+    Returns:
+        The branch switched to, or None if HEAD is now detached.
+
+    Raises:
+        Exception: If the branch exists/doesn't exist as required, or local
+                   changes would be overwritten.
+    """
+    from ..core.refs import ref_resolve, ref_symbolic_target, ref_update, RefTransaction, ZERO_OID
+    from ..utils.hashing import object_find
+
+    head_sha = ref_resolve(repo, "HEAD")
+    branch_sha = ref_resolve(repo, "refs/heads/" + name)
+
+    if create:
+        if branch_sha:
+            raise Exception(f"A branch named '{name}' already exists.")
+        if not head_sha:
+            raise Exception("Cannot create a branch from an unborn HEAD.")
+        ref_update(repo, "refs/heads/" + name, head_sha, old_sha=ZERO_OID, message="branch: Created from HEAD")
+        branch, target_sha = name, head_sha
+    elif branch_sha:
+        branch, target_sha = name, branch_sha
+    else:
+        branch, target_sha = None, object_find(repo, name, fmt=b'commit')
+        if not target_sha:
+            raise Exception(f"Invalid reference: {name}")
+
+    if target_sha != head_sha:
+        worktree_move(repo, head_sha, target_sha, force=force, jobs=jobs)
+
+    source = ref_symbolic_target(repo, "HEAD")
+    source = source[len("refs/heads/"):] if source else head_sha
+    message = f"checkout: moving from {source} to {name}"
+    tx = RefTransaction(repo)
+    if branch:
+        tx.symbolic_update("HEAD", "refs/heads/" + branch, message=message)
+    else:
+        tx.update("HEAD", target_sha, deref=False, message=message)
+    tx.commit()
+    return branch
 
 
 def cmd_checkout(args: Any) -> None:
     """
-    Command handler to checkout a commit into a directory.
+    Command handler to checkout a commit into a directory, or to switch the
+    current worktree to a branch when no directory is given.
 
     Args:
-        args: Command-line arguments with 'commit' and 'path'.
+        args: Command-line arguments with 'commit', optional 'path' and 'jobs'.
 
     Raises:
         Exception: If target path is not a directory or not empty.
     """
     from ..utils.file_io import repo_find
     from ..utils.hashing import object_read, object_find
+    from ..utils.sparse import sparse_read
 
     repo = repo_find()
+
+    if args.path is None:
+        branch_switch_report(repo, args.commit, create=getattr(args, "create", False),
+                             force=getattr(args, "force", False), jobs=getattr(args, "jobs", None))
+        return
+
     commit_sha = object_find(repo, args.commit, fmt=b'commit')
     obj = object_read(repo, commit_sha)
 
@@ -60,5 +492,39 @@ def cmd_checkout(args: Any) -> None:
     else:
         os.makedirs(args.path)
 
-    tree_checkout(repo, obj, os.path.realpath(args.path))
-    print(f"Checked out '{args.commit}' to '{args.path}'")
\ No newline at end of file
+    tree_checkout(repo, obj, os.path.realpath(args.path), jobs=getattr(args, "jobs", None),
+                  cone=sparse_read(repo))
+    print(f"Checked out '{args.commit}' to '{args.path}'")
+
+
+def branch_switch_report(repo: "GitRepository", name: str, **kwargs: Any) -> None:
+    """
+    Run `branch_switch` and print the outcome like git does.
+
+    Args:
+        repo: The Git repository object.
+        name: Branch name or commit-ish.
+        **kwargs: Passed through to `branch_switch`.
+    """
+    from ..core.refs import ref_resolve
+
+    branch = branch_switch(repo, name, **kwargs)
+    if kwargs.get("create"):
+        print(f"Switched to a new branch '{branch}'")
+    elif branch:
+        print(f"Switched to branch '{branch}'")
+    else:
+        print(f"HEAD is now at {ref_resolve(repo, 'HEAD')[:7]}")
+
+
+def cmd_switch(args: Any) -> None:
+    """
+    Command handler to switch the current worktree to another branch.
+
+    Args:
+        args: Command-line arguments with 'branch', 'create', 'force' and 'jobs'.
+    """
+    from ..utils.file_io import repo_find
+
+    repo = repo_find()
+    branch_switch_report(repo, args.branch, create=args.create, force=args.force, jobs=args.jobs)
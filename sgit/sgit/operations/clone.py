@@ -0,0 +1,163 @@
+import os
+from typing import List, Optional, Tuple
+
+
+def objects_copy(src: str, dst: str, hardlink: bool = True, jobs: int = 1) -> Tuple[int, int]:
+    """
+    Populate the object directory `dst` with every file of `src`.
+
+    Files are hardlinked, which costs one directory entry per object and no
+    data. Objects are never modified once written (and the files under
+    `info/` are replaced, not rewritten), so sharing inodes between
+    repositories is safe. If linking fails, e.g. because `dst` is on another
+    filesystem, the remaining files are copied by `jobs` threads.
+
+    Args:
+        src: Source `objects` directory.
+        dst: Destination `objects` directory.
+        hardlink: Try hardlinks before copying.
+        jobs: Number of copy worker threads.
+
+    Returns:
+        (number of files linked, number of files copied).
+    """
+    import shutil
+    from concurrent.futures import ThreadPoolExecutor
+
+    files: List[str] = []
+    for root, dirs, names in os.walk(src):
+        dirs.sort()
+        rel = os.path.relpath(root, src)
+        os.makedirs(os.path.join(dst, rel), exist_ok=True)
+        files.extend(os.path.join(rel, name) for name in sorted(names) if not name.endswith(".lock"))
+
+    linked = 0
+    if hardlink:
+        for rel in files:
+            try:
+                os.link(os.path.join(src, rel), os.path.join(dst, rel))
+            except OSError:
+                break
+            linked += 1
+
+    copied = files[linked:]
+    if copied:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(lambda rel: shutil.copyfile(os.path.join(src, rel), os.path.join(dst, rel)), copied))
+    return linked, len(copied)
+
+
+def clone(
+    source: str,
+    directory: str,
+    hardlink: bool = True,
+    jobs: Optional[int] = None,
+) -> "GitRepository":
+    """
+    Clone a local repository into a new directory.
+
+    The objects are shared through hardlinks when possible (see
+    `objects_copy`). Branches become `refs/remotes/origin/*` and tags are
+    kept, all written as a single packed-refs file; the branch HEAD points
+    at gets a local branch tracking it, which is then checked out.
+
+    Args:
+        source: Worktree path of the repository to clone.
+        directory: Where to create the clone; must not exist or be empty.
+        hardlink: Hardlink objects instead of copying them.
+        jobs: Number of copy and checkout worker threads.
+
+    Returns:
+        The new repository.
+
+    Raises:
+        Exception: If the source is not a repository or the destination is
+                   not empty.
+    """
+    from ..core.refs import (
+        RefTransaction,
+        packed_refs_write,
+        ref_list_flat,
+        ref_peeled,
+        ref_resolve,
+        ref_symbolic_target,
+        tag_peeled,
+    )
+    from ..core.repository import GitRepository, repo_create
+    from ..utils.file_io import repo_file
+    from .checkout import checkout_workers, worktree_move
+
+    src = GitRepository(os.path.abspath(source))
+    if os.path.exists(directory) and (not os.path.isdir(directory) or os.listdir(directory)):
+        raise Exception(f"destination path '{directory}' already exists and is not an empty directory.")
+
+    repo_create(directory)
+    repo = GitRepository(os.path.abspath(directory))
+    jobs = checkout_workers(repo, jobs)
+    objects_copy(os.path.join(src.gitdir, "objects"), os.path.join(repo.gitdir, "objects"), hardlink, jobs)
+
+    packed = {}
+    for name, sha in ref_list_flat(src).items():
+        if name.startswith("refs/heads/"):
+            packed["refs/remotes/origin/" + name[len("refs/heads/"):]] = (sha, None)
+        elif name.startswith("refs/tags/"):
+            # The file is marked fully-peeled, so loose annotated tags need
+            # their target too, not only the ones already packed in `src`
+            packed[name] = (sha, ref_peeled(src, name) or tag_peeled(src, sha))
+    if packed:
+        packed_refs_write(repo, packed)
+
+    url = os.path.abspath(source)
+    remote = 'remote "origin"'
+    repo.conf.add_section(remote)
+    repo.conf.set(remote, "url", url)
+    repo.conf.set(remote, "fetch", "+refs/heads/*:refs/remotes/origin/*")
+
+    head = ref_resolve(src, "HEAD")
+    branch = ref_symbolic_target(src, "HEAD")
+    message = f"clone: from {url}"
+    tx = RefTransaction(repo)
+    if branch and branch.startswith("refs/heads/"):
+        name = branch[len("refs/heads/"):]
+        section = f'branch "{name}"'
+        repo.conf.add_section(section)
+        repo.conf.set(section, "remote", "origin")
+        repo.conf.set(section, "merge", branch)
+        tx.symbolic_update("HEAD", branch, message=message)
+        if head:
+            tx.update(branch, head, deref=False, message=message)
+            tx.symbolic_update("refs/remotes/origin/HEAD", "refs/remotes/origin/" + name)
+    elif head:
+        tx.update("HEAD", head, deref=False, message=message)
+    tx.commit()
+
+    with open(repo_file(repo, "config"), "w") as f:
+        repo.conf.write(f)
+
+    if head:
+        worktree_move(repo, None, head, jobs=jobs)
+    return repo
+
+
+def cmd_clone(args: "Namespace") -> None:
+    """
+    Handle the 'clone' command: clone a local repository into a new
+    directory (by default named after the source).
+
+    Args:
+        args: Command-line arguments with 'repository', 'directory',
+              'no_hardlinks' and 'jobs'.
+
+    Raises:
+        Exception: If the source is not a repository or the destination is
+                   not empty.
+    """
+    import sys
+    from ..core.refs import ref_resolve
+
+    directory = args.directory or os.path.basename(os.path.abspath(args.repository))
+    print(f"Cloning into '{directory}'...", file=sys.stderr)
+    repo = clone(args.repository, directory, hardlink=not args.no_hardlinks, jobs=args.jobs)
+    if not ref_resolve(repo, "HEAD"):
+        print("warning: You appear to have cloned an empty repository.", file=sys.stderr)
+
@@ -1,15 +1,26 @@
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Union
 
 
-def tree_from_index(repo: "GitRepository", index: "GitIndex") -> str:
+def tree_from_index(
+    repo: "GitRepository",
+    index: "GitIndex",
+    prefix: str = "",
+    trees: Optional[Dict[str, "GitTree"]] = None,
+) -> str:
     """
     Build a Git tree object from the repository index.
 
+    Sparse directory entries are emitted as subtrees pointing at their tree
+    OID, without being expanded. Unmerged entries (stages 1-3) are left out.
+
     Args:
         repo: The Git repository object.
         index: The Git index containing staged entries.
+        prefix: Only build the tree of this directory (relative to the worktree).
+        trees: If given, trees are only hashed, not written, and collected
+               here by SHA (e.g. to diff the index against HEAD).
 
     Returns:
         SHA-1 hash of the root tree object.
@@ -17,7 +28,14 @@ def tree_from_index(repo: "GitRepository", index: "GitIndex") -> str:
     contents = {"": []}
 
     for entry in index.entries:
-        dirname = os.path.dirname(entry.name)
+        if entry.flag_stage:
+            continue
+        name = entry.name.rstrip("/")
+        if prefix:
+            if not name.startswith(prefix + "/"):
+                continue
+            name = name[len(prefix) + 1:]
+        dirname = os.path.dirname(name)
         key = dirname
         while key != "":
             if key not in contents:
@@ -37,12 +55,16 @@ def tree_from_index(repo: "GitRepository", index: "GitIndex") -> str:
         for item in contents[path]:
             if isinstance(item, GitIndexEntry):
                 leaf_mode = f"{item.mode_type:02o}{item.mode_perms:04o}".encode("ascii")
-                leaf = GitTreeLeaf(mode=leaf_mode, path=os.path.basename(item.name), sha=item.sha)
+                leaf = GitTreeLeaf(mode=leaf_mode, path=os.path.basename(item.name.rstrip("/")), sha=item.sha)
             else:
                 leaf = GitTreeLeaf(mode=b"040000", path=item[0], sha=item[1])
             tree.items.append(leaf)
 
-        sha = object_write(tree, repo)
+        if trees is None:
+            sha = object_write(tree, repo)
+        else:
+            sha = object_write(tree)
+            trees[sha] = tree
         parent = os.path.dirname(path)
         base = os.path.basename(path)
         contents[parent].append((base, sha))
@@ -53,7 +75,7 @@ def tree_from_index(repo: "GitRepository", index: "GitIndex") -> str:
 def commit_create(
     repo: "GitRepository",
     tree: str,
-    parent: Optional[str],
+    parent: Union[str, List[str], None],
     author: str,
     timestamp: datetime,
     message: str
@@ -64,7 +86,8 @@ def commit_create(
     Args:
         repo: The Git repository object.
         tree: SHA of the tree object representing the commit content.
-        parent: SHA of the parent commit (if any).
+        parent: SHA of the parent commit (if any), or a list of parent SHAs
+                for a merge commit.
         author: Author's name and email.
         timestamp: Commit timestamp.
         message: Commit message.
@@ -77,8 +100,11 @@ def commit_create(
 
     commit = GitCommit()
     commit.kvlm[b"tree"] = tree.encode("ascii")
-    if parent:
-        commit.kvlm[b"parent"] = parent.encode("ascii")
+    parents = [parent] if isinstance(parent, str) else parent or []
+    if len(parents) == 1:
+        commit.kvlm[b"parent"] = parents[0].encode("ascii")
+    elif parents:
+        commit.kvlm[b"parent"] = [p.encode("ascii") for p in parents]
 
     message = message.strip() + "\n"
     offset = int(timestamp.astimezone().utcoffset().total_seconds())
@@ -94,29 +120,113 @@ def commit_create(
     return object_write(commit, repo)
 
 
+def index_stage_tracked(repo: "GitRepository", index: "GitIndex") -> int:
+    """
+    Stage the worktree state of every tracked file, as `add -u` does.
+
+    Files whose stat data matches their entry are trusted unchanged; only
+    the others are hashed (and written as blobs). Symlinks are not followed:
+    a symlink is staged as its target path. Entries of deleted files are
+    dropped, and conflicted paths are resolved with the worktree file.
+    Skip-worktree entries are left alone.
+
+    Args:
+        repo: The Git repository object.
+        index: The index to update in place.
+
+    Returns:
+        Number of paths whose staged content changed.
+    """
+    from ..core.index import index_entry_from_stat, index_entry_is_sparse_dir, index_entry_stat_matches
+    import io
+    from stat import S_ISLNK, S_ISREG
+    from ..utils.hashing import object_hash
+    from .diff import worktree_read
+
+    entries = []
+    resolved = set()
+    changed = 0
+    for e in index.entries:
+        if e.name in resolved:
+            # Remaining conflict stages of a path already resolved
+            continue
+        if e.flag_skip_worktree or index_entry_is_sparse_dir(e):
+            entries.append(e)
+            continue
+        full = os.path.join(repo.worktree, e.name)
+        try:
+            stat = os.lstat(full)
+        except FileNotFoundError:
+            stat = None
+        if stat is None or not (S_ISREG(stat.st_mode) or S_ISLNK(stat.st_mode)):
+            changed += 1
+            resolved.add(e.name)
+            continue
+        if not e.flag_stage and index_entry_stat_matches(e, stat):
+            entries.append(e)
+            continue
+        sha = object_hash(io.BytesIO(worktree_read(full)), b"blob", repo)
+        if S_ISLNK(stat.st_mode):
+            mode_type, mode_perms = 0b1010, 0
+        elif e.mode_type == 0b1000:
+            mode_type, mode_perms = e.mode_type, e.mode_perms
+        else:
+            mode_type, mode_perms = 0b1000, 0o644
+        if e.flag_stage:
+            resolved.add(e.name)
+        if e.flag_stage or sha != e.sha or mode_type != e.mode_type:
+            changed += 1
+        entries.append(index_entry_from_stat(e.name, sha, stat, mode_type, mode_perms))
+    index.entries = entries
+    return changed
+
+
 def cmd_commit(args: "Namespace") -> None:
     """
     Handle 'commit' command: create a new commit from staged changes.
 
+    While a merge is in progress (MERGE_HEAD exists) the commit gets the
+    merged commit as second parent, and MERGE_MSG is the default message.
+
+    With -a, modified and deleted tracked files are staged first (see
+    `index_stage_tracked`), reading and writing the index once.
+
     Args:
-        args: Command-line arguments with 'message' attribute.
+        args: Command-line arguments with 'message' and 'all' attributes.
 
     Prints:
         Information about the created commit and the branch/HEAD.
+
+    Raises:
+        Exception: If the index still has unmerged entries.
     """
-    from ..utils.file_io import repo_find, repo_file
-    from ..core.index import index_read
+    from ..utils.file_io import repo_find
+    from ..core.index import index_read, index_write
     from ..utils.config import gitconfig_read, gitconfig_user_get
     from ..utils.hashing import object_find
-    from ..core.refs import branch_get_active
+    from ..core.refs import branch_get_active, ref_update, ZERO_OID
     from datetime import datetime
 
+    repo = repo_find()
+    merge_head_path = os.path.join(repo.gitdir, "MERGE_HEAD")
+    merge_msg_path = os.path.join(repo.gitdir, "MERGE_MSG")
+    merge_head = None
+    if os.path.isfile(merge_head_path):
+        with open(merge_head_path) as f:
+            merge_head = f.read().strip()
+        if not args.message and os.path.isfile(merge_msg_path):
+            with open(merge_msg_path) as f:
+                args.message = f.read()
+
     if not args.message:
         print("Error: commit message required (-m)")
         return
 
-    repo = repo_find()
     index = index_read(repo)
+    if getattr(args, "all", False) and index_stage_tracked(repo, index):
+        index_write(repo, index)
+    if any(e.flag_stage for e in index.entries):
+        raise Exception("Committing is not possible because you have unmerged files.")
     tree = tree_from_index(repo, index)
 
     parent = object_find(repo, "HEAD")
@@ -124,14 +234,22 @@ def cmd_commit(args: "Namespace") -> None:
     if not author:
         author = "Unknown User <unknown@example.com>"
 
-    commit_sha = commit_create(repo, tree, parent, author, datetime.now(), args.message)
+    parents = [parent] + ([merge_head] if merge_head else []) if parent else []
+    commit_sha = commit_create(repo, tree, parents, author, datetime.now(), args.message)
+
+    # Compare-and-swap: fails if another writer moved HEAD since we read it
+    subject = args.message.strip().split("\n", 1)[0]
+    if merge_head:
+        reflog_message = f"commit (merge): {subject}"
+    else:
+        reflog_message = f"commit: {subject}" if parent else f"commit (initial): {subject}"
+    ref_update(repo, "HEAD", commit_sha, old_sha=parent or ZERO_OID, message=reflog_message)
+    for path in (merge_head_path, merge_msg_path):
+        if os.path.exists(path):
+            os.unlink(path)
 
     active_branch = branch_get_active(repo)
     if active_branch:
-        with open(repo_file(repo, "refs/heads", active_branch), "w") as fd:
-            fd.write(commit_sha + "\n")
         print(f"[{active_branch} {commit_sha[:7]}] {args.message.strip()}")
     else:
-        with open(repo_file(repo, "HEAD"), "w") as fd:
-            fd.write(commit_sha + "\n")
         print(f"[detached HEAD {commit_sha[:7]}] {args.message.strip()}")
@@ -0,0 +1,207 @@
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# Paths from other commits probed against each filter when measuring false positives
+BLOOM_PROBES_PER_COMMIT = 64
+
+
+def reachable_commits(repo: "GitRepository", cache: Optional[Dict[str, Any]] = None) -> Iterator["GitCommitView"]:
+    """
+    Iterate over every commit reachable from HEAD, branches and tags.
+
+    Args:
+        repo: The repository object.
+        cache: Optional commit view cache shared with other walks.
+
+    Yields:
+        GitCommitView objects, each commit once.
+    """
+    from ..core.objects.commit import commit_view_read
+    from ..core.refs import ref_list_flat, ref_resolve
+    from ..core.revision import object_peel
+
+    if cache is None:
+        cache = {}
+    tips = list(ref_list_flat(repo).values())
+    head = ref_resolve(repo, "HEAD")
+    if head:
+        tips.append(head)
+
+    stack = []
+    seen = set()
+    for sha in tips:
+        commit = object_peel(repo, sha, b'commit', cache)
+        if commit and commit not in seen:
+            seen.add(commit)
+            stack.append(commit)
+    while stack:
+        view = commit_view_read(repo, stack.pop(), cache)
+        yield view
+        for parent in view.parents:
+            if parent not in seen:
+                seen.add(parent)
+                stack.append(parent)
+
+
+def commit_changed_paths(repo: "GitRepository", view: "GitCommitView", cache: Dict[str, Any]) -> List[str]:
+    """
+    List the file paths a commit changes relative to its first parent (or
+    to the empty tree for a root commit).
+    """
+    from ..core.objects.commit import commit_view_read
+    from .diff_tree import tree_diff
+
+    parent_tree = commit_view_read(repo, view.parents[0], cache).tree if view.parents else None
+    return [change.path for change in tree_diff(repo, parent_tree, view.tree)]
+
+
+def commit_graph_write(repo: "GitRepository") -> int:
+    """
+    Write changed-path Bloom filters for every reachable commit.
+
+    Filters already present in the side file are kept as they are (commits
+    never change), so only new commits are diffed.
+
+    Args:
+        repo: The repository object.
+
+    Returns:
+        Number of filters that had to be computed.
+    """
+    from ..utils.bloom import (
+        BLOOM_BITS_PER_ENTRY,
+        BLOOM_HASHES,
+        BLOOM_MAX_CHANGES,
+        BloomFilter,
+        bloom_read,
+        bloom_write,
+    )
+
+    old = bloom_read(repo)
+    if old is not None and (old.hashes, old.bits_per_entry, old.max_changes) != \
+            (BLOOM_HASHES, BLOOM_BITS_PER_ENTRY, BLOOM_MAX_CHANGES):
+        old = None
+
+    cache: Dict[str, Any] = {}
+    filters = {}
+    computed = 0
+    for view in reachable_commits(repo, cache):
+        bloom = old.lookup(view.sha) if old is not None else None
+        if bloom is None:
+            bloom = BloomFilter.build(commit_changed_paths(repo, view, cache))
+            computed += 1
+        filters[view.sha] = bloom
+    bloom_write(repo, filters)
+    return computed
+
+
+def commit_graph_verify(repo: "GitRepository") -> Dict[str, Any]:
+    """
+    Check every stored filter against a fresh diff of its commit and
+    measure how often the filters answer "maybe" for paths the commit did
+    not change.
+
+    Each filter is probed with up to BLOOM_PROBES_PER_COMMIT keys taken
+    from other commits' changes; saturated filters are left out of the
+    false-positive measurement.
+
+    Args:
+        repo: The repository object.
+
+    Returns:
+        Statistics: 'commits', 'missing', 'errors' (commit IDs whose filter
+        is wrong), 'paths', 'bytes', 'saturated', 'expected_fpr', 'probes'
+        and 'false_positives'.
+
+    Raises:
+        Exception: If there is no filter file.
+    """
+    from ..core.objects.commit import commit_view_read
+    from ..utils.bloom import BloomFilter, bloom_false_positive_rate, bloom_keys, bloom_read
+
+    index = bloom_read(repo)
+    if index is None:
+        raise Exception("No changed-path filters; run 'sgit commit-graph write'")
+
+    cache: Dict[str, Any] = {}
+    stats: Dict[str, Any] = {"commits": len(index), "missing": 0, "errors": [], "paths": 0, "bytes": 0,
+                             "saturated": 0, "probes": 0, "false_positives": 0}
+    for view in reachable_commits(repo, cache):
+        if index.lookup(view.sha) is None:
+            stats["missing"] += 1
+
+    changed: Dict[str, set] = {}
+    expected = []
+    for sha, bloom in index.items():
+        try:
+            view = commit_view_read(repo, sha, cache)
+        except Exception:
+            raise Exception(f"Changed-path filter for missing commit {sha}")
+        paths = commit_changed_paths(repo, view, cache)
+        keys = set()
+        for path in paths:
+            keys.update(bloom_keys(path.split("/")))
+        changed[sha] = keys
+        stats["paths"] += len(paths)
+        stats["bytes"] += len(bloom.data)
+        if bloom.data != BloomFilter.build(paths, index.bits_per_entry, index.hashes, index.max_changes).data:
+            stats["errors"].append(sha)
+        if bloom.saturated():
+            stats["saturated"] += 1
+        else:
+            expected.append(bloom_false_positive_rate(len(keys), len(bloom.data) * 8, index.hashes))
+
+    pool = sorted(set().union(*changed.values())) if changed else []
+    for n, (sha, bloom) in enumerate(index.items()):
+        if bloom.saturated():
+            continue
+        probes = 0
+        for i in range(len(pool)):
+            if probes >= BLOOM_PROBES_PER_COMMIT:
+                break
+            key = pool[(n + i) % len(pool)]
+            if key in changed[sha]:
+                continue
+            probes += 1
+            if bloom.contains(key):
+                stats["false_positives"] += 1
+        stats["probes"] += probes
+
+    stats["expected_fpr"] = sum(expected) / len(expected) if expected else 0.0
+    return stats
+
+
+def cmd_commit_graph(args: "Namespace") -> None:
+    """
+    Handle the 'commit-graph' command: write or verify the changed-path
+    Bloom filters used by path-limited log.
+
+    Args:
+        args: Command-line arguments with 'action' ("write" or "verify").
+
+    Raises:
+        Exception: If verification finds a wrong filter.
+    """
+    from ..utils.file_io import repo_find
+
+    repo = repo_find()
+    if args.action == "write":
+        computed = commit_graph_write(repo)
+        print(f"Computed {computed} changed-path filter{'s' if computed != 1 else ''}")
+        return
+
+    stats = commit_graph_verify(repo)
+    commits = stats["commits"]
+    print(f"commits: {commits}")
+    print(f"reachable commits without a filter: {stats['missing']}")
+    print(f"changed paths: {stats['paths']} ({stats['paths'] / commits if commits else 0:.1f} per commit)")
+    print(f"filter size: {stats['bytes']} bytes")
+    print(f"saturated filters: {stats['saturated']}")
+    print(f"expected false-positive rate: {stats['expected_fpr'] * 100:.2f}%")
+    probes = stats["probes"]
+    rate = stats["false_positives"] / probes * 100 if probes else 0.0
+    print(f"measured false-positive rate: {rate:.2f}% ({stats['false_positives']}/{probes} probes)")
+    if stats["errors"]:
+        for sha in stats["errors"]:
+            print(f"error: wrong changed-path filter for commit {sha}")
+        raise Exception(f"{len(stats['errors'])} changed-path filter(s) failed verification")
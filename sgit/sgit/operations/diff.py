@@ -0,0 +1,322 @@
+import io
+import os
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+# Blobs larger than this are reported as binary without being diffed
+# (overridable with core.bigFileThreshold)
+DIFF_SIZE_LIMIT = 8 * 1024 * 1024
+
+
+class FileDiff(NamedTuple):
+    """Line counts and rendered patch of one changed file."""
+
+    path: str
+    added: int
+    removed: int
+    binary: bool
+    old_size: int
+    new_size: int
+    patch: bytes
+
+
+class BlobSource:
+    """
+    Fetches blob contents for a diff from the object store, or from the
+    worktree for snapshot blobs that were hashed but never written.
+    """
+
+    def __init__(self, repo: Any) -> None:
+        self.repo = repo
+        self.worktree_paths: Dict[str, str] = {}
+        self.limit = diff_size_limit(repo)
+
+    def size(self, sha: Optional[str]) -> int:
+        """Return the size of a blob without reading its contents."""
+        from ..utils.hashing import object_size
+
+        if sha is None:
+            return 0
+        path = self.worktree_paths.get(sha)
+        if path is not None:
+            return os.lstat(path).st_size
+        return object_size(self.repo, sha)
+
+    def read(self, sha: Optional[str]) -> bytes:
+        """Return the contents of a blob (b'' for a missing side)."""
+        from ..utils.hashing import object_read_raw
+
+        if sha is None:
+            return b''
+        path = self.worktree_paths.get(sha)
+        if path is not None:
+            return worktree_read(path)
+        return object_read_raw(self.repo, sha)[1]
+
+
+def diff_size_limit(repo: Any) -> int:
+    """Return the blob size above which files are not diffed line by line."""
+    value = repo.conf.get("core", "bigfilethreshold", fallback=None) if repo.conf is not None else None
+    if not value:
+        return DIFF_SIZE_LIMIT
+    value = value.strip().lower()
+    units = {"k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+    if value[-1] in units:
+        return int(value[:-1]) * units[value[-1]]
+    return int(value)
+
+
+def worktree_read(path: str) -> bytes:
+    """Read a worktree file as blob contents (symlinks yield their target)."""
+    if os.path.islink(path):
+        return os.readlink(path).encode("utf-8")
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def worktree_snapshot(repo: Any, index: Any, source: BlobSource) -> Any:
+    """
+    Build an in-memory index describing the tracked worktree files.
+
+    Files whose stat data matches their index entry keep the entry as is;
+    modified files are hashed (but not written) and registered in `source`
+    so their contents can be read back from the worktree. Deleted files are
+    dropped.
+
+    Args:
+        repo: The repository object.
+        index: The current GitIndex.
+        source: BlobSource to register worktree-only blobs in.
+
+    Returns:
+        A GitIndex whose trees describe the worktree.
+    """
+    from copy import copy
+    from ..core.index import GitIndex, index_entry_stat_matches
+    from ..utils.hashing import object_hash
+
+    entries = []
+    for e in index.entries:
+        if e.flag_skip_worktree or e.flag_stage:
+            entries.append(e)
+            continue
+        full = os.path.join(repo.worktree, e.name)
+        try:
+            stat = os.lstat(full)
+        except FileNotFoundError:
+            continue
+        if index_entry_stat_matches(e, stat):
+            entries.append(e)
+            continue
+
+        sha = object_hash(io.BytesIO(worktree_read(full)), b"blob", None)
+        if sha != e.sha:
+            e = copy(e)
+            e.sha = sha
+            source.worktree_paths[sha] = full
+        entries.append(e)
+    return GitIndex(index.version, entries)
+
+
+def file_diff(
+    source: BlobSource,
+    change: Any,
+    algorithm: str = "myers",
+    context: int = 3,
+    abbrev: Any = None,
+) -> FileDiff:
+    """
+    Produce the git-style patch of one tree change.
+
+    Args:
+        source: BlobSource to read both sides from.
+        change: TreeChange describing the file.
+        algorithm: "myers" or "histogram".
+        context: Lines of context around changes.
+        abbrev: Optional callable abbreviating object IDs.
+
+    Returns:
+        FileDiff with counts and the rendered patch.
+    """
+    from ..utils.diff import diff_opcodes, is_binary, lines_split, unified_hunks
+
+    path = change.path
+    old_name = change.old_path or path
+    header = [f"diff --git a/{old_name} b/{path}\n"]
+    if change.old_path is not None:
+        verb = "rename" if change.status == "R" else "copy"
+        header.append(f"similarity index {change.score}%\n"
+                      f"{verb} from {old_name}\n{verb} to {path}\n")
+        if change.old_mode != change.new_mode:
+            header.append(f"old mode {change.old_mode}\nnew mode {change.new_mode}\n")
+    elif change.status == "A":
+        header.append(f"new file mode {change.new_mode}\n")
+    elif change.status == "D":
+        header.append(f"deleted file mode {change.old_mode}\n")
+    elif change.old_mode != change.new_mode:
+        header.append(f"old mode {change.old_mode}\nnew mode {change.new_mode}\n")
+
+    short = abbrev or (lambda sha: sha[:7])
+    old_id = short(change.old_sha) if change.old_sha else "0000000"
+    new_id = short(change.new_sha) if change.new_sha else "0000000"
+    mode = f" {change.new_mode}" if change.status != "A" and change.old_mode == change.new_mode else ""
+    if change.old_sha != change.new_sha:
+        header.append(f"index {old_id}..{new_id}{mode}\n")
+    stat_path = f"{old_name} => {path}" if change.old_path is not None else path
+
+    old_path = f"a/{old_name}" if change.old_sha else "/dev/null"
+    new_path = f"b/{path}" if change.new_sha else "/dev/null"
+
+    old_size, new_size = source.size(change.old_sha), source.size(change.new_sha)
+    binary = old_size > source.limit or new_size > source.limit
+    if not binary:
+        old, new = source.read(change.old_sha), source.read(change.new_sha)
+        binary = is_binary(old) or is_binary(new)
+
+    if binary:
+        header.append(f"Binary files {old_path} and {new_path} differ\n")
+        return FileDiff(stat_path, 0, 0, True, old_size, new_size, "".join(header).encode("utf-8"))
+
+    a, b = lines_split(old) if old else [], lines_split(new) if new else []
+    opcodes = diff_opcodes(a, b, algorithm)
+    added = sum(j2 - j1 for tag, _, _, j1, j2 in opcodes if tag in ("insert", "replace"))
+    removed = sum(i2 - i1 for tag, i1, i2, _, _ in opcodes if tag in ("delete", "replace"))
+
+    patch = "".join(header).encode("utf-8")
+    hunks = unified_hunks(a, b, opcodes, context)
+    if hunks:
+        patch += f"--- {old_path}\n+++ {new_path}\n".encode("utf-8") + hunks
+    return FileDiff(stat_path, added, removed, False, old_size, new_size, patch)
+
+
+def diff_stat(diffs: List[FileDiff], width: int = 80) -> str:
+    """
+    Render a `--stat` summary.
+
+    Args:
+        diffs: Per-file results.
+        width: Total line width to scale the +/- bars to.
+
+    Returns:
+        The summary text, one line per file plus a totals line.
+    """
+    if not diffs:
+        return ""
+    name_width = max(len(d.path) for d in diffs)
+    counts = [f"Bin {d.old_size} -> {d.new_size} bytes" if d.binary else str(d.added + d.removed) for d in diffs]
+    count_width = max((len(c) for d, c in zip(diffs, counts) if not d.binary), default=0)
+    bar_width = max(width - name_width - count_width - 6, 10)
+    largest = max((d.added + d.removed for d in diffs), default=0)
+    scale = min(1.0, bar_width / largest) if largest else 1.0
+
+    lines = []
+    for d, count in zip(diffs, counts):
+        if d.binary:
+            lines.append(f" {d.path.ljust(name_width)} | {count}")
+            continue
+        plus = max(int(round(d.added * scale)), 1) if d.added else 0
+        minus = max(int(round(d.removed * scale)), 1) if d.removed else 0
+        lines.append(f" {d.path.ljust(name_width)} | {count.rjust(count_width)} {'+' * plus}{'-' * minus}".rstrip())
+
+    files = len(diffs)
+    added = sum(d.added for d in diffs)
+    removed = sum(d.removed for d in diffs)
+    summary = f" {files} file{'s' if files != 1 else ''} changed"
+    if added or not removed:
+        summary += f", {added} insertion{'s' if added != 1 else ''}(+)"
+    if removed:
+        summary += f", {removed} deletion{'s' if removed != 1 else ''}(-)"
+    lines.append(summary)
+    return "\n".join(lines) + "\n"
+
+
+def diff_trees(repo: Any, args: Any, source: BlobSource) -> Tuple[Optional[str], Optional[str], Dict[str, Any]]:
+    """
+    Pick the two trees to compare for `sgit diff`.
+
+    - no revision: index vs worktree
+    - --cached [rev]: rev (default HEAD) vs index
+    - rev: rev vs worktree
+    - rev1 rev2, or rev1..rev2: rev1 vs rev2
+
+    Returns:
+        (old tree, new tree, in-memory trees used by either side).
+    """
+    from ..core.index import index_read
+    from ..core.revision import rev_parse_range
+    from ..utils.hashing import object_find
+    from .commit import tree_from_index
+
+    revs: List[str] = []
+    for spec in args.revisions:
+        if ".." in spec:
+            (new, _), (old, _) = rev_parse_range(repo, spec)
+            revs.extend([old, new])
+        else:
+            revs.append(spec)
+
+    def tree_of(rev: str) -> Optional[str]:
+        tree = object_find(repo, rev, fmt=b'tree')
+        if tree is None and rev != "HEAD":
+            raise Exception(f"Unknown revision: {rev}")
+        return tree
+
+    trees: Dict[str, Any] = {}
+    if len(revs) == 2:
+        return tree_of(revs[0]), tree_of(revs[1]), trees
+    if len(revs) > 2:
+        raise Exception("Too many revisions")
+
+    index = index_read(repo)
+    index_tree = tree_from_index(repo, index, trees=trees)
+    if args.cached:
+        return tree_of(revs[0] if revs else "HEAD"), index_tree, trees
+
+    worktree_tree = tree_from_index(repo, worktree_snapshot(repo, index, source), trees=trees)
+    if revs:
+        return tree_of(revs[0]), worktree_tree, trees
+    return index_tree, worktree_tree, trees
+
+
+def cmd_diff(args: "Namespace") -> None:
+    """
+    Handle the 'diff' command: show changes between the worktree, the
+    index and commits as unified patches or a --stat summary.
+
+    Args:
+        args: Command-line arguments with 'revisions', 'cached', 'stat',
+              'algorithm' and 'context'.
+    """
+    from ..utils.file_io import repo_find
+    from ..utils.oid_table import oid_table
+    from .diff_tree import detect_renames, rename_options, tree_diff
+
+    repo = repo_find()
+    renames = rename_options(args, "revisions")
+    source = BlobSource(repo)
+    old_tree, new_tree, trees = diff_trees(repo, args, source)
+
+    algorithm = args.algorithm
+    if algorithm is None and repo.conf is not None:
+        algorithm = repo.conf.get("diff", "algorithm", fallback=None)
+    algorithm = algorithm or "myers"
+
+    changes = list(tree_diff(repo, old_tree, new_tree, trees=trees))
+    if renames is not None:
+        threshold, copies, limit = renames
+        changes = detect_renames(repo, changes, threshold, copies, limit, source)
+
+    table = oid_table(repo)
+    diffs = [file_diff(source, change, algorithm, args.context, table.abbreviate) for change in changes]
+
+    if args.stat:
+        sys.stdout.write(diff_stat(diffs))
+    else:
+        out = sys.stdout.buffer if hasattr(sys.stdout, "buffer") else None
+        for d in diffs:
+            if out is not None:
+                out.write(d.patch)
+            else:
+                sys.stdout.write(d.patch.decode("utf-8", errors="replace"))
+    sys.stdout.flush()
@@ -0,0 +1,312 @@
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+ZERO_MODE = "000000"
+
+
+class TreeChange(NamedTuple):
+    """One path that differs between two trees."""
+
+    status: str  # "A" (added), "D" (deleted), "M" (modified), "R" (renamed) or "C" (copied)
+    path: str
+    old_mode: str
+    new_mode: str
+    old_sha: Optional[str]
+    new_sha: Optional[str]
+    old_path: Optional[str] = None  # source path of a rename or copy
+    score: Optional[int] = None  # similarity percent of a rename or copy
+
+
+def tree_entries(repo: Any, sha: Optional[str], trees: Optional[Dict[str, Any]] = None
+                 ) -> List[Tuple[str, str, str, str, bool]]:
+    """
+    Read a tree as (sort key, name, mode, sha, is_tree) rows in Git tree order.
+
+    Args:
+        repo: The repository object.
+        sha: SHA-1 of the tree, or None for an empty tree.
+        trees: Optional in-memory trees (SHA -> GitTree) that are consulted
+               before the object store, e.g. trees hashed from the index.
+
+    Returns:
+        Rows sorted by Git's tree order (directories compare as "name/").
+    """
+    from ..utils.hashing import object_read
+
+    if sha is None:
+        return []
+    tree = trees.get(sha) if trees else None
+    if tree is None:
+        tree = object_read(repo, sha)
+    rows = []
+    for leaf in tree.items:
+        mode = leaf.mode.decode("ascii") if isinstance(leaf.mode, bytes) else leaf.mode
+        mode = mode.rjust(6, "0")
+        is_tree = mode.startswith("04")
+        rows.append((leaf.path + "/" if is_tree else leaf.path, leaf.path, mode, leaf.sha, is_tree))
+    rows.sort(key=lambda row: row[0])
+    return rows
+
+
+def tree_diff(
+    repo: Any,
+    old_tree: Optional[str],
+    new_tree: Optional[str],
+    prefix: str = "",
+    recursive: bool = True,
+    trees: Optional[Dict[str, Any]] = None,
+) -> Iterator[TreeChange]:
+    """
+    Compare two trees with a merge-join over their sorted entries.
+
+    Subtrees whose OIDs are equal are skipped without being read, so the
+    work done is proportional to the size of the change rather than the
+    size of the trees. A path that is a file on one side and a directory on
+    the other is reported as a deletion plus additions.
+
+    Args:
+        repo: The repository object.
+        old_tree: SHA-1 of the old tree, or None for an empty tree.
+        new_tree: SHA-1 of the new tree, or None for an empty tree.
+        prefix: Path prefix of the trees being compared.
+        recursive: If False, a changed subtree is reported as one "M" record
+                   instead of being descended into.
+        trees: Optional in-memory trees consulted before the object store.
+
+    Yields:
+        TreeChange records in tree order.
+    """
+    if old_tree == new_tree:
+        return
+
+    old = tree_entries(repo, old_tree, trees)
+    new = tree_entries(repo, new_tree, trees)
+    i = j = 0
+
+    while i < len(old) or j < len(new):
+        if j >= len(new) or (i < len(old) and old[i][0] < new[j][0]):
+            _, name, mode, sha, is_tree = old[i]
+            i += 1
+            if is_tree and recursive:
+                yield from tree_diff(repo, sha, None, prefix + name + "/", recursive, trees)
+            else:
+                yield TreeChange("D", prefix + name, mode, ZERO_MODE, sha, None)
+        elif i >= len(old) or new[j][0] < old[i][0]:
+            _, name, mode, sha, is_tree = new[j]
+            j += 1
+            if is_tree and recursive:
+                yield from tree_diff(repo, None, sha, prefix + name + "/", recursive, trees)
+            else:
+                yield TreeChange("A", prefix + name, ZERO_MODE, mode, None, sha)
+        else:
+            _, name, old_mode, old_sha, is_tree = old[i]
+            _, _, new_mode, new_sha, _ = new[j]
+            i += 1
+            j += 1
+            if old_sha == new_sha and old_mode == new_mode:
+                continue
+            if is_tree and recursive:
+                yield from tree_diff(repo, old_sha, new_sha, prefix + name + "/", recursive, trees)
+            else:
+                yield TreeChange("M", prefix + name, old_mode, new_mode, old_sha, new_sha)
+
+
+def detect_renames(
+    repo: Any,
+    changes: List[TreeChange],
+    threshold: int = 50,
+    copies: bool = False,
+    limit: int = 1000,
+    source: Any = None,
+) -> List[TreeChange]:
+    """
+    Pair deleted and added files into renames (and copies).
+
+    Files whose OIDs are identical are paired first, at no cost. The rest
+    are scored with chunk-hash fingerprints (see `blob_fingerprint`), each
+    blob fingerprinted once, so no pair is ever diffed line by line. Pairs
+    whose sizes alone rule out `threshold` are skipped, and inexact
+    matching is abandoned if there are more than `limit`² candidate pairs.
+
+    Args:
+        repo: The repository object.
+        changes: Changes from `tree_diff` (recursive).
+        threshold: Minimum similarity percent for an inexact match.
+        copies: Also use modified files, and sources already renamed, as
+                copy sources.
+        limit: Rename limit (as git's diff.renameLimit).
+        source: Object with read(sha)/size(sha) and a `limit` size cutoff,
+                e.g. a diff BlobSource; defaults to the object store.
+
+    Returns:
+        The changes with matched deletions removed and additions turned
+        into "R"/"C" records, in the original order.
+    """
+    from ..utils.similarity import blob_fingerprint, similarity_score
+
+    if source is None:
+        from .diff import BlobSource
+        source = BlobSource(repo)
+
+    def kind(mode: str) -> str:
+        return mode[:2]
+
+    deleted = [i for i, c in enumerate(changes) if c.status == "D" and kind(c.old_mode) != "04"]
+    added = [i for i, c in enumerate(changes) if c.status == "A" and kind(c.new_mode) != "04"]
+    if not deleted and not (copies and added):
+        return changes
+
+    matched: Dict[int, Tuple[int, int]] = {}  # added index -> (source index, score)
+    renamed: Dict[int, int] = {}  # deleted index -> added index it was renamed to
+
+    # Exact pass: identical blobs, pairing files with the same name first
+    by_sha: Dict[str, List[int]] = {}
+    for i in deleted:
+        by_sha.setdefault(changes[i].old_sha, []).append(i)
+    for same_name in (True, False):
+        for j in added:
+            dst = changes[j]
+            if j in matched or dst.new_sha not in by_sha:
+                continue
+            name = dst.path.rsplit("/", 1)[-1]
+            for i in by_sha[dst.new_sha]:
+                src = changes[i]
+                if i in renamed or kind(src.old_mode) != kind(dst.new_mode):
+                    continue
+                if same_name and src.path.rsplit("/", 1)[-1] != name:
+                    continue
+                matched[j] = (i, 100)
+                renamed[i] = j
+                break
+
+    sources = [i for i in deleted if i not in renamed]
+    if copies:
+        sources = deleted + [i for i, c in enumerate(changes) if c.status == "M" and kind(c.old_mode) != "04"]
+    targets = [j for j in added if j not in matched]
+
+    if sources and targets and threshold <= 100 and len(sources) * len(targets) <= limit * limit:
+        prints: Dict[str, Dict[int, int]] = {}
+        sizes: Dict[str, int] = {}
+
+        def size(sha: str) -> int:
+            if sha not in sizes:
+                sizes[sha] = source.size(sha)
+            return sizes[sha]
+
+        def fingerprint(sha: str) -> Dict[int, int]:
+            if sha not in prints:
+                prints[sha] = blob_fingerprint(source.read(sha))
+            return prints[sha]
+
+        scored = []
+        for j in targets:
+            dst = changes[j]
+            dst_size = size(dst.new_sha)
+            if dst_size > source.limit:
+                continue
+            for i in sources:
+                src = changes[i]
+                if kind(src.old_mode) != kind(dst.new_mode):
+                    continue
+                src_size = size(src.old_sha)
+                larger, smaller = max(src_size, dst_size), min(src_size, dst_size)
+                if src_size > source.limit or (larger and smaller * 100 < threshold * larger):
+                    continue
+                score = similarity_score(fingerprint(src.old_sha), src_size, fingerprint(dst.new_sha), dst_size)
+                if score >= threshold:
+                    scored.append((-score, i, j))
+
+        # Best pairs first; a deleted file is renamed at most once
+        for negative_score, i, j in sorted(scored):
+            if j in matched:
+                continue
+            if changes[i].status == "D" and i not in renamed:
+                renamed[i] = j
+            elif not copies:
+                continue
+            matched[j] = (i, -negative_score)
+
+    result = []
+    for k, change in enumerate(changes):
+        if k in renamed:
+            continue
+        if k in matched:
+            i, score = matched[k]
+            src = changes[i]
+            change = change._replace(status="R" if renamed.get(i) == k else "C", old_path=src.path, old_mode=src.old_mode,
+                                     old_sha=src.old_sha, score=score)
+        result.append(change)
+    return result
+
+
+def rename_options(args: "Namespace", positional: str) -> Optional[Tuple[int, bool, int]]:
+    """
+    Read the -M/-C/-l options of a diff command.
+
+    `-M` takes an optional attached threshold (`-M60%`), so argparse also
+    lets it consume a following revision (`-M HEAD~1`); such values are
+    handed back to the `positional` argument list.
+
+    Returns:
+        (threshold, copies, limit) for `detect_renames`, or None if rename
+        detection was not requested.
+    """
+    import re
+    from ..utils.similarity import similarity_threshold
+
+    values = []
+    for attr in ("find_renames", "find_copies"):
+        value = getattr(args, attr)
+        if value and not re.match(r"^\d+(\.\d+)?%?$", value):
+            getattr(args, positional).insert(0, value)
+            setattr(args, attr, "")
+        values.append(getattr(args, attr))
+
+    renames, copies = values
+    if renames is None and copies is None:
+        return None
+    return similarity_threshold(copies or renames), copies is not None, args.rename_limit
+
+
+def cmd_diff_tree(args: "Namespace") -> None:
+    """
+    Handle the 'diff-tree' command: compare the trees of two tree-ish
+    objects, or of a commit and its first parent.
+
+    Args:
+        args: Command-line arguments with 'objects', 'recursive' and 'name_status'.
+    """
+    from ..core.objects.commit import commit_view_read
+    from ..utils.file_io import repo_find
+    from ..utils.hashing import object_find
+
+    repo = repo_find()
+    renames = rename_options(args, "objects")
+
+    if len(args.objects) == 1:
+        commit = object_find(repo, args.objects[0], fmt=b'commit')
+        if commit is None:
+            raise Exception(f"Not a commit: {args.objects[0]}")
+        view = commit_view_read(repo, commit)
+        old_tree = commit_view_read(repo, view.parents[0]).tree if view.parents else None
+        new_tree = view.tree
+        print(commit)
+    elif len(args.objects) == 2:
+        old_tree, new_tree = (object_find(repo, name, fmt=b'tree') for name in args.objects)
+    else:
+        raise Exception("diff-tree takes one commit or two tree-ish objects")
+
+    changes = list(tree_diff(repo, old_tree, new_tree, recursive=args.recursive))
+    if renames is not None:
+        threshold, copies, limit = renames
+        changes = detect_renames(repo, changes, threshold, copies, limit)
+
+    for change in changes:
+        status, paths = change.status, change.path
+        if change.old_path is not None:
+            status, paths = f"{status}{change.score:03d}", f"{change.old_path}\t{change.path}"
+        if args.name_status:
+            print(f"{status}\t{paths}")
+        else:
+            print(f":{change.old_mode} {change.new_mode} {change.old_sha or '0' * 40} "
+                  f"{change.new_sha or '0' * 40} {status}\t{paths}")
@@ -0,0 +1,186 @@
+import os
+from typing import Any, BinaryIO, Dict, List
+
+
+# Size of the output buffer in front of stdout
+EXPORT_BUFFER_SIZE = 1 << 20
+
+
+def path_quote(path: str) -> bytes:
+    """Quote a path C-style for the stream if it contains characters that need it."""
+    raw = path.encode("utf-8")
+    if not (raw.startswith(b'"') or any(c in raw for c in b'\\\n"')):
+        return raw
+    return b'"' + raw.replace(b"\\", b"\\\\").replace(b'"', b'\\"').replace(b"\n", b"\\n") + b'"'
+
+
+def data_command(data: bytes) -> bytes:
+    """Render a `data` command with its payload."""
+    return b"data " + str(len(data)).encode("ascii") + b"\n" + data + b"\n"
+
+
+class FastExport:
+    """
+    Write history as a git fast-import stream.
+
+    Commits are emitted parents first, each as the changes against its first
+    parent (a tree diff, which skips unchanged subtrees without reading
+    them), and every blob is emitted once, before the first commit using it,
+    and referenced by mark afterwards. Objects listed in imported marks are
+    treated as already exported.
+    """
+
+    def __init__(self, repo: "GitRepository", out: BinaryIO) -> None:
+        self.repo = repo
+        self.out = out
+        self.marks: Dict[str, int] = {}
+        self.next_mark = 1
+        self.cache: Dict[str, Any] = {}
+
+    def mark(self, sha: str) -> int:
+        """Assign the next mark to an object."""
+        mark = self.marks[sha] = self.next_mark
+        self.next_mark += 1
+        return mark
+
+    def commit_order(self, tip: str) -> List[str]:
+        """List the not yet exported commits reachable from `tip`, parents before children."""
+        from ..core.objects.commit import commit_view_read
+
+        order = []
+        queued = set()
+        stack = [(tip, False)]
+        while stack:
+            sha, expanded = stack.pop()
+            if expanded:
+                order.append(sha)
+                continue
+            if sha in queued or sha in self.marks:
+                continue
+            queued.add(sha)
+            stack.append((sha, True))
+            for parent in reversed(commit_view_read(self.repo, sha, self.cache).parents):
+                stack.append((parent, False))
+        return order
+
+    def export_commit(self, sha: str, ref: str) -> None:
+        """Emit the blobs a commit introduces, then the commit itself."""
+        from ..core.objects.commit import commit_view_read
+        from ..utils.hashing import object_read, object_read_raw
+        from .diff_tree import tree_diff
+
+        view = commit_view_read(self.repo, sha, self.cache)
+        parent_tree = commit_view_read(self.repo, view.parents[0], self.cache).tree if view.parents else None
+
+        changes = []
+        for change in tree_diff(self.repo, parent_tree, view.tree):
+            if change.new_sha is None:
+                changes.append(b"D " + path_quote(change.path) + b"\n")
+                continue
+            mode = change.new_mode.encode("ascii")
+            if mode == b"160000":
+                dataref = change.new_sha.encode("ascii")
+            else:
+                if change.new_sha not in self.marks:
+                    mark = self.mark(change.new_sha)
+                    data = object_read_raw(self.repo, change.new_sha)[1]
+                    self.out.write(b"blob\nmark :%d\n" % mark + data_command(data))
+                dataref = b":%d" % self.marks[change.new_sha]
+            changes.append(b"M " + mode + b" " + dataref + b" " + path_quote(change.path) + b"\n")
+
+        kvlm = object_read(self.repo, sha).kvlm
+        lines = []
+        if not view.parents:
+            lines.append(b"reset " + ref.encode("utf-8") + b"\n")
+        lines.append(b"commit " + ref.encode("utf-8") + b"\nmark :%d\n" % self.mark(sha))
+        lines.append(b"author " + kvlm[b"author"] + b"\n")
+        lines.append(b"committer " + kvlm[b"committer"] + b"\n")
+        if b"encoding" in kvlm:
+            lines.append(b"encoding " + kvlm[b"encoding"] + b"\n")
+        lines.append(data_command(kvlm.get(None, b"")))
+        for i, parent in enumerate(view.parents):
+            lines.append((b"from :%d\n" if i == 0 else b"merge :%d\n") % self.marks[parent])
+        self.out.write(b"".join(lines + changes) + b"\n")
+
+    def export_ref(self, ref: str, sha: str) -> None:
+        """Emit the history of a ref, then point the ref at its tip (or write its tag)."""
+        import sys
+        from ..core.revision import object_peel
+        from ..utils.hashing import object_read
+
+        commit = object_peel(self.repo, sha, b'commit', self.cache)
+        if commit is None:
+            print(f"warning: skipping {ref}, which does not point at a commit", file=sys.stderr)
+            return
+        order = self.commit_order(commit)
+        for c in order:
+            self.export_commit(c, ref)
+
+        if sha != commit and ref.startswith("refs/tags/"):
+            kvlm = object_read(self.repo, sha).kvlm
+            lines = [b"tag " + ref[len("refs/tags/"):].encode("utf-8") + b"\n", b"from :%d\n" % self.marks[commit]]
+            if b"tagger" in kvlm:
+                lines.append(b"tagger " + kvlm[b"tagger"] + b"\n")
+            lines.append(data_command(kvlm.get(None, b"")))
+            self.out.write(b"".join(lines))
+        elif not order or order[-1] != commit:
+            self.out.write(b"reset " + ref.encode("utf-8") + b"\nfrom :%d\n\n" % self.marks[commit])
+
+    def run(self, refs: Dict[str, str]) -> None:
+        """Export the given refs (name -> object ID) in name order."""
+        for ref in sorted(refs):
+            self.export_ref(ref, refs[ref])
+        self.out.write(b"done\n")
+
+    def marks_read(self, path: str) -> None:
+        """Load marks saved by --export-marks; their objects are not exported again."""
+        with open(path) as f:
+            for line in f:
+                mark, sha = line.split()
+                self.marks[sha] = int(mark[1:])
+        self.next_mark = max(self.marks.values(), default=0) + 1
+
+    def marks_write(self, path: str) -> None:
+        """Save the marks table as `:<mark> <sha>` lines."""
+        with open(path, "w") as f:
+            for sha, mark in sorted(self.marks.items(), key=lambda item: item[1]):
+                f.write(f":{mark} {sha}\n")
+
+
+def cmd_fast_export(args: "Namespace") -> None:
+    """
+    Handle the 'fast-export' command: write the history of the given refs
+    (or of all refs with --all) to stdout as a git fast-import stream.
+
+    Args:
+        args: Command-line arguments with 'refs', 'all', 'import_marks' and
+              'export_marks'.
+
+    Raises:
+        Exception: If no ref is given or a name does not resolve.
+    """
+    import sys
+    from ..core.refs import ref_list_flat, ref_resolve
+    from ..utils.file_io import repo_find
+
+    repo = repo_find()
+    refs: Dict[str, str] = ref_list_flat(repo) if args.all else {}
+    for name in args.refs:
+        for ref in (name, "refs/heads/" + name, "refs/tags/" + name):
+            sha = ref_resolve(repo, ref)
+            if sha:
+                refs[ref] = sha
+                break
+        else:
+            raise Exception(f"Not a ref: {name}")
+    if not refs:
+        raise Exception("Nothing to export; give refs or --all")
+
+    sys.stdout.flush()
+    with open(sys.stdout.fileno(), "wb", buffering=EXPORT_BUFFER_SIZE, closefd=False) as out:
+        exporter = FastExport(repo, out)
+        if args.import_marks and os.path.exists(args.import_marks):
+            exporter.marks_read(args.import_marks)
+        exporter.run(refs)
+    if args.export_marks:
+        exporter.marks_write(args.export_marks)
@@ -0,0 +1,553 @@
+import os
+import re
+from typing import Any, BinaryIO, Dict, List, Optional, Set, Tuple
+
+
+# Bytes requested from the input per read
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Short file modes accepted in filemodify commands
+FAST_IMPORT_MODES = {b"644": b"100644", b"755": b"100755", b"100644": b"100644", b"100755": b"100755",
+                     b"120000": b"120000", b"160000": b"160000", b"040000": b"040000", b"40000": b"040000"}
+
+
+class ImportStream:
+    """Buffered line and byte reader over a fast-import stream."""
+
+    def __init__(self, fd: BinaryIO) -> None:
+        self.fd = fd
+        self.buf = b""
+        self.pos = 0
+        self.pending: Optional[bytes] = None
+
+    def _fill(self) -> bool:
+        chunk = self.fd.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def readline(self) -> Optional[bytes]:
+        """Return the next line without its newline, or None at the end of the stream."""
+        if self.pending is not None:
+            line, self.pending = self.pending, None
+            return line
+        while True:
+            end = self.buf.find(b"\n", self.pos)
+            if end >= 0:
+                line = self.buf[self.pos:end]
+                self.pos = end + 1
+                return line
+            if not self._fill():
+                if self.pos < len(self.buf):
+                    line = self.buf[self.pos:]
+                    self.pos = len(self.buf)
+                    return line
+                return None
+
+    def unread(self, line: bytes) -> None:
+        """Push a line back, to be returned by the next `readline`."""
+        self.pending = line
+
+    def read(self, size: int) -> bytes:
+        """Read exactly `size` bytes."""
+        available = len(self.buf) - self.pos
+        if available >= size:
+            data = self.buf[self.pos:self.pos + size]
+            self.pos += size
+            return data
+        parts = [self.buf[self.pos:]]
+        needed = size - available
+        self.buf, self.pos = b"", 0
+        while needed:
+            chunk = self.fd.read(max(needed, STREAM_CHUNK_SIZE))
+            if not chunk:
+                raise Exception("fast-import: unexpected end of stream in data")
+            if len(chunk) > needed:
+                self.buf = chunk[needed:]
+                chunk = chunk[:needed]
+            parts.append(chunk)
+            needed -= len(chunk)
+        return b"".join(parts)
+
+    def data(self, line: Optional[bytes]) -> bytes:
+        """
+        Read the payload of a `data` command, given its command line.
+
+        Both the exact byte count form (`data <n>`) and the delimited form
+        (`data <<DELIM`) are accepted; the optional newline after the
+        payload is consumed.
+        """
+        if line is None or not line.startswith(b"data "):
+            raise Exception(f"fast-import: expected data command, got {line!r}")
+        arg = line[5:]
+        if arg.startswith(b"<<"):
+            delim = arg[2:]
+            lines = []
+            while True:
+                text = self.readline()
+                if text is None:
+                    raise Exception("fast-import: unexpected end of stream in data")
+                if text == delim:
+                    break
+                lines.append(text + b"\n")
+            return b"".join(lines)
+
+        data = self.read(int(arg))
+        if self.pos >= len(self.buf):
+            self._fill()
+        if self.buf[self.pos:self.pos + 1] == b"\n":
+            self.pos += 1
+        return data
+
+
+class ImportTree:
+    """
+    A tree being built by fast-import.
+
+    Entries map a name to [mode, OID, ImportTree or None]; they are only
+    read from the object store when the tree is first changed, and
+    subdirectories only when something below them is. `sha` (and the OID of
+    a directory entry) is None while the tree has unwritten changes.
+    """
+
+    __slots__ = ("sha", "entries")
+
+    def __init__(self, sha: Optional[str] = None, entries: Optional[Dict[bytes, list]] = None) -> None:
+        self.sha = sha
+        self.entries = entries
+
+
+class ImportBranch:
+    """Tip commit and working tree of a branch in the stream."""
+
+    __slots__ = ("tip", "tree")
+
+    def __init__(self, tip: Optional[str], tree: ImportTree) -> None:
+        self.tip = tip
+        self.tree = tree
+
+
+def path_unquote(path: bytes) -> bytes:
+    """Decode a C-style quoted path from the stream; unquoted paths are returned as is."""
+    import codecs
+
+    if not path.startswith(b'"'):
+        return path
+    return codecs.escape_decode(path[1:-1])[0]
+
+
+def path_split(line: bytes) -> Tuple[bytes, bytes]:
+    """Split a `<path> <path>` argument pair (C and R commands)."""
+    if line.startswith(b'"'):
+        end = 1
+        while line[end:end + 1] != b'"':
+            end += 2 if line[end:end + 1] == b"\\" else 1
+        return path_unquote(line[:end + 1]), path_unquote(line[end + 2:])
+    source, _, dest = line.partition(b" ")
+    return source, path_unquote(dest)
+
+
+class FastImport:
+    """
+    Import a git fast-import stream.
+
+    Each branch keeps its tree in memory, so a commit only writes the blobs
+    it adds and the trees along its changed paths. Objects already written
+    in this session are remembered and never checked for or written again.
+    Refs are updated together in one transaction at the end (and at each
+    `checkpoint`).
+    """
+
+    def __init__(self, repo: "GitRepository", force: bool = False) -> None:
+        self.repo = repo
+        self.force = force
+        self.marks: Dict[int, str] = {}
+        self.written: Set[str] = set()
+        self.branches: Dict[str, ImportBranch] = {}
+        self.tags: Dict[str, str] = {}
+        self.commit_trees: Dict[str, str] = {}
+        self.stats = {b"blob": 0, b"tree": 0, b"commit": 0, b"tag": 0}
+        self.duplicates = 0
+
+    def write(self, fmt: bytes, data: bytes) -> str:
+        """Write an object unless this session already wrote it."""
+        from ..utils.hashing import object_write_raw
+        import hashlib
+
+        sha = hashlib.sha1(fmt + b" " + str(len(data)).encode() + b"\x00" + data).hexdigest()
+        if sha in self.written:
+            self.duplicates += 1
+            return sha
+        object_write_raw(fmt, data, self.repo, sha=sha)
+        self.written.add(sha)
+        self.stats[fmt] += 1
+        return sha
+
+    def resolve(self, name: bytes) -> str:
+        """Resolve a `:mark`, an object ID or a ref name to an object ID."""
+        from ..utils.hashing import object_find
+
+        text = name.decode("utf-8")
+        if text.startswith(":"):
+            mark = int(text[1:])
+            if mark not in self.marks:
+                raise Exception(f"fast-import: mark :{mark} not declared")
+            return self.marks[mark]
+        if re.match(r"^[0-9a-f]{40}$", text):
+            return text
+        branch = self.branches.get(self.ref_name(text))
+        if branch is not None and branch.tip:
+            return branch.tip
+        sha = object_find(self.repo, text, fmt=b'commit')
+        if sha is None:
+            raise Exception(f"fast-import: not a valid commit: {text}")
+        return sha
+
+    @staticmethod
+    def ref_name(name: str) -> str:
+        """Full ref name for a branch named in the stream."""
+        return name if name.startswith("refs/") or name == "HEAD" else "refs/heads/" + name
+
+    def commit_tree(self, sha: str) -> str:
+        """Return the root tree of a commit."""
+        from ..core.objects.commit import commit_view_read
+
+        tree = self.commit_trees.get(sha)
+        return tree if tree is not None else commit_view_read(self.repo, sha).tree
+
+    def branch(self, ref: str) -> ImportBranch:
+        """Return a branch, starting from its existing ref value if the stream has not touched it yet."""
+        from ..core.refs import ref_resolve
+        from ..core.revision import object_peel
+
+        branch = self.branches.get(ref)
+        if branch is None:
+            tip = ref_resolve(self.repo, ref)
+            if tip:
+                tip = object_peel(self.repo, tip, b'commit')
+            branch = self.branches[ref] = ImportBranch(tip, ImportTree(self.commit_tree(tip) if tip else None))
+        return branch
+
+    def tree_load(self, node: ImportTree) -> Dict[bytes, list]:
+        """Read a tree's entries from the object store the first time they are needed."""
+        from ..utils.hashing import object_read_raw
+        from ..utils.tree_utils import tree_parse
+
+        if node.entries is None:
+            node.entries = {}
+            if node.sha is not None:
+                for leaf in tree_parse(object_read_raw(self.repo, node.sha)[1]):
+                    node.entries[leaf.path.encode("utf-8")] = [leaf.mode, leaf.sha, None]
+        return node.entries
+
+    def tree_child(self, entry: list) -> ImportTree:
+        """Return the (lazily created) subtree node of a directory entry."""
+        if entry[2] is None:
+            entry[2] = ImportTree(entry[1])
+        return entry[2]
+
+    def tree_set(self, root: ImportTree, path: bytes, mode: bytes, sha: str) -> None:
+        """Set a path to a blob, gitlink or (mode 040000) tree, creating directories as needed."""
+        node = root
+        parts = path.split(b"/")
+        for name in parts[:-1]:
+            entries = self.tree_load(node)
+            node.sha = None
+            entry = entries.get(name)
+            if entry is None or not entry[0].startswith(b"04"):
+                entry = entries[name] = [b"040000", None, ImportTree(entries={})]
+            node = self.tree_child(entry)
+            entry[1] = None
+        self.tree_load(node)[parts[-1]] = [mode, sha, None]
+        node.sha = None
+
+    def tree_get(self, root: ImportTree, path: bytes) -> Optional[Tuple[bytes, str]]:
+        """Return the (mode, OID) of a path, or None if it does not exist."""
+        node = root
+        parts = path.split(b"/")
+        for name in parts[:-1]:
+            entry = self.tree_load(node).get(name)
+            if entry is None or not entry[0].startswith(b"04"):
+                return None
+            node = self.tree_child(entry)
+        entry = self.tree_load(node).get(parts[-1])
+        if entry is None:
+            return None
+        if entry[1] is None:
+            entry[1] = self.tree_write(entry[2])
+        return entry[0], entry[1]
+
+    def tree_delete(self, root: ImportTree, path: bytes) -> None:
+        """Remove a path, pruning directories left empty."""
+        node = root
+        parts = path.split(b"/")
+        stack = []
+        for name in parts[:-1]:
+            entry = self.tree_load(node).get(name)
+            if entry is None or not entry[0].startswith(b"04"):
+                return
+            stack.append((node, name))
+            node = self.tree_child(entry)
+        entries = self.tree_load(node)
+        if parts[-1] not in entries:
+            return
+        del entries[parts[-1]]
+        node.sha = None
+        for parent, name in reversed(stack):
+            parent.sha = None
+            entry = parent.entries[name]
+            entry[1] = None
+            if not self.tree_load(entry[2]):
+                del parent.entries[name]
+
+    def tree_write(self, node: ImportTree) -> str:
+        """Write the changed parts of a tree and return its OID."""
+        if node.sha is not None:
+            return node.sha
+        rows = []
+        for name, entry in self.tree_load(node).items():
+            if entry[1] is None:
+                entry[1] = self.tree_write(entry[2])
+            rows.append((name + b"/" if entry[0].startswith(b"04") else name, name, entry))
+        rows.sort(key=lambda row: row[0])
+        data = b"".join(entry[0] + b" " + name + b"\x00" + bytes.fromhex(entry[1]) for _, name, entry in rows)
+        node.sha = self.write(b"tree", data)
+        return node.sha
+
+    def read_mark(self, stream: ImportStream) -> Tuple[Optional[int], Optional[bytes]]:
+        """Read an optional `mark` and `original-oid` line; return the mark and the next line."""
+        line = stream.readline()
+        mark = None
+        if line is not None and line.startswith(b"mark :"):
+            mark = int(line[6:])
+            line = stream.readline()
+        if line is not None and line.startswith(b"original-oid "):
+            line = stream.readline()
+        return mark, line
+
+    def end_command(self, stream: ImportStream, line: Optional[bytes]) -> None:
+        """Consume the optional blank line ending a command, or push back the next command."""
+        if line is not None and line != b"":
+            stream.unread(line)
+
+    def import_blob(self, stream: ImportStream) -> None:
+        mark, line = self.read_mark(stream)
+        sha = self.write(b"blob", stream.data(line))
+        if mark is not None:
+            self.marks[mark] = sha
+
+    def import_commit(self, stream: ImportStream, ref: str) -> None:
+        mark, line = self.read_mark(stream)
+        author = None
+        if line is not None and line.startswith(b"author "):
+            author = line[7:]
+            line = stream.readline()
+        if line is None or not line.startswith(b"committer "):
+            raise Exception(f"fast-import: expected committer in commit {ref}")
+        committer = line[10:]
+        line = stream.readline()
+        encoding = None
+        if line is not None and line.startswith(b"encoding "):
+            encoding = line[9:]
+            line = stream.readline()
+        message = stream.data(line)
+
+        branch = self.branch(ref)
+        line = stream.readline()
+        if line is not None and line.startswith(b"from "):
+            start = self.resolve(line[5:])
+            if start != branch.tip:
+                branch.tip = start
+                branch.tree = ImportTree(self.commit_tree(start))
+            line = stream.readline()
+        parents = [branch.tip] if branch.tip else []
+        while line is not None and line.startswith(b"merge "):
+            parents.append(self.resolve(line[6:]))
+            line = stream.readline()
+
+        tree = branch.tree
+        while line is not None and line != b"":
+            if line.startswith(b"M "):
+                mode, dataref, path = line[2:].split(b" ", 2)
+                if mode not in FAST_IMPORT_MODES:
+                    raise Exception(f"fast-import: invalid mode {mode.decode()} in {ref}")
+                if dataref == b"inline":
+                    sha = self.write(b"blob", stream.data(stream.readline()))
+                else:
+                    sha = self.resolve(dataref)
+                self.tree_set(tree, path_unquote(path), FAST_IMPORT_MODES[mode], sha)
+            elif line.startswith(b"D "):
+                self.tree_delete(tree, path_unquote(line[2:]))
+            elif line.startswith(b"C ") or line.startswith(b"R "):
+                source, dest = path_split(line[2:])
+                found = self.tree_get(tree, source)
+                if found is None:
+                    raise Exception(f"fast-import: path {source.decode()} not in branch {ref}")
+                if line.startswith(b"R "):
+                    self.tree_delete(tree, source)
+                self.tree_set(tree, dest, found[0], found[1])
+            elif line == b"deleteall":
+                tree = branch.tree = ImportTree(entries={})
+            elif line.startswith(b"N "):
+                raise Exception("fast-import: notes are not supported")
+            else:
+                break
+            line = stream.readline()
+        self.end_command(stream, line)
+
+        lines = [b"tree " + self.tree_write(tree).encode("ascii")]
+        lines += [b"parent " + p.encode("ascii") for p in parents]
+        lines.append(b"author " + (author if author is not None else committer))
+        lines.append(b"committer " + committer)
+        if encoding is not None:
+            lines.append(b"encoding " + encoding)
+        sha = self.write(b"commit", b"\n".join(lines) + b"\n\n" + message)
+        self.commit_trees[sha] = tree.sha
+        branch.tip = sha
+        if mark is not None:
+            self.marks[mark] = sha
+
+    def import_tag(self, stream: ImportStream, name: str) -> None:
+        from ..utils.hashing import object_read_head
+
+        mark, line = self.read_mark(stream)
+        if line is None or not line.startswith(b"from "):
+            raise Exception(f"fast-import: expected from in tag {name}")
+        target = self.resolve(line[5:])
+        mark_line, line = self.read_mark(stream)
+        mark = mark if mark is not None else mark_line
+        tagger = None
+        if line is not None and line.startswith(b"tagger "):
+            tagger = line[7:]
+            line = stream.readline()
+        message = stream.data(line)
+
+        fmt = b"commit" if target in self.commit_trees else object_read_head(self.repo, target)[0]
+        lines = [b"object " + target.encode("ascii"), b"type " + fmt, b"tag " + name.encode("utf-8")]
+        if tagger is not None:
+            lines.append(b"tagger " + tagger)
+        sha = self.write(b"tag", b"\n".join(lines) + b"\n\n" + message)
+        self.tags["refs/tags/" + name] = sha
+        if mark is not None:
+            self.marks[mark] = sha
+
+    def import_reset(self, stream: ImportStream, ref: str) -> None:
+        line = stream.readline()
+        if line is not None and line.startswith(b"from "):
+            tip = self.resolve(line[5:])
+            self.branches[ref] = ImportBranch(tip, ImportTree(self.commit_tree(tip)))
+            line = stream.readline()
+        else:
+            self.branches[ref] = ImportBranch(None, ImportTree(entries={}))
+        self.end_command(stream, line)
+
+    def run(self, fd: BinaryIO) -> None:
+        """
+        Import every command of the stream read from `fd`.
+
+        Raises:
+            Exception: On malformed or unsupported input.
+        """
+        stream = ImportStream(fd)
+        while True:
+            line = stream.readline()
+            if line is None or line == b"done":
+                break
+            if line == b"" or line.startswith(b"#"):
+                continue
+            command, _, arg = line.partition(b" ")
+            if command == b"blob":
+                self.import_blob(stream)
+            elif command == b"commit":
+                self.import_commit(stream, self.ref_name(arg.decode("utf-8")))
+            elif command == b"tag":
+                self.import_tag(stream, arg.decode("utf-8"))
+            elif command == b"reset":
+                self.import_reset(stream, self.ref_name(arg.decode("utf-8")))
+            elif command == b"checkpoint":
+                self.refs_update()
+            elif command == b"progress":
+                print(arg.decode("utf-8", errors="replace"))
+            elif command in (b"feature", b"option"):
+                continue
+            else:
+                raise Exception(f"fast-import: unsupported command {line.decode('utf-8', errors='replace')!r}")
+        self.refs_update()
+
+    def refs_update(self) -> List[str]:
+        """
+        Point the refs of all imported branches and tags at their new values.
+
+        A branch that would lose commits (its current value is not an
+        ancestor of the imported tip) is left alone unless `force` is set.
+
+        Returns:
+            Refs that were skipped.
+        """
+        from ..core.refs import RefTransaction, ref_resolve
+        from .merge_base import is_ancestor
+
+        tx = RefTransaction(self.repo)
+        skipped = []
+        cache: Dict[str, Any] = {}
+        # An annotated tag replaces commits made on the same ref (as fast-export writes them)
+        wanted = {ref: branch.tip for ref, branch in self.branches.items() if branch.tip}
+        wanted.update(self.tags)
+        for ref, sha in wanted.items():
+            current = ref_resolve(self.repo, ref)
+            if current == sha:
+                continue
+            if current and ref.startswith("refs/heads/") and not self.force and \
+                    not is_ancestor(self.repo, current, sha, cache):
+                print(f"warning: not updating {ref} (new tip {sha} does not contain {current})")
+                skipped.append(ref)
+                continue
+            tx.update(ref, sha, old_sha=current, deref=False, message="fast-import")
+        tx.commit()
+        return skipped
+
+    def marks_read(self, path: str) -> None:
+        """Load marks saved by --export-marks."""
+        with open(path) as f:
+            for line in f:
+                mark, sha = line.split()
+                self.marks[int(mark[1:])] = sha
+
+    def marks_write(self, path: str) -> None:
+        """Save the marks table as `:<mark> <sha>` lines."""
+        with open(path, "w") as f:
+            for mark in sorted(self.marks):
+                f.write(f":{mark} {self.marks[mark]}\n")
+
+
+def cmd_fast_import(args: "Namespace") -> None:
+    """
+    Handle the 'fast-import' command: read a git fast-import stream from
+    stdin and write its blobs, trees, commits, tags and refs.
+
+    Args:
+        args: Command-line arguments with 'force', 'import_marks' and
+              'export_marks'.
+
+    Raises:
+        Exception: On malformed or unsupported input.
+    """
+    import sys
+    from ..utils.file_io import repo_find
+
+    repo = repo_find()
+    importer = FastImport(repo, force=args.force)
+    if args.import_marks and os.path.exists(args.import_marks):
+        importer.marks_read(args.import_marks)
+    try:
+        importer.run(sys.stdin.buffer)
+    finally:
+        if args.export_marks:
+            importer.marks_write(args.export_marks)
+
+    stats = importer.stats
+    print(f"fast-import: {stats[b'blob']} blobs, {stats[b'tree']} trees, {stats[b'commit']} commits, "
+          f"{stats[b'tag']} tags ({importer.duplicates} duplicates), {len(importer.marks)} marks",
+          file=sys.stderr)
@@ -1,4 +1,19 @@
-from typing import Set, Union
+import os
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+
+def graphviz_node(sha: str, commit: "GitCommit") -> str:
+    """Render the Graphviz node of a commit, labelled with its subject."""
+    if None in commit.kvlm:
+        message = commit.kvlm[None].decode("utf-8", errors="replace").strip()
+        message = message.replace('\\', '\\\\').replace('"', '\\"')
+        if '\n' in message:
+            message = message[:message.index('\n')]
+    else:
+        message = "No message"
+
+    short_sha = sha[:7] if sha else "unknown"
+    return f'  "c_{sha}" [label="{short_sha}: {message}"]'
 
 
 def log_graphviz(repo: "GitRepository", sha: str, seen: Set[str]) -> None:
@@ -21,16 +36,7 @@ def log_graphviz(repo: "GitRepository", sha: str, seen: Set[str]) -> None:
         print(f"  // Error reading commit {sha}: {e}")
         return
 
-    if None in commit.kvlm:
-        message = commit.kvlm[None].decode("utf-8", errors="replace").strip()
-        message = message.replace('\\', '\\\\').replace('"', '\\"')
-        if '\n' in message:
-            message = message[:message.index('\n')]
-    else:
-        message = "No message"
-
-    short_sha = sha[:7] if sha else "unknown"
-    print(f'  "c_{sha}" [label="{short_sha}: {message}"]')
+    print(graphviz_node(sha, commit))
 
     if commit.fmt != b'commit':
         print(f"  // Object {sha} is not a commit")
@@ -49,12 +55,223 @@ def log_graphviz(repo: "GitRepository", sha: str, seen: Set[str]) -> None:
         log_graphviz(repo, p_str, seen)
 
 
+def tree_child(repo: "GitRepository", tree: Optional[str], name: str,
+               trees: Dict[str, Dict[str, Tuple[str, str]]], subtree: bool = False) -> Optional[str]:
+    """
+    Look up one entry of a tree.
+
+    Args:
+        repo: The repository object.
+        tree: SHA-1 of the tree, or None.
+        name: Entry name.
+        trees: Cache of parsed trees (SHA -> {name: (mode, sha)}).
+        subtree: Only accept the entry if it is itself a tree.
+
+    Returns:
+        SHA-1 of the entry, or None if it is absent (or not a tree when
+        `subtree` is set).
+    """
+    from ..utils.hashing import object_read
+
+    if tree is None:
+        return None
+    entries = trees.get(tree)
+    if entries is None:
+        entries = trees[tree] = {}
+        for leaf in object_read(repo, tree).items:
+            mode = leaf.mode.decode("ascii") if isinstance(leaf.mode, bytes) else leaf.mode
+            entries[leaf.path] = (mode.rjust(6, "0"), leaf.sha)
+    mode, sha = entries.get(name, ("", None))
+    if subtree and not mode.startswith("04"):
+        return None
+    return sha
+
+
+def paths_treesame(repo: "GitRepository", old_tree: Optional[str], new_tree: Optional[str],
+                   paths: List[List[str]], trees: Dict[str, Dict[str, Tuple[str, str]]]) -> bool:
+    """
+    Check whether two trees agree on every given path (are "TREESAME").
+
+    Only the trees along each path are read, and a path stops being
+    followed as soon as both sides hold the same OID at some level, so
+    untouched subtrees are never inflated.
+
+    Args:
+        repo: The repository object.
+        old_tree: SHA-1 of one root tree (None for an empty tree).
+        new_tree: SHA-1 of the other root tree.
+        paths: Pathspecs split into components.
+        trees: Cache of parsed trees shared across calls.
+
+    Returns:
+        True if no path differs between the trees.
+    """
+    for parts in paths:
+        a, b = old_tree, new_tree
+        for depth, name in enumerate(parts):
+            if a == b:
+                break
+            inner = depth + 1 < len(parts)
+            a = tree_child(repo, a, name, trees, subtree=inner)
+            b = tree_child(repo, b, name, trees, subtree=inner)
+        if a != b:
+            return False
+    return True
+
+
+def log_walk(
+    repo: "GitRepository",
+    sha: str,
+    cache: Optional[Dict[str, Any]] = None,
+    paths: Optional[List[str]] = None,
+    followed: Optional[Dict[str, List[str]]] = None,
+) -> Iterator["GitCommitView"]:
+    """
+    Walk the history reachable from a commit, newest committer date first.
+
+    With `paths`, only commits that change one of the paths are yielded,
+    using git's default history simplification: a commit that is TREESAME
+    to a parent (its tree agrees with that parent's on every path) is
+    hidden, and for merges only that parent is followed, so side branches
+    that did not contribute to the paths are never walked.
+
+    Commits covered by the changed-path Bloom filters (`sgit commit-graph
+    write`) whose filter rules out every path are treated as TREESAME to
+    their first parent without reading any tree.
+
+    Args:
+        repo: The repository object.
+        sha: SHA-1 of the starting commit.
+        cache: Optional commit view cache shared with other walks.
+        paths: Optional pathspecs (paths relative to the worktree root).
+        followed: If given, filled with the parents followed from each
+                  visited commit (after simplification), by commit SHA.
+
+    Yields:
+        GitCommitView objects, each commit at most once.
+    """
+    import heapq
+    from ..core.objects.commit import commit_view_read
+    from ..utils.bloom import bloom_read
+
+    if cache is None:
+        cache = {}
+    split = [[p for p in path.split("/") if p not in ("", ".")] for path in paths or []]
+    trees: Dict[str, Dict[str, Tuple[str, str]]] = {}
+    blooms = bloom_read(repo) if split else None
+
+    start = commit_view_read(repo, sha, cache)
+    queue = [(-start.committer_time, start.sha)]
+    seen = {start.sha}
+    while queue:
+        _, current = heapq.heappop(queue)
+        view = commit_view_read(repo, current, cache)
+        parents = view.parents
+
+        bloom = blooms.lookup(view.sha) if blooms is not None else None
+        if bloom is not None and not any(bloom.maybe_changed(parts) for parts in split):
+            parents = parents[:1]
+        elif split:
+            if not parents:
+                if not paths_treesame(repo, None, view.tree, split, trees):
+                    yield view
+            else:
+                same = [p for p in parents
+                        if paths_treesame(repo, commit_view_read(repo, p, cache).tree, view.tree, split, trees)]
+                if same:
+                    parents = same[:1]
+                else:
+                    yield view
+        else:
+            yield view
+
+        if followed is not None:
+            followed[view.sha] = list(parents)
+        for parent in parents:
+            if parent not in seen:
+                seen.add(parent)
+                heapq.heappush(queue, (-commit_view_read(repo, parent, cache).committer_time, parent))
+
+
+def log_graphviz_paths(repo: "GitRepository", sha: str, paths: List[str]) -> None:
+    """
+    Print the commits that change `paths` in Graphviz DOT format.
+
+    Commits are selected by `log_walk`, and each edge leads to the nearest
+    shown ancestors along the followed (simplified) parents, as git
+    rewrites parents for `log --graph -- <path>`.
+
+    Args:
+        repo: The repository object.
+        sha: SHA-1 of the starting commit.
+        paths: Only show commits that change these paths.
+    """
+    from ..utils.hashing import object_read
+
+    followed: Dict[str, List[str]] = {}
+    shown = [view.sha for view in log_walk(repo, sha, paths=paths, followed=followed)]
+    shown_set = set(shown)
+
+    # Shown commits reached from each visited commit through hidden ones
+    reach: Dict[str, List[str]] = {}
+    for commit in followed:
+        stack = [commit]
+        while stack:
+            top = stack[-1]
+            if top in reach:
+                stack.pop()
+                continue
+            pending = [p for p in followed[top] if p not in shown_set and p not in reach]
+            if pending:
+                stack.extend(pending)
+                continue
+            targets: List[str] = []
+            for parent in followed[top]:
+                for target in [parent] if parent in shown_set else reach[parent]:
+                    if target not in targets:
+                        targets.append(target)
+            reach[top] = targets
+            stack.pop()
+
+    for commit in shown:
+        print(graphviz_node(commit, object_read(repo, commit)))
+        for target in reach[commit]:
+            print(f'  "c_{commit}" -> "c_{target}"')
+
+
+def log_oneline(repo: "GitRepository", sha: str, abbrev: int, max_count: Optional[int] = None,
+                paths: Optional[List[str]] = None) -> None:
+    """
+    Print one line per commit: the shortest unique abbreviated SHA and subject.
+
+    Args:
+        repo: The repository object.
+        sha: SHA-1 of the starting commit.
+        abbrev: Minimum length of the abbreviated SHA.
+        max_count: Stop after this many commits.
+        paths: Only show commits that change these paths.
+    """
+    from itertools import islice
+    from ..utils.hashing import object_read_raw
+    from ..utils.kvlm import kvlm_parse
+    from ..utils.oid_table import oid_table
+
+    table = oid_table(repo)
+    for view in islice(log_walk(repo, sha, paths=paths), max_count):
+        message = kvlm_parse(object_read_raw(repo, view.sha)[1]).get(None, b'')
+        subject = message.decode("utf-8", errors="replace").strip().split("\n", 1)[0]
+        print(f"{table.abbreviate(view.sha, abbrev)} {subject}")
+
+
 def cmd_log(args: "Namespace") -> None:
     """
-    Display the commit history of the repository in Graphviz DOT format.
+    Display the commit history of the repository in Graphviz DOT format,
+    or one line per commit with --oneline. Paths after "--" limit either
+    output to the commits that change them.
 
     Args:
-        args: Command-line arguments containing the 'commit' attribute.
+        args: Command-line arguments containing the 'commit', 'oneline',
+              'abbrev', 'max_count' and 'pathspec' attributes.
     """
     from ..utils.file_io import repo_find
     from ..utils.hashing import object_find
@@ -66,7 +283,15 @@ def cmd_log(args: "Namespace") -> None:
         print("No commits yet in this repository")
         return
 
+    paths = [os.path.relpath(os.path.abspath(p), repo.worktree) for p in getattr(args, "pathspec", [])]
+    if getattr(args, "oneline", False):
+        log_oneline(repo, commit_sha, args.abbrev, args.max_count, paths)
+        return
+
     print("digraph sgitlog {")
     print("  node [shape=rect]")
-    log_graphviz(repo, commit_sha, set())
+    if paths:
+        log_graphviz_paths(repo, commit_sha, paths)
+    else:
+        log_graphviz(repo, commit_sha, set())
     print("}")
@@ -0,0 +1,390 @@
+import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# (tree mode, SHA-1) of one tree entry
+MergeEntry = Tuple[str, str]
+
+
+class MergeConflict(NamedTuple):
+    """A path the three-way merge could not resolve."""
+
+    path: str
+    kind: str  # "content", "add/add", "modify/delete", "mode" or "file/directory"
+    base: Optional[MergeEntry]  # index stage 1
+    ours: Optional[MergeEntry]  # index stage 2
+    theirs: Optional[MergeEntry]  # index stage 3
+
+
+class MergeResult(NamedTuple):
+    """Outcome of `merge_trees`."""
+
+    tree: str  # merged tree (conflicted files hold conflict markers)
+    conflicts: List[MergeConflict]
+
+
+class TreeMerger:
+    """
+    Three-way merge of trees, done entirely in the object store.
+
+    Whenever two of the three sides of an entry agree, the result is taken
+    by OID without being read, so only subtrees changed on both sides are
+    ever descended into. Files changed on both sides get a line-level
+    merge; the merged blobs and trees are written to the object database,
+    but the worktree and index are never touched.
+
+    The parsed-tree cache can be shared between mergers (e.g. when
+    test-merging many branches into the same target).
+    """
+
+    def __init__(
+        self,
+        repo: "GitRepository",
+        labels: Tuple[str, str] = ("ours", "theirs"),
+        cache: Optional[Dict[str, Dict[str, MergeEntry]]] = None,
+        algorithm: str = "myers",
+    ) -> None:
+        self.repo = repo
+        self.labels = labels
+        self.cache = cache if cache is not None else {}
+        self.algorithm = algorithm
+        self.conflicts: List[MergeConflict] = []
+
+    def entries(self, sha: Optional[str]) -> Dict[str, MergeEntry]:
+        """Return the entries of a tree as name -> (mode, sha)."""
+        from ..utils.hashing import object_read
+
+        if sha is None:
+            return {}
+        entries = self.cache.get(sha)
+        if entries is None:
+            entries = self.cache[sha] = {}
+            for leaf in object_read(self.repo, sha).items:
+                mode = leaf.mode.decode("ascii") if isinstance(leaf.mode, bytes) else leaf.mode
+                entries[leaf.path] = (mode.rjust(6, "0"), leaf.sha)
+        return entries
+
+    def merge(self, base: Optional[str], ours: Optional[str], theirs: Optional[str]) -> MergeResult:
+        """
+        Merge three trees.
+
+        Args:
+            base: SHA-1 of the merge base tree (None for no common ancestor).
+            ours: SHA-1 of our tree.
+            theirs: SHA-1 of their tree.
+
+        Returns:
+            MergeResult with the merged tree and the unresolved paths.
+        """
+        from ..core.objects.tree import GitTree
+        from ..utils.hashing import object_write
+
+        self.conflicts = []
+        tree = self.merge_tree(base, ours, theirs, "") or object_write(GitTree(), self.repo)
+        return MergeResult(tree, sorted(self.conflicts, key=lambda c: c.path))
+
+    def merge_tree(self, base: Optional[str], ours: Optional[str], theirs: Optional[str],
+                   prefix: str) -> Optional[str]:
+        """Merge three (sub)trees; returns the merged tree, or None if it is empty."""
+        from ..core.objects.tree import GitTree, GitTreeLeaf
+        from ..utils.hashing import object_write
+
+        if ours == theirs or base == theirs:
+            return ours
+        if base == ours:
+            return theirs
+
+        b, o, t = self.entries(base), self.entries(ours), self.entries(theirs)
+        tree = GitTree()
+        for name in sorted(set(b) | set(o) | set(t)):
+            merged = self.merge_entry(prefix + name, b.get(name), o.get(name), t.get(name))
+            if merged is not None:
+                tree.items.append(GitTreeLeaf(mode=merged[0].encode("ascii"), path=name, sha=merged[1]))
+        if not tree.items:
+            return None
+        return object_write(tree, self.repo)
+
+    def merge_entry(self, path: str, base: Optional[MergeEntry], ours: Optional[MergeEntry],
+                    theirs: Optional[MergeEntry]) -> Optional[MergeEntry]:
+        """Merge one path; returns its merged entry, or None if it is deleted."""
+        if ours == theirs or base == theirs:
+            return ours
+        if base == ours:
+            return theirs
+
+        def is_tree(entry: Optional[MergeEntry]) -> bool:
+            return entry is not None and entry[0].startswith("04")
+
+        sides = (base, ours, theirs)
+        if any(is_tree(e) for e in sides):
+            if not all(e is None or is_tree(e) for e in sides):
+                # Keep the directory; the file side is left to the user
+                files = [None if is_tree(e) else e for e in sides]
+                self.conflicts.append(MergeConflict(path, "file/directory", *files))
+            trees = [e[1] if is_tree(e) else None for e in sides]
+            sha = self.merge_tree(*trees, path + "/")
+            return ("040000", sha) if sha else None
+
+        if ours is None or theirs is None:
+            self.conflicts.append(MergeConflict(path, "modify/delete", base, ours, theirs))
+            return ours or theirs
+
+        kind = None
+        base_mode = base[0] if base else None
+        if ours[0] == theirs[0] or base_mode == theirs[0]:
+            mode = ours[0]
+        elif base_mode == ours[0]:
+            mode = theirs[0]
+        else:
+            mode, kind = ours[0], "mode"
+
+        if ours[1] == theirs[1] or (base and base[1] == theirs[1]):
+            sha = ours[1]
+        elif base and base[1] == ours[1]:
+            sha = theirs[1]
+        else:
+            sha, conflicted = self.merge_blobs(base, ours, theirs)
+            if conflicted:
+                kind = "content" if base else "add/add"
+
+        if kind is not None:
+            self.conflicts.append(MergeConflict(path, kind, base, ours, theirs))
+        return mode, sha
+
+    def merge_blobs(self, base: Optional[MergeEntry], ours: MergeEntry, theirs: MergeEntry) -> Tuple[str, bool]:
+        """
+        Line-merge two versions of a file.
+
+        Symlinks, submodules and binary files cannot be merged; our version
+        is kept and the path is reported as conflicted.
+
+        Returns:
+            Tuple of (SHA-1 of the merged blob, whether it has conflicts).
+        """
+        from ..core.objects.blob import GitBlob
+        from ..utils.diff import is_binary, lines_split
+        from ..utils.hashing import object_read_raw, object_write
+        from ..utils.merge3 import merge_lines
+
+        if not all(e is None or e[0] in ("100644", "100755") for e in (base, ours, theirs)):
+            return ours[1], True
+        data = [object_read_raw(self.repo, e[1])[1] if e else b'' for e in (base, ours, theirs)]
+        if any(is_binary(d) for d in data):
+            return ours[1], True
+
+        merged, conflicts = merge_lines(*(lines_split(d) if d else [] for d in data), *self.labels,
+                                        algorithm=self.algorithm)
+        return object_write(GitBlob(merged), self.repo), conflicts > 0
+
+
+def merge_trees(
+    repo: "GitRepository",
+    base: Optional[str],
+    ours: Optional[str],
+    theirs: Optional[str],
+    labels: Tuple[str, str] = ("ours", "theirs"),
+    cache: Optional[Dict[str, Dict[str, MergeEntry]]] = None,
+) -> MergeResult:
+    """
+    Three-way merge trees in memory (see TreeMerger).
+
+    Args:
+        repo: The repository object.
+        base: SHA-1 of the merge base tree, or None.
+        ours: SHA-1 of our tree.
+        theirs: SHA-1 of their tree.
+        labels: Names used in conflict markers.
+        cache: Optional parsed-tree cache shared between merges.
+
+    Returns:
+        MergeResult with the merged tree and the conflicts.
+    """
+    algorithm = "myers"
+    if repo.conf is not None:
+        algorithm = repo.conf.get("diff", "algorithm", fallback=None) or algorithm
+    return TreeMerger(repo, labels, cache, algorithm).merge(base, ours, theirs)
+
+
+def merge_commits(
+    repo: "GitRepository",
+    ours: str,
+    theirs: str,
+    labels: Tuple[str, str] = ("ours", "theirs"),
+    cache: Optional[Dict[str, Any]] = None,
+) -> MergeResult:
+    """
+    Merge two commits' trees over their merge base.
+
+    With several merge bases (criss-cross history) the newest one is used.
+
+    Args:
+        repo: The repository object.
+        ours: SHA-1 of our commit.
+        theirs: SHA-1 of their commit.
+        labels: Names used in conflict markers.
+        cache: Optional commit view cache shared between walks.
+
+    Returns:
+        MergeResult with the merged tree and the conflicts.
+    """
+    from ..core.objects.commit import commit_view_read
+    from .merge_base import merge_bases
+
+    if cache is None:
+        cache = {}
+    bases = merge_bases(repo, ours, [theirs], cache)
+    base_tree = commit_view_read(repo, bases[0], cache).tree if bases else None
+    return merge_trees(repo, base_tree, commit_view_read(repo, ours, cache).tree,
+                       commit_view_read(repo, theirs, cache).tree, labels)
+
+
+def merge_index_apply(repo: "GitRepository", head: str, result: MergeResult) -> None:
+    """
+    Check a merge result out: update the worktree and index from HEAD's
+    tree to the merged tree, then replace each conflicted path by its
+    index stages 1 (base), 2 (ours) and 3 (theirs).
+
+    Only paths that differ between HEAD and the merged tree are written.
+
+    Raises:
+        Exception: If the index has staged changes, or local changes to a
+                   path the merge touches would be overwritten.
+    """
+    from ..core.index import GitIndexEntry, index_expand, index_read, index_write, tree_mode_to_index
+    from ..core.objects.commit import commit_view_read
+    from ..utils.sparse import sparse_read
+    from .checkout import tree_changes, worktree_update
+    from .commit import tree_from_index
+
+    head_tree = commit_view_read(repo, head).tree
+    index = index_read(repo)
+    index_expand(repo, index)
+    if any(e.flag_stage for e in index.entries) or tree_from_index(repo, index, trees={}) != head_tree:
+        raise Exception("Your index contains uncommitted changes; commit them before merging.")
+
+    worktree_update(repo, index, tree_changes(repo, head_tree, result.tree), cone=sparse_read(repo))
+
+    conflicted = {c.path for c in result.conflicts}
+    entries = [e for e in index.entries if e.name not in conflicted]
+    for conflict in result.conflicts:
+        for stage, side in enumerate((conflict.base, conflict.ours, conflict.theirs), 1):
+            if side is None:
+                continue
+            mode_type, mode_perms = tree_mode_to_index(side[0].encode("ascii"))
+            entries.append(GitIndexEntry(
+                ctime=(0, 0), mtime=(0, 0), dev=0, ino=0, mode_type=mode_type, mode_perms=mode_perms,
+                uid=0, gid=0, fsize=0, sha=side[1], flag_assume_valid=False, flag_stage=stage << 12,
+                name=conflict.path,
+            ))
+    index.entries = sorted(entries, key=lambda e: (e.name, e.flag_stage))
+    index_write(repo, index)
+
+
+def merge_state_path(repo: "GitRepository", name: str) -> str:
+    """Return the path of a merge state file (MERGE_HEAD or MERGE_MSG)."""
+    return os.path.join(repo.gitdir, name)
+
+
+def cmd_merge(args: "Namespace") -> None:
+    """
+    Handle the 'merge' command: merge a commit into the current branch.
+
+    Fast-forwards when possible. Otherwise the trees are merged in memory
+    and the result checked out; a clean result is committed, while
+    conflicts are left in the worktree and index with MERGE_HEAD recorded
+    for the next `sgit commit`.
+
+    Args:
+        args: Command-line arguments with 'commit', 'message' and 'no_ff'.
+
+    Raises:
+        Exception: If the commit is unknown or the merge cannot start.
+    """
+    import sys
+    from datetime import datetime
+    from ..core.refs import ref_resolve, ref_update
+    from ..utils.config import gitconfig_read, gitconfig_user_get
+    from ..utils.file_io import repo_find
+    from ..utils.hashing import object_find
+    from .checkout import worktree_move
+    from .commit import commit_create
+    from .merge_base import merge_bases
+
+    repo = repo_find()
+    if os.path.exists(merge_state_path(repo, "MERGE_HEAD")):
+        raise Exception("You have not concluded your merge (MERGE_HEAD exists).")
+    head = ref_resolve(repo, "HEAD")
+    theirs = object_find(repo, args.commit, fmt=b'commit')
+    if theirs is None:
+        raise Exception(f"merge: {args.commit} - not something we can merge")
+    if head is None:
+        raise Exception("Cannot merge into an unborn branch")
+
+    cache: Dict[str, Any] = {}
+    bases = merge_bases(repo, head, [theirs], cache)
+    if theirs in bases:
+        print("Already up to date.")
+        return
+
+    if head in bases and not args.no_ff:
+        worktree_move(repo, head, theirs)
+        ref_update(repo, "HEAD", theirs, old_sha=head, message=f"merge {args.commit}: Fast-forward")
+        print(f"Updating {head[:7]}..{theirs[:7]}\nFast-forward")
+        return
+
+    result = merge_commits(repo, head, theirs, ("HEAD", args.commit), cache)
+    merge_index_apply(repo, head, result)
+
+    message = args.message or f"Merge {args.commit}"
+    for conflict in result.conflicts:
+        if conflict.kind == "modify/delete":
+            deleted = "HEAD" if conflict.ours is None else args.commit
+            print(f"CONFLICT (modify/delete): {conflict.path} deleted in {deleted}")
+        else:
+            print(f"CONFLICT ({conflict.kind}): Merge conflict in {conflict.path}")
+    if result.conflicts:
+        with open(merge_state_path(repo, "MERGE_HEAD"), "w") as f:
+            f.write(theirs + "\n")
+        with open(merge_state_path(repo, "MERGE_MSG"), "w") as f:
+            f.write(message + "\n")
+        print("Automatic merge failed; fix conflicts and then commit the result.")
+        sys.exit(1)
+
+    author = gitconfig_user_get(gitconfig_read()) or "Unknown User <unknown@example.com>"
+    commit_sha = commit_create(repo, result.tree, [head, theirs], author, datetime.now(), message)
+    ref_update(repo, "HEAD", commit_sha, old_sha=head,
+               message=f"merge {args.commit}: Merge made by the 'ort' strategy.")
+    print(f"Merge made by the 'ort' strategy.\n[{commit_sha[:7]}] {message}")
+
+
+def cmd_merge_tree(args: "Namespace") -> None:
+    """
+    Handle the 'merge-tree' command: merge two commits without touching
+    the worktree, index or refs, print the merged tree and any conflicts
+    (exit status 1 if there are conflicts).
+
+    Args:
+        args: Command-line arguments with 'ours', 'theirs' and 'name_only'.
+    """
+    import sys
+    from ..utils.file_io import repo_find
+    from ..utils.hashing import object_find
+
+    repo = repo_find()
+    shas = []
+    for name in (args.ours, args.theirs):
+        sha = object_find(repo, name, fmt=b'commit')
+        if sha is None:
+            raise Exception(f"Not a valid commit name: {name}")
+        shas.append(sha)
+
+    result = merge_commits(repo, shas[0], shas[1], (args.ours, args.theirs))
+    print(result.tree)
+    for conflict in result.conflicts:
+        if args.name_only:
+            print(conflict.path)
+            continue
+        for stage, side in enumerate((conflict.base, conflict.ours, conflict.theirs), 1):
+            if side is not None:
+                print(f"{side[0]} {side[1]} {stage}\t{conflict.path}")
+    if result.conflicts:
+        sys.exit(1)
@@ -0,0 +1,245 @@
+from typing import Any, Dict, List, Optional
+
+
+# Paint flags of the merge-base walk
+PARENT1 = 1
+PARENT2 = 2
+STALE = 4
+RESULT = 8
+
+# Clock skew tolerated when cutting an ancestry walk off by commit date (one day, as git)
+CUTOFF_DATE_SLOP = 86400
+
+
+def paint_down_to_common(repo: "GitRepository", one: str, twos: List[str],
+                         cache: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Find the common ancestors of `one` and any of `twos` that are not
+    ancestors of another common ancestor found first.
+
+    Commits are visited newest committer date first. Everything reachable
+    from `one` is painted PARENT1 and from `twos` PARENT2; a commit carrying
+    both is a candidate, and its ancestors are painted STALE. The walk stops
+    as soon as every queued commit is stale, so only the commits between the
+    tips and their merge bases are read.
+
+    Args:
+        repo: The repository object.
+        one: SHA-1 of the first commit.
+        twos: SHA-1s of the other commits.
+        cache: Optional commit view cache (parsed parents) shared between walks.
+
+    Returns:
+        Candidate merge bases, newest first. Some may still be redundant
+        (ancestors of others) when commit dates are skewed.
+    """
+    import heapq
+    from ..core.objects.commit import commit_view_read
+
+    if cache is None:
+        cache = {}
+    flags: Dict[str, int] = {}
+    queue = []
+
+    def push(sha: str, flag: int) -> None:
+        flags[sha] = flags.get(sha, 0) | flag
+        heapq.heappush(queue, (-commit_view_read(repo, sha, cache).committer_time, sha))
+
+    push(one, PARENT1)
+    for two in twos:
+        if two == one:
+            return [one]
+        push(two, PARENT2)
+
+    result = []
+    while any(not flags[sha] & STALE for _, sha in queue):
+        _, sha = heapq.heappop(queue)
+        paint = flags[sha] & (PARENT1 | PARENT2 | STALE)
+        if paint == PARENT1 | PARENT2:
+            if not flags[sha] & RESULT:
+                flags[sha] |= RESULT
+                result.append(sha)
+            paint |= STALE
+        for parent in commit_view_read(repo, sha, cache).parents:
+            if flags.get(parent, 0) & paint == paint:
+                continue
+            push(parent, paint)
+    return result
+
+
+def remove_redundant(repo: "GitRepository", candidates: List[str], cache: Optional[Dict[str, Any]] = None
+                     ) -> List[str]:
+    """Drop candidates that are ancestors of another candidate."""
+    if len(candidates) < 2:
+        return candidates
+    return [c for c in candidates
+            if not any(other != c and is_ancestor(repo, c, other, cache) for other in candidates)]
+
+
+def merge_bases(repo: "GitRepository", one: str, twos: List[str],
+                cache: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    Compute the best common ancestors of `one` and `twos` (`git merge-base --all`).
+
+    Args:
+        repo: The repository object.
+        one: SHA-1 of the first commit.
+        twos: SHA-1s of the other commits.
+        cache: Optional commit view cache shared between walks.
+
+    Returns:
+        The merge bases, newest first; empty if the histories are unrelated.
+    """
+    if cache is None:
+        cache = {}
+    return remove_redundant(repo, paint_down_to_common(repo, one, twos, cache), cache)
+
+
+def is_ancestor(repo: "GitRepository", ancestor: str, descendant: str,
+                cache: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Check whether `ancestor` is reachable from `descendant`.
+
+    The walk goes back from `descendant` only, newest commit first, and
+    gives up once every queued commit is older than `ancestor` (allowing
+    CUTOFF_DATE_SLOP of clock skew), so commits below `ancestor` are never
+    read.
+
+    Args:
+        repo: The repository object.
+        ancestor: SHA-1 of the candidate ancestor.
+        descendant: SHA-1 of the candidate descendant.
+        cache: Optional commit view cache shared between walks.
+
+    Returns:
+        True if `ancestor` is `descendant` or one of its ancestors.
+    """
+    import heapq
+    from ..core.objects.commit import commit_view_read
+
+    if cache is None:
+        cache = {}
+    if ancestor == descendant:
+        return True
+    cutoff = commit_view_read(repo, ancestor, cache).committer_time - CUTOFF_DATE_SLOP
+
+    start = commit_view_read(repo, descendant, cache)
+    queue = [(-start.committer_time, descendant)]
+    seen = {descendant}
+    while queue:
+        negative_time, sha = heapq.heappop(queue)
+        if -negative_time < cutoff:
+            break
+        for parent in commit_view_read(repo, sha, cache).parents:
+            if parent == ancestor:
+                return True
+            if parent not in seen:
+                seen.add(parent)
+                heapq.heappush(queue, (-commit_view_read(repo, parent, cache).committer_time, parent))
+    return False
+
+
+def commits_between(repo: "GitRepository", upstream: Optional[str], tip: str,
+                    cache: Optional[Dict[str, Any]] = None) -> List[str]:
+    """
+    List the commits reachable from `tip` but not from `upstream`
+    (`upstream..tip`), parents before children.
+
+    Both sides are walked together newest first, with everything reachable
+    from `upstream` painted uninteresting; the walk stops once only
+    uninteresting commits are queued, so shared history is not read.
+
+    Args:
+        repo: The repository object.
+        upstream: SHA-1 of the excluded commit, or None to list all history.
+        tip: SHA-1 of the included commit.
+        cache: Optional commit view cache shared between walks.
+
+    Returns:
+        Commit SHA-1s, oldest first.
+    """
+    import heapq
+    from ..core.objects.commit import commit_view_read
+
+    if cache is None:
+        cache = {}
+    uninteresting: Dict[str, bool] = {}
+    queue = []
+
+    def push(sha: str, excluded: bool) -> None:
+        if sha in uninteresting and (uninteresting[sha] or not excluded):
+            return
+        uninteresting[sha] = excluded
+        heapq.heappush(queue, (-commit_view_read(repo, sha, cache).committer_time, sha))
+
+    if upstream:
+        push(upstream, True)
+    push(tip, False)
+
+    included = []
+    while any(not uninteresting[sha] for _, sha in queue):
+        _, sha = heapq.heappop(queue)
+        excluded = uninteresting[sha]
+        if not excluded:
+            included.append(sha)
+        for parent in commit_view_read(repo, sha, cache).parents:
+            push(parent, excluded)
+
+    # Order parents before children, following first parents
+    wanted = {sha for sha in included if not uninteresting[sha]}
+    order: List[str] = []
+    done = set()
+    stack = [(tip, False)]
+    while stack:
+        sha, expanded = stack.pop()
+        if sha in done or sha not in wanted:
+            continue
+        if expanded:
+            done.add(sha)
+            order.append(sha)
+            continue
+        stack.append((sha, True))
+        for parent in reversed(commit_view_read(repo, sha, cache).parents):
+            stack.append((parent, False))
+    return order
+
+
+def cmd_merge_base(args: "Namespace") -> None:
+    """
+    Handle the 'merge-base' command: print the best common ancestor of two
+    or more commits, or test ancestry with --is-ancestor (exit status 0 if
+    the first commit is an ancestor of the second, 1 otherwise).
+
+    Args:
+        args: Command-line arguments with 'commits', 'all' and 'is_ancestor'.
+
+    Raises:
+        Exception: If a name does not resolve to a commit.
+    """
+    import sys
+    from ..utils.file_io import repo_find
+    from ..utils.hashing import object_find
+
+    repo = repo_find()
+    shas = []
+    for name in args.commits:
+        sha = object_find(repo, name, fmt=b'commit')
+        if sha is None:
+            raise Exception(f"Not a valid commit name: {name}")
+        shas.append(sha)
+
+    cache: Dict[str, Any] = {}
+    if args.is_ancestor:
+        if len(shas) != 2:
+            raise Exception("--is-ancestor takes exactly two commits")
+        if not is_ancestor(repo, shas[0], shas[1], cache):
+            sys.exit(1)
+        return
+
+    if len(shas) < 2:
+        raise Exception("merge-base takes at least two commits")
+    bases = merge_bases(repo, shas[0], shas[1:], cache)
+    if not bases:
+        sys.exit(1)
+    for sha in bases if args.all else bases[:1]:
+        print(sha)
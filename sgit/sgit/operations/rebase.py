@@ -0,0 +1,215 @@
+from typing import Any, Dict, List, NamedTuple, Optional
+
+
+class ReplayResult(NamedTuple):
+    """Outcome of `commits_replay`."""
+
+    head: str  # the last replayed commit (or `onto` if nothing was applied)
+    applied: List[str]  # new commits, oldest first
+    skipped: List[str]  # original commits whose changes were already present
+
+
+def commit_replay_create(repo: "GitRepository", original: str, tree: str, parent: str) -> str:
+    """
+    Write a copy of a commit with a new tree and parent.
+
+    Author and message are kept; the committer becomes the current user at
+    the current time.
+
+    Args:
+        repo: The repository object.
+        original: SHA-1 of the commit being replayed.
+        tree: SHA-1 of the new tree.
+        parent: SHA-1 of the new parent.
+
+    Returns:
+        SHA-1 of the new commit.
+    """
+    from ..core.objects.commit import GitCommit
+    from ..core.reflog import reflog_ident
+    from ..utils.hashing import object_read, object_write
+
+    kvlm = object_read(repo, original).kvlm
+    commit = GitCommit()
+    commit.kvlm[b"tree"] = tree.encode("ascii")
+    commit.kvlm[b"parent"] = parent.encode("ascii")
+    commit.kvlm[b"author"] = kvlm[b"author"]
+    commit.kvlm[b"committer"] = reflog_ident().encode("utf-8")
+    commit.kvlm[None] = kvlm.get(None, b"")
+    return object_write(commit, repo)
+
+
+def commits_replay(repo: "GitRepository", commits: List[str], onto: str,
+                   cache: Optional[Dict[str, Any]] = None, fast_forward: bool = False) -> ReplayResult:
+    """
+    Replay commits on top of `onto` without touching the worktree or index.
+
+    Each commit's change (its tree against its first parent) is applied
+    with an in-memory three-way tree merge, so only the new trees, blobs and
+    commits are written. Merge commits, and commits that become empty, are
+    dropped.
+
+    Args:
+        repo: The repository object.
+        commits: SHA-1s of the commits to replay, oldest first.
+        onto: SHA-1 of the commit to build on.
+        cache: Optional commit view cache shared between walks.
+        fast_forward: Reuse commits whose parent already is the new base
+                      instead of rewriting them.
+
+    Returns:
+        ReplayResult with the new tip.
+
+    Raises:
+        Exception: If a commit does not apply cleanly (nothing is updated).
+    """
+    from ..core.objects.commit import commit_view_read
+    from ..utils.oid_table import object_abbrev
+    from .merge import TreeMerger
+
+    if cache is None:
+        cache = {}
+    trees: Dict[str, Any] = {}
+    head = onto
+    applied: List[str] = []
+    skipped: List[str] = []
+    for sha in commits:
+        view = commit_view_read(repo, sha, cache)
+        if len(view.parents) > 1:
+            # Merge commits are dropped, as git rebase does by default
+            continue
+        if fast_forward and view.parents == [head]:
+            head = sha
+            continue
+        base = commit_view_read(repo, view.parents[0], cache).tree if view.parents else None
+        head_tree = commit_view_read(repo, head, cache).tree
+
+        result = TreeMerger(repo, ("HEAD", object_abbrev(repo, sha)), trees).merge(base, head_tree, view.tree)
+        if result.conflicts:
+            paths = ", ".join(c.path for c in result.conflicts)
+            raise Exception(f"could not apply {object_abbrev(repo, sha)}: conflict in {paths}")
+        if result.tree == head_tree:
+            skipped.append(sha)
+            continue
+        head = commit_replay_create(repo, sha, result.tree, head)
+        applied.append(head)
+    return ReplayResult(head, applied, skipped)
+
+
+def replay_update_ref(repo: "GitRepository", ref: str, old: str, new: str, message: str) -> None:
+    """
+    Point `ref` at a replayed tip.
+
+    If `ref` is what HEAD points at (or HEAD itself), the worktree and index
+    are first moved from the old tip to the new one, writing only the paths
+    that differ; any other branch is updated without touching the worktree.
+
+    Raises:
+        Exception: If local changes would be overwritten or `ref` moved
+                   concurrently.
+    """
+    from ..core.refs import ref_symbolic_target, ref_update
+    from .checkout import worktree_move
+
+    if ref == "HEAD" or ref == ref_symbolic_target(repo, "HEAD"):
+        worktree_move(repo, old, new)
+    ref_update(repo, ref, new, old_sha=old, message=message)
+
+
+def object_subject(repo: "GitRepository", sha: str) -> str:
+    """Return the first line of a commit message."""
+    from ..utils.hashing import object_read
+
+    message = object_read(repo, sha).kvlm.get(None, b"").decode("utf-8", errors="replace")
+    return message.strip().split("\n", 1)[0]
+
+
+def print_replay(repo: "GitRepository", result: ReplayResult) -> None:
+    """Print one line per replayed commit and per dropped one."""
+    from ..utils.oid_table import object_abbrev
+
+    for sha in result.applied:
+        print(f"[{object_abbrev(repo, sha)}] {object_subject(repo, sha)}")
+    for sha in result.skipped:
+        print(f"dropping {object_abbrev(repo, sha)} {object_subject(repo, sha)} -- patch contents already upstream")
+
+
+def cmd_cherry_pick(args: "Namespace") -> None:
+    """
+    Handle the 'cherry-pick' command: apply the changes of existing commits
+    on top of the current branch (or of `--branch`).
+
+    Args:
+        args: Command-line arguments with 'commits' and 'branch'.
+
+    Raises:
+        Exception: If a commit is unknown or does not apply cleanly.
+    """
+    from ..core.refs import ref_resolve
+    from ..core.revision import rev_parse_range
+    from ..utils.hashing import object_find
+    from ..utils.file_io import repo_find
+    from .merge_base import commits_between
+
+    repo = repo_find()
+    ref = "refs/heads/" + args.branch if args.branch else "HEAD"
+    tip = ref_resolve(repo, ref)
+    if tip is None:
+        raise Exception(f"Cannot cherry-pick onto {args.branch or 'an unborn HEAD'}")
+
+    cache: Dict[str, Any] = {}
+    commits: List[str] = []
+    for spec in args.commits:
+        if ".." in spec:
+            (new, _), (old, _) = rev_parse_range(repo, spec)
+            commits.extend(commits_between(repo, old, new, cache))
+            continue
+        sha = object_find(repo, spec, fmt=b'commit')
+        if sha is None:
+            raise Exception(f"bad revision '{spec}'")
+        commits.append(sha)
+
+    result = commits_replay(repo, commits, tip, cache)
+    if result.head != tip:
+        subject = object_subject(repo, result.head)
+        replay_update_ref(repo, ref, tip, result.head, f"cherry-pick: {subject}")
+    print_replay(repo, result)
+
+
+def cmd_rebase(args: "Namespace") -> None:
+    """
+    Handle the 'rebase' command: replay `upstream..branch` onto `--onto`
+    (default: `upstream`) and move the branch to the result.
+
+    The rebased branch need not be checked out; if it is, the worktree is
+    updated once at the end instead of once per commit.
+
+    Args:
+        args: Command-line arguments with 'upstream', 'branch' and 'onto'.
+
+    Raises:
+        Exception: If a name is unknown or a commit does not apply cleanly.
+    """
+    from ..core.refs import ref_resolve
+    from ..utils.hashing import object_find
+    from ..utils.file_io import repo_find
+    from .merge_base import commits_between
+
+    repo = repo_find()
+    ref = "refs/heads/" + args.branch if args.branch else "HEAD"
+    tip = ref_resolve(repo, ref)
+    if tip is None:
+        raise Exception(f"No such branch: {args.branch}" if args.branch else "Cannot rebase an unborn HEAD")
+    upstream = object_find(repo, args.upstream, fmt=b'commit')
+    onto = object_find(repo, args.onto, fmt=b'commit') if args.onto else upstream
+    if upstream is None or onto is None:
+        raise Exception(f"invalid upstream '{args.onto if upstream else args.upstream}'")
+
+    cache: Dict[str, Any] = {}
+    result = commits_replay(repo, commits_between(repo, upstream, tip, cache), onto, cache, fast_forward=True)
+    if result.head == tip:
+        print(f"Current branch {args.branch or 'HEAD'} is up to date.")
+        return
+    replay_update_ref(repo, ref, tip, result.head, f"rebase (finish): {args.branch or 'HEAD'} onto {onto}")
+    print_replay(repo, result)
+    print(f"Successfully rebased and updated {args.branch or 'HEAD'}.")
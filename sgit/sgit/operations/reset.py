@@ -0,0 +1,203 @@
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def index_reset(
+    repo: "GitRepository",
+    index: "GitIndex",
+    tree: str,
+    hard: bool = False,
+    jobs: Optional[int] = None,
+    cone: Optional["SparseCone"] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Make the index, and with `hard` the worktree, match a tree.
+
+    The index is hashed into in-memory trees and diffed against `tree`, so
+    only paths that differ are rebuilt; every other entry keeps its stat
+    data. Conflict stages are dropped. A rebuilt entry gets fresh stat data
+    when its worktree file already holds the target blob, and zero stat data
+    (forcing a rehash on the next status) otherwise.
+
+    Without `hard`, the kept entries are checked against the worktree as
+    well: files whose stat data is stale are rehashed, and those whose
+    contents differ are reported along with the rebuilt paths. With `hard`,
+    the differing paths are written or deleted, and so are tracked files
+    whose contents no longer match their entry. Untracked files are left
+    alone.
+
+    Args:
+        repo: The Git repository object.
+        index: The current index; its entries are replaced in place.
+        tree: SHA-1 of the target tree.
+        hard: Also reset the worktree.
+        jobs: Number of checkout worker threads.
+        cone: Optional sparse-checkout cone; paths outside it become
+              skip-worktree entries and are never written.
+
+    Returns:
+        (status, path) pairs for tracked paths whose worktree file differs
+        from the new entry ("M" modified, "D" deleted); empty with `hard`.
+
+    Raises:
+        Exception: If `hard` would have to replace a directory by a file.
+    """
+    from ..core.index import (
+        index_entry_from_stat,
+        index_entry_is_sparse_dir,
+        index_entry_stat_matches,
+        index_entry_tree_mode,
+        index_expand,
+        tree_mode_to_index,
+    )
+    from ..utils.hashing import object_hash
+    from .checkout import entries_checkout, worktree_remove_path
+    from .commit import tree_from_index
+    from .diff_tree import tree_diff
+
+    index_trees: Dict[str, Any] = {}
+    changes = list(tree_diff(repo, tree_from_index(repo, index, trees=index_trees), tree, trees=index_trees))
+    # Changes inside collapsed sparse directories need their file entries
+    index_expand(repo, index, [c.path for c in changes])
+
+    entries = {e.name: e for e in index.entries if not e.flag_stage}
+    unmerged = {e.name for e in index.entries if e.flag_stage}
+
+    # Conflicted paths are left out of the index tree, so the diff reports
+    # the ones present in `tree` as additions
+    removed = [c.path for c in changes if c.new_sha is None]
+    updated = [(c.path, c.new_sha, c.new_mode.encode("ascii")) for c in changes if c.new_sha is not None]
+    for rel in removed:
+        entries.pop(rel, None)
+    targets = {rel for rel, _, _ in updated}
+
+    def entry_for(rel: str, sha: str, mode: bytes, stat: Optional[os.stat_result]) -> "GitIndexEntry":
+        mode_type, mode_perms = tree_mode_to_index(mode)
+        entry = index_entry_from_stat(rel, sha, stat, mode_type, mode_perms)
+        if stat is None and (cone is None or cone.contains(rel)):
+            entry.flag_skip_worktree = False
+        return entry
+
+    unstaged: List[Tuple[str, str]] = []
+    if not hard:
+        for rel, sha, mode in updated:
+            full = os.path.join(repo.worktree, rel)
+            stat = None
+            if (cone is None or cone.contains(rel)) and os.path.isfile(full):
+                with open(full, "rb") as f:
+                    if object_hash(f, b"blob", None) == sha:
+                        stat = os.lstat(full)
+            if stat is None and (cone is None or cone.contains(rel)):
+                unstaged.append(("M" if os.path.lexists(full) else "D", rel))
+            entries[rel] = entry_for(rel, sha, mode, stat)
+
+        # Kept entries are reported too when their file has local changes
+        for name, e in entries.items():
+            if name in targets or e.flag_skip_worktree or index_entry_is_sparse_dir(e):
+                continue
+            full = os.path.join(repo.worktree, name)
+            if not os.path.lexists(full):
+                unstaged.append(("D", name))
+                continue
+            stat = os.lstat(full)
+            if index_entry_stat_matches(e, stat):
+                continue
+            if os.path.isfile(full):
+                with open(full, "rb") as f:
+                    if object_hash(f, b"blob", None) == e.sha:
+                        entries[name] = entry_for(name, e.sha, index_entry_tree_mode(e), stat)
+                        continue
+            unstaged.append(("M", name))
+    else:
+        for rel in removed + sorted(unmerged - targets):
+            if cone is None or cone.contains(rel):
+                worktree_remove_path(repo, rel)
+
+        # Tracked files with local changes are rewritten too
+        for name, e in entries.items():
+            if name in targets or e.flag_skip_worktree or index_entry_is_sparse_dir(e):
+                continue
+            full = os.path.join(repo.worktree, name)
+            if os.path.isfile(full):
+                stat = os.lstat(full)
+                if index_entry_stat_matches(e, stat):
+                    continue
+                with open(full, "rb") as f:
+                    if object_hash(f, b"blob", None) == e.sha:
+                        entries[name] = entry_for(name, e.sha, index_entry_tree_mode(e), stat)
+                        continue
+            updated.append((name, e.sha, index_entry_tree_mode(e)))
+
+        written = [u for u in updated if cone is None or cone.contains(u[0])]
+        for rel, sha, mode in updated:
+            if cone is not None and not cone.contains(rel):
+                entries[rel] = entry_for(rel, sha, mode, None)
+        for rel, _, _ in written:
+            full = os.path.join(repo.worktree, rel)
+            if os.path.isdir(full) and not os.path.islink(full):
+                raise Exception(f"Cannot overwrite directory {rel}")
+        entries_checkout(repo, written, repo.worktree, jobs=jobs)
+        for rel, sha, mode in written:
+            entries[rel] = entry_for(rel, sha, mode, os.lstat(os.path.join(repo.worktree, rel)))
+
+    index.entries = [entries[name] for name in sorted(entries)]
+    return sorted(unstaged, key=lambda item: item[1])
+
+
+def cmd_reset(args: "Namespace") -> None:
+    """
+    Handle the 'reset' command: point HEAD (and the branch it is on) at a
+    commit and, depending on the mode, reset the index and worktree too.
+
+    --soft only moves the ref; --mixed (the default) also rebuilds the index
+    from the commit's tree; --hard also makes the worktree match it. Index
+    and worktree updates touch only the paths that differ (see
+    `index_reset`).
+
+    Args:
+        args: Command-line arguments with 'commit' and 'mode'.
+
+    Raises:
+        Exception: If the commit cannot be resolved, or for --soft during a
+                   merge.
+    """
+    from ..core.index import GitIndex, index_collapse, index_read, index_write
+    from ..core.refs import ref_resolve, ref_update
+    from ..utils.file_io import repo_find
+    from ..utils.hashing import object_find
+    from ..utils.oid_table import object_abbrev
+    from ..utils.sparse import sparse_index_enabled, sparse_read
+    from .merge import merge_state_path
+    from .rebase import object_subject
+
+    repo = repo_find()
+    mode = args.mode or "mixed"
+    target = object_find(repo, args.commit, fmt=b'commit')
+    if target is None:
+        raise Exception(f"Failed to resolve '{args.commit}' as a valid revision.")
+    merging = os.path.exists(merge_state_path(repo, "MERGE_HEAD"))
+    if mode == "soft" and merging:
+        raise Exception("Cannot do a soft reset in the middle of a merge.")
+
+    unstaged: List[Tuple[str, str]] = []
+    if mode != "soft":
+        cone = sparse_read(repo)
+        index = index_read(repo) or GitIndex()
+        unstaged = index_reset(repo, index, object_find(repo, target, fmt=b'tree'), hard=mode == "hard", cone=cone)
+        if cone is not None and sparse_index_enabled(repo):
+            index_collapse(repo, index, cone)
+        index_write(repo, index)
+        for name in ("MERGE_HEAD", "MERGE_MSG"):
+            if os.path.exists(merge_state_path(repo, name)):
+                os.remove(merge_state_path(repo, name))
+
+    head = ref_resolve(repo, "HEAD")
+    if target != head:
+        ref_update(repo, "HEAD", target, old_sha=head, message=f"reset: moving to {args.commit}")
+
+    if mode == "hard":
+        print(f"HEAD is now at {object_abbrev(repo, target)} {object_subject(repo, target)}")
+    elif unstaged:
+        print("Unstaged changes after reset:")
+        for status, path in unstaged:
+            print(f"{status}\t{path}")
@@ -0,0 +1,109 @@
+import os
+from typing import List, Optional
+
+
+def sparse_apply(repo: "GitRepository", cone: Optional["SparseCone"]) -> List[str]:
+    """
+    Bring the worktree and index in line with a sparse-checkout cone.
+
+    Out-of-cone entries are deleted from the worktree and marked
+    skip-worktree; skip-worktree entries that are now in the cone are written
+    back from their index blobs. Files with local modifications are left in
+    place and reported. With index.sparse enabled, out-of-cone directories
+    are then collapsed into single tree entries.
+
+    Args:
+        repo: The Git repository object.
+        cone: The cone to apply, or None to restore the full worktree.
+
+    Returns:
+        Paths that were kept because they have local modifications.
+    """
+    from ..core.index import (
+        index_read,
+        index_write,
+        index_entry_from_stat,
+        index_entry_stat_matches,
+        index_entry_tree_mode,
+        index_expand,
+        index_collapse,
+    )
+    from ..utils.hashing import object_hash
+    from ..utils.sparse import sparse_index_enabled
+    from .checkout import entries_checkout, worktree_remove_path
+
+    index = index_read(repo)
+    index_expand(repo, index)
+    restore = []
+    kept = []
+
+    for pos, e in enumerate(index.entries):
+        if e.flag_stage:
+            continue
+        inside = cone is None or cone.contains(e.name)
+
+        if inside and e.flag_skip_worktree:
+            restore.append(pos)
+        elif not inside and not e.flag_skip_worktree:
+            full = os.path.join(repo.worktree, e.name)
+            if os.path.lexists(full) and not index_entry_stat_matches(e, os.lstat(full)):
+                with open(full, "rb") as f:
+                    if object_hash(f, b"blob", None) != e.sha:
+                        kept.append(e.name)
+                        continue
+            worktree_remove_path(repo, e.name)
+            e.flag_skip_worktree = True
+
+    entries_checkout(
+        repo,
+        [(index.entries[pos].name, index.entries[pos].sha, index_entry_tree_mode(index.entries[pos]))
+         for pos in restore],
+        repo.worktree,
+    )
+    for pos in restore:
+        e = index.entries[pos]
+        stat = os.lstat(os.path.join(repo.worktree, e.name))
+        index.entries[pos] = index_entry_from_stat(e.name, e.sha, stat, e.mode_type, e.mode_perms)
+
+    if cone is not None and sparse_index_enabled(repo):
+        index_collapse(repo, index, cone)
+    index_write(repo, index)
+    return kept
+
+
+def cmd_sparse_checkout(args: "Namespace") -> None:
+    """
+    Handle the 'sparse-checkout' command (set, add, list, disable).
+
+    Args:
+        args: Command-line arguments with 'action', 'dirs' and 'sparse_index'.
+
+    Raises:
+        Exception: For 'list' when the worktree is not sparse.
+    """
+    from ..utils.file_io import repo_find
+    from ..utils.sparse import SparseCone, sparse_read, sparse_write, sparse_config_set
+
+    repo = repo_find()
+    cone = sparse_read(repo)
+
+    if args.action == "list":
+        if cone is None:
+            raise Exception("this worktree is not sparse")
+        for d in sorted(cone.recursive):
+            print(d)
+        return
+
+    if args.action == "disable":
+        sparse_config_set(repo, False, sparse_index=False)
+        kept = sparse_apply(repo, None)
+    else:
+        if args.action == "set" or cone is None:
+            cone = SparseCone()
+        for d in getattr(args, "dirs", []):
+            cone.add(os.path.relpath(os.path.abspath(d), repo.worktree))
+        sparse_write(repo, cone, sparse_index=getattr(args, "sparse_index", None))
+        kept = sparse_apply(repo, cone)
+
+    for path in kept:
+        print(f"warning: {path} has local changes and was not removed")
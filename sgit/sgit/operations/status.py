@@ -1,5 +1,5 @@
 import os
-from typing import Dict
+from typing import Any, Dict
 
 
 def cmd_status(args) -> None:
@@ -14,10 +14,13 @@ def cmd_status(args) -> None:
         args: Command-line arguments (not used directly here).
     """
     from ..utils.file_io import repo_find
-    from ..core.index import index_read
+    from ..core.index import index_read, index_entry_stat_matches
     from ..core.refs import branch_get_active, ref_resolve
     from ..utils.ignore import gitignore_read, check_ignore
-    from ..utils.hashing import object_hash, object_read, object_find
+    from ..utils.hashing import object_hash, object_find
+    from .commit import tree_from_index
+    from .diff_tree import tree_diff
+    from ..utils.sparse import sparse_read
 
     repo = repo_find()
 
@@ -38,85 +41,71 @@ def cmd_status(args) -> None:
 
     print("\nChanges to be committed:")
 
-    def tree_to_dict(repo, ref: str, prefix: str = "") -> Dict[str, str]:
-        """
-        Convert a tree object to a dict mapping file paths to SHA-1 hashes.
-
-        Args:
-            repo: Repository object.
-            ref: Tree or commit reference.
-            prefix: Path prefix for recursion.
-
-        Returns:
-            Dictionary of file paths -> SHA.
-        """
-        res = {}
-        tree_sha = object_find(repo, ref, fmt=b'tree')
-        if tree_sha is None:
-            return res
-
-        tree = object_read(repo, tree_sha)
-        for leaf in tree.items:
-            leaf_path = leaf.path.decode("utf-8") if isinstance(leaf.path, bytes) else leaf.path
-            full_path = os.path.join(prefix, leaf_path)
-
-            if leaf.mode.startswith(b'04'):  # Directory
-                res.update(tree_to_dict(repo, leaf.sha, full_path))
-            else:
-                res[full_path] = leaf.sha
-        return res
-
-    head_tree = tree_to_dict(repo, "HEAD")
-
-    # Compare index vs HEAD
-    if not head_tree:
-        for entry in index.entries:
-            print(f"  new file: {entry.name}")
-    else:
-        for entry in index.entries:
-            if entry.name in head_tree:
-                if head_tree[entry.name] != entry.sha:
-                    print(f"  modified: {entry.name}")
-                del head_tree[entry.name]
-            else:
-                print(f"  new file: {entry.name}")
+    # Hash the index into in-memory trees and diff them against HEAD's tree:
+    # directories whose tree OIDs match are skipped without being read
+    index_trees: Dict[str, Any] = {}
+    index_tree = tree_from_index(repo, index, trees=index_trees)
+    head_tree = object_find(repo, "HEAD", fmt=b'tree')
 
-        for filename in head_tree:
-            print(f"  deleted:  {filename}")
+    # Conflicted paths have only stage 1-3 entries, which the index tree leaves out
+    unmerged: Dict[str, set] = {}
+    for entry in index.entries:
+        if entry.flag_stage:
+            unmerged.setdefault(entry.name, set()).add(entry.flag_stage >> 12)
+
+    labels = {"A": "new file: ", "M": "modified: ", "D": "deleted:  "}
+    for change in tree_diff(repo, head_tree, index_tree, trees=index_trees):
+        if change.path not in unmerged:
+            print(f"  {labels[change.status]}{change.path}")
+
+    if unmerged:
+        print("\nUnmerged paths:")
+        states = {
+            frozenset({1, 2, 3}): "both modified:",
+            frozenset({2, 3}): "both added:   ",
+            frozenset({1, 3}): "deleted by us:",
+            frozenset({1, 2}): "deleted by them:",
+            frozenset({2}): "added by us:  ",
+            frozenset({3}): "added by them:",
+        }
+        for name, stages in unmerged.items():
+            print(f"  {states.get(frozenset(stages), 'unmerged:     ')} {name}")
 
     # Changes not staged for commit
     print("\nChanges not staged for commit:")
     ignore = gitignore_read(repo)
+    cone = sparse_read(repo)
     gitdir_prefix = repo.gitdir + os.sep
-    all_files = []
+    # Ordered set of worktree files, in walk order
+    all_files: Dict[str, None] = {}
 
     for root, dirs, files in os.walk(repo.worktree, topdown=True):
         if root == repo.gitdir or root.startswith(gitdir_prefix):
             continue
+        rel_root = os.path.relpath(root, repo.worktree)
+        rel_root = "" if rel_root == "." else rel_root
+        if cone is not None:
+            # Never descend into directories outside the sparse cone
+            dirs[:] = [d for d in dirs if cone.contains_dir(os.path.join(rel_root, d))]
         for f in files:
-            rel_path = os.path.relpath(os.path.join(root, f), repo.worktree)
-            all_files.append(rel_path)
+            all_files[os.path.join(rel_root, f)] = None
 
     for entry in index.entries:
+        if entry.flag_skip_worktree or entry.flag_stage:
+            all_files.pop(entry.name, None)
+            continue
         full_path = os.path.join(repo.worktree, entry.name)
         if not os.path.exists(full_path):
             print(f"  deleted:  {entry.name}")
         else:
             stat = os.stat(full_path)
-            ctime_ns = entry.ctime[0] * 10**9 + entry.ctime[1]
-            mtime_ns = entry.mtime[0] * 10**9 + entry.mtime[1]
-
-            stat_ctime_ns = getattr(stat, 'st_ctime_ns', stat.st_ctime * 10**9)
-            stat_mtime_ns = getattr(stat, 'st_mtime_ns', stat.st_mtime * 10**9)
-
-            if stat_ctime_ns != ctime_ns or stat_mtime_ns != mtime_ns:
+            if not index_entry_stat_matches(entry, stat):
                 with open(full_path, "rb") as f:
                     new_sha = object_hash(f, b"blob", None)
                     if new_sha != entry.sha:
                         print(f"  modified: {entry.name}")
 
-        if entry.name in all_files:
-            all_files.remove(entry.name)
+        all_files.pop(entry.name, None)
 
     # Untracked files
     print("\nUntracked files:")
@@ -0,0 +1,219 @@
+import hashlib
+import os
+import struct
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# File under .git/objects/info holding the per-commit changed-path filters
+BLOOM_FILE = "changed-paths"
+
+BLOOM_MAGIC = b"SBLM"
+BLOOM_VERSION = 1
+
+# Bits per changed path and number of probes (about 0.8% false positives)
+BLOOM_BITS_PER_ENTRY = 10
+BLOOM_HASHES = 7
+
+# Commits changing more paths than this get a saturated one-byte filter
+BLOOM_MAX_CHANGES = 512
+
+# magic, version, hashes, bits per entry, max changes, commit count
+_HEADER = struct.Struct(">4sBBBxII")
+
+
+def bloom_keys(parts: List[str]) -> List[str]:
+    """
+    Return the filter keys of a path given as components: the path itself
+    and each of its leading directories ("a/b/c", "a/b", "a").
+    """
+    return ["/".join(parts[:n]) for n in range(len(parts), 0, -1)]
+
+
+def bloom_positions(key: str, nbits: int, hashes: int = BLOOM_HASHES) -> List[int]:
+    """Return the bit positions of a key (double hashing over one BLAKE2b digest)."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    h1, h2 = struct.unpack(">II", digest)
+    return [(h1 + i * h2) % nbits for i in range(hashes)]
+
+
+class BloomFilter:
+    """
+    Bloom filter over the paths changed by one commit.
+
+    A negative answer is definite; a positive one only means the path may
+    have changed. An empty change set is a single zero byte (nothing
+    matches) and an oversized one a single 0xff byte (everything matches).
+    """
+
+    def __init__(self, data: bytes, hashes: int = BLOOM_HASHES) -> None:
+        self.data = data
+        self.hashes = hashes
+
+    @classmethod
+    def build(cls, paths: Iterable[str], bits_per_entry: int = BLOOM_BITS_PER_ENTRY,
+              hashes: int = BLOOM_HASHES, max_changes: int = BLOOM_MAX_CHANGES) -> "BloomFilter":
+        """
+        Build the filter of a set of changed file paths.
+
+        Each path is added together with its leading directories.
+
+        Args:
+            paths: Changed paths relative to the repository root.
+            bits_per_entry: Filter bits per key.
+            hashes: Number of bit positions per key.
+            max_changes: Above this many paths the filter is saturated.
+
+        Returns:
+            The new BloomFilter.
+        """
+        paths = list(paths)
+        if len(paths) > max_changes:
+            return cls(b'\xff', hashes)
+        keys = set()
+        for path in paths:
+            keys.update(bloom_keys(path.split("/")))
+        nbits = max((len(keys) * bits_per_entry + 7) // 8, 1) * 8
+        bits = bytearray(nbits // 8)
+        for key in keys:
+            for pos in bloom_positions(key, nbits, hashes):
+                bits[pos >> 3] |= 1 << (pos & 7)
+        return cls(bytes(bits), hashes)
+
+    def contains(self, key: str) -> bool:
+        """Check whether a key may be in the filter."""
+        nbits = len(self.data) * 8
+        return all(self.data[pos >> 3] & (1 << (pos & 7)) for pos in bloom_positions(key, nbits, self.hashes))
+
+    def maybe_changed(self, parts: List[str]) -> bool:
+        """Check whether the path (given as components) may have changed; all its keys must match."""
+        return all(self.contains(key) for key in bloom_keys(parts))
+
+    def saturated(self) -> bool:
+        """Check whether this is the match-everything filter of an oversized commit."""
+        return self.data == b'\xff'
+
+
+class BloomIndex:
+    """
+    Changed-path filters of many commits, read from the side file.
+
+    Layout: a header, the sorted binary commit IDs, one cumulative end
+    offset per commit, then the concatenated filter bytes. A lookup is a
+    binary search over the ID table without parsing the rest of the file.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        magic, version, hashes, bits, max_changes, count = _HEADER.unpack_from(data)
+        if magic != BLOOM_MAGIC or version != BLOOM_VERSION:
+            raise Exception("Unsupported changed-path filter file")
+        self.data = data
+        self.hashes = hashes
+        self.bits_per_entry = bits
+        self.max_changes = max_changes
+        self.count = count
+        self.oids_start = _HEADER.size
+        self.offsets_start = self.oids_start + 20 * count
+        self.filters_start = self.offsets_start + 4 * count
+        if len(data) < self.filters_start:
+            raise Exception("Truncated changed-path filter file")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def oid(self, pos: int) -> str:
+        """Return the commit ID at a table position."""
+        start = self.oids_start + 20 * pos
+        return self.data[start:start + 20].hex()
+
+    def filter_at(self, pos: int) -> BloomFilter:
+        """Return the filter at a table position."""
+        end = struct.unpack_from(">I", self.data, self.offsets_start + 4 * pos)[0]
+        start = struct.unpack_from(">I", self.data, self.offsets_start + 4 * (pos - 1))[0] if pos else 0
+        return BloomFilter(self.data[self.filters_start + start:self.filters_start + end], self.hashes)
+
+    def lookup(self, sha: str) -> Optional[BloomFilter]:
+        """
+        Return the filter of a commit, or None if the commit is not covered.
+
+        Args:
+            sha: Full commit ID.
+        """
+        key = bytes.fromhex(sha)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self.oids_start + 20 * mid
+            if self.data[start:start + 20] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self.data[self.oids_start + 20 * lo:self.oids_start + 20 * lo + 20] == key:
+            return self.filter_at(lo)
+        return None
+
+    def items(self) -> Iterable[Tuple[str, BloomFilter]]:
+        """Iterate over (commit ID, filter) pairs in ID order."""
+        for pos in range(self.count):
+            yield self.oid(pos), self.filter_at(pos)
+
+
+def bloom_path(repo) -> str:
+    """Return the path of the changed-path filter file."""
+    return os.path.join(repo.gitdir, "objects", "info", BLOOM_FILE)
+
+
+def bloom_read(repo) -> Optional[BloomIndex]:
+    """
+    Load the changed-path filters of a repository.
+
+    Returns:
+        The BloomIndex, or None if no usable file exists.
+    """
+    try:
+        with open(bloom_path(repo), "rb") as f:
+            return BloomIndex(f.read())
+    except Exception:
+        return None
+
+
+def bloom_render(filters: Dict[str, BloomFilter], bits_per_entry: int = BLOOM_BITS_PER_ENTRY,
+                 hashes: int = BLOOM_HASHES, max_changes: int = BLOOM_MAX_CHANGES) -> bytes:
+    """
+    Serialize commit filters in the side-file format.
+
+    Args:
+        filters: Dictionary of commit ID -> BloomFilter.
+
+    Returns:
+        The file contents as bytes.
+    """
+    oids = sorted(filters)
+    offsets = []
+    end = 0
+    for sha in oids:
+        end += len(filters[sha].data)
+        offsets.append(end)
+    return b"".join([
+        _HEADER.pack(BLOOM_MAGIC, BLOOM_VERSION, hashes, bits_per_entry, max_changes, len(oids)),
+        b"".join(bytes.fromhex(sha) for sha in oids),
+        struct.pack(f">{len(offsets)}I", *offsets),
+        b"".join(filters[sha].data for sha in oids),
+    ])
+
+
+def bloom_write(repo, filters: Dict[str, BloomFilter]) -> None:
+    """Atomically replace the changed-path filter file."""
+    from ..core.refs import lock_acquire, lock_write
+
+    path = bloom_path(repo)
+    lock_write(lock_acquire(path), bloom_render(filters))
+    os.replace(path + ".lock", path)
+
+
+def bloom_false_positive_rate(entries: int, nbits: int, hashes: int = BLOOM_HASHES) -> float:
+    """Return the expected false-positive rate of a filter holding `entries` keys."""
+    import math
+
+    if not entries:
+        return 0.0
+    return (1 - math.exp(-hashes * entries / nbits)) ** hashes
@@ -0,0 +1,345 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# Number of bytes inspected for NUL bytes when deciding if data is binary
+BINARY_SNIFF_SIZE = 8000
+
+# Lines occurring more often than this are never used as histogram anchors
+HISTOGRAM_MAX_CHAIN = 64
+
+# (a_start, b_start, length) runs of equal lines
+MatchBlock = Tuple[int, int, int]
+
+# (tag, a_start, a_end, b_start, b_end), tag in "equal"/"delete"/"insert"/"replace"
+Opcode = Tuple[str, int, int, int, int]
+
+
+def is_binary(data: bytes) -> bool:
+    """Check whether data looks binary (contains a NUL byte near its start)."""
+    return b'\x00' in data[:BINARY_SNIFF_SIZE]
+
+
+def lines_split(data: bytes) -> List[bytes]:
+    """Split data into lines, keeping the trailing newline of each line."""
+    lines = data.split(b'\n')
+    if lines[-1] == b'':
+        lines.pop()
+        return [line + b'\n' for line in lines]
+    return [line + b'\n' for line in lines[:-1]] + [lines[-1]]
+
+
+def lines_hash(a: Sequence[bytes], b: Sequence[bytes]) -> Tuple[List[int], List[int]]:
+    """
+    Map the lines of both sides to small integers, equal lines to equal ids,
+    so the diff algorithms compare integers instead of byte strings.
+    """
+    ids: Dict[bytes, int] = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+    return a_ids, b_ids
+
+
+def _trim(a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int,
+          out: List[MatchBlock]) -> Tuple[int, int, int, int]:
+    """Record the common prefix and suffix of a region and return what is left."""
+    start = 0
+    while alo + start < ahi and blo + start < bhi and a[alo + start] == b[blo + start]:
+        start += 1
+    if start:
+        out.append((alo, blo, start))
+        alo += start
+        blo += start
+
+    end = 0
+    while alo < ahi - end and blo < bhi - end and a[ahi - 1 - end] == b[bhi - 1 - end]:
+        end += 1
+    if end:
+        out.append((ahi - end, bhi - end, end))
+        ahi -= end
+        bhi -= end
+    return alo, ahi, blo, bhi
+
+
+def _middle_snake(a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int
+                  ) -> Optional[Tuple[int, int]]:
+    """
+    Find a split point on an optimal edit path by running Myers' greedy
+    search forwards and backwards at once, in O(N + M) space.
+
+    Returns:
+        (x, y) absolute indices to split the region at, or None if the
+        regions share no line at all.
+    """
+    n = ahi - alo
+    m = bhi - blo
+    max_d = (n + m + 1) // 2
+    offset = max_d
+    size = 2 * max_d + 2
+    vf = [-1] * size
+    vb = [-1] * size
+    vf[offset + 1] = 0
+    vb[offset + 1] = 0
+    delta = n - m
+    front = delta % 2 != 0
+    kf_start = kf_end = kb_start = kb_end = 0
+
+    for d in range(max_d):
+        for k in range(-d + kf_start, d + 1 - kf_end, 2):
+            ko = offset + k
+            if k == -d or (k != d and vf[ko - 1] < vf[ko + 1]):
+                x = vf[ko + 1]
+            else:
+                x = vf[ko - 1] + 1
+            y = x - k
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            vf[ko] = x
+            if x > n:
+                kf_end += 2
+            elif y > m:
+                kf_start += 2
+            elif front:
+                kbo = offset + delta - k
+                if 0 <= kbo < size and vb[kbo] != -1 and x >= n - vb[kbo]:
+                    return alo + x, blo + y
+
+        for k in range(-d + kb_start, d + 1 - kb_end, 2):
+            ko = offset + k
+            if k == -d or (k != d and vb[ko - 1] < vb[ko + 1]):
+                x = vb[ko + 1]
+            else:
+                x = vb[ko - 1] + 1
+            y = x - k
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            vb[ko] = x
+            if x > n:
+                kb_end += 2
+            elif y > m:
+                kb_start += 2
+            elif not front:
+                kfo = offset + delta - k
+                if 0 <= kfo < size and vf[kfo] != -1:
+                    fx = vf[kfo]
+                    fy = fx - (delta - k)
+                    if fx >= n - x:
+                        return alo + fx, blo + fy
+    return None
+
+
+def _myers_region(a: Sequence[int], alo: int, ahi: int, b: Sequence[int], blo: int, bhi: int,
+                  out: List[MatchBlock]) -> None:
+    """Append the matching blocks of one region to `out` using linear-space Myers."""
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        alo, ahi, blo, bhi = _trim(a, alo, ahi, b, blo, bhi, out)
+        if alo == ahi or blo == bhi:
+            continue
+        split = _middle_snake(a, alo, ahi, b, blo, bhi)
+        if split is None:
+            continue
+        x, y = split
+        stack.append((x, ahi, y, bhi))
+        stack.append((alo, x, blo, y))
+
+
+def myers_blocks(a: Sequence[int], b: Sequence[int]) -> List[MatchBlock]:
+    """
+    Compute the matching blocks of a minimal diff (Myers' O(ND) algorithm,
+    linear-space divide-and-conquer variant).
+
+    Args:
+        a: Old sequence of line ids.
+        b: New sequence of line ids.
+
+    Returns:
+        Sorted, non-overlapping (a_start, b_start, length) blocks.
+    """
+    out: List[MatchBlock] = []
+    _myers_region(a, 0, len(a), b, 0, len(b), out)
+    return blocks_normalize(out)
+
+
+def histogram_blocks(a: Sequence[int], b: Sequence[int]) -> List[MatchBlock]:
+    """
+    Compute matching blocks with the histogram algorithm.
+
+    Each region is split around the longest common run anchored on the
+    line that is rarest in the old side, which keeps unique lines (function
+    signatures, closing blocks) aligned. Regions without a usable anchor
+    fall back to Myers.
+
+    Args:
+        a: Old sequence of line ids.
+        b: New sequence of line ids.
+
+    Returns:
+        Sorted, non-overlapping (a_start, b_start, length) blocks.
+    """
+    out: List[MatchBlock] = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        alo, ahi, blo, bhi = _trim(a, alo, ahi, b, blo, bhi, out)
+        if alo == ahi or blo == bhi:
+            continue
+
+        positions: Dict[int, List[int]] = {}
+        for i in range(alo, ahi):
+            positions.setdefault(a[i], []).append(i)
+
+        best = None  # (occurrences, -length, a_start, b_start, length)
+        j = blo
+        while j < bhi:
+            occurrences = positions.get(b[j])
+            if not occurrences or len(occurrences) > HISTOGRAM_MAX_CHAIN or \
+                    (best is not None and len(occurrences) > best[0]):
+                j += 1
+                continue
+            next_j = j + 1
+            for i in occurrences:
+                si, sj = i, j
+                while si > alo and sj > blo and a[si - 1] == b[sj - 1]:
+                    si -= 1
+                    sj -= 1
+                ei, ej = i + 1, j + 1
+                while ei < ahi and ej < bhi and a[ei] == b[ej]:
+                    ei += 1
+                    ej += 1
+                candidate = (len(occurrences), -(ei - si), si, sj, ei - si)
+                if best is None or candidate < best:
+                    best = candidate
+                next_j = max(next_j, ej)
+            j = next_j
+
+        if best is None:
+            _myers_region(a, alo, ahi, b, blo, bhi, out)
+            continue
+
+        _, _, si, sj, length = best
+        out.append((si, sj, length))
+        stack.append((si + length, ahi, sj + length, bhi))
+        stack.append((alo, si, blo, sj))
+    return blocks_normalize(out)
+
+
+def blocks_normalize(blocks: List[MatchBlock]) -> List[MatchBlock]:
+    """Sort matching blocks and merge adjacent ones."""
+    merged: List[MatchBlock] = []
+    for ai, bi, n in sorted(blocks):
+        if n <= 0:
+            continue
+        if merged and merged[-1][0] + merged[-1][2] == ai and merged[-1][1] + merged[-1][2] == bi:
+            pa, pb, pn = merged[-1]
+            merged[-1] = (pa, pb, pn + n)
+        else:
+            merged.append((ai, bi, n))
+    return merged
+
+
+def blocks_opcodes(blocks: List[MatchBlock], a_len: int, b_len: int) -> List[Opcode]:
+    """Turn matching blocks into difflib-style opcodes covering both sequences."""
+    ops: List[Opcode] = []
+    i = j = 0
+    for ai, bj, n in blocks + [(a_len, b_len, 0)]:
+        if i < ai and j < bj:
+            ops.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            ops.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            ops.append(("insert", i, ai, j, bj))
+        if n:
+            ops.append(("equal", ai, ai + n, bj, bj + n))
+        i, j = ai + n, bj + n
+    return ops
+
+
+def diff_opcodes(a: Sequence[bytes], b: Sequence[bytes], algorithm: str = "myers") -> List[Opcode]:
+    """
+    Diff two lists of lines.
+
+    Args:
+        a: Old lines.
+        b: New lines.
+        algorithm: "myers" (minimal) or "histogram".
+
+    Returns:
+        Opcodes describing how to turn `a` into `b`.
+
+    Raises:
+        Exception: If the algorithm is unknown.
+    """
+    a_ids, b_ids = lines_hash(a, b)
+    if algorithm == "myers":
+        blocks = myers_blocks(a_ids, b_ids)
+    elif algorithm in ("histogram", "patience"):
+        blocks = histogram_blocks(a_ids, b_ids)
+    else:
+        raise Exception(f"Unknown diff algorithm: {algorithm}")
+    return blocks_opcodes(blocks, len(a), len(b))
+
+
+def _hunk_range(start: int, count: int) -> str:
+    """Format one side of a hunk header ("start,count", 1-based)."""
+    if count == 0:
+        return f"{start},0"
+    if count == 1:
+        return f"{start + 1}"
+    return f"{start + 1},{count}"
+
+
+def unified_hunks(a: Sequence[bytes], b: Sequence[bytes], opcodes: List[Opcode], context: int = 3) -> bytes:
+    """
+    Render opcodes as unified diff hunks.
+
+    Args:
+        a: Old lines.
+        b: New lines.
+        opcodes: Opcodes from `diff_opcodes`.
+        context: Number of unchanged lines around each change.
+
+    Returns:
+        The hunks ("@@ ... @@" headers and +/-/space lines) as bytes.
+    """
+    changes = [op for op in opcodes if op[0] != "equal"]
+    if not changes:
+        return b''
+
+    # Group changes whose context windows touch into one hunk
+    groups: List[List[Opcode]] = [[changes[0]]]
+    for op in changes[1:]:
+        if op[1] - groups[-1][-1][2] <= 2 * context:
+            groups[-1].append(op)
+        else:
+            groups.append([op])
+
+    out: List[bytes] = []
+
+    def emit(prefix: bytes, line: bytes) -> None:
+        out.append(prefix + line)
+        if not line.endswith(b'\n'):
+            out.append(b'\n\\ No newline at end of file\n')
+
+    for group in groups:
+        a_start = max(group[0][1] - context, 0)
+        b_start = group[0][3] - (group[0][1] - a_start)
+        a_end = min(group[-1][2] + context, len(a))
+        b_end = group[-1][4] + (a_end - group[-1][2])
+        out.append(f"@@ -{_hunk_range(a_start, a_end - a_start)} "
+                   f"+{_hunk_range(b_start, b_end - b_start)} @@\n".encode("ascii"))
+
+        i = a_start
+        for _, i1, i2, j1, j2 in group:
+            for line in a[i:i1]:
+                emit(b' ', line)
+            for line in a[i1:i2]:
+                emit(b'-', line)
+            for line in b[j1:j2]:
+                emit(b'+', line)
+            i = i2
+        for line in a[i:a_end]:
+            emit(b' ', line)
+    return b''.join(out)
@@ -94,7 +94,8 @@ def object_resolve(repo, name: str) -> Optional[List[str]]:
 
     Args:
         repo: Git repository object.
-        name: Object name or reference (HEAD, branch, tag, or SHA prefix).
+        name: Object name or reference (HEAD, branch, tag, remote-tracking
+              branch such as origin/master, or SHA prefix).
 
     Returns:
         List of matching SHA strings, or None if no matches found.
@@ -113,25 +114,20 @@ def object_resolve(repo, name: str) -> Optional[List[str]]:
             return [head_ref]
         return None
 
-    # Match SHA prefix
+    # Match SHA prefix against the sorted object table
     if hash_re.match(name):
+        from .oid_table import oid_fanout_table
         name = name.lower()
-        prefix = name[:2]
-        path = repo_dir(repo, "objects", prefix, mkdir=False)
-        if path:
-            rem = name[2:]
-            for f in os.listdir(path):
-                if f.startswith(rem):
-                    candidates.append(prefix + f)
-
-    # Check branches and tags
-    for ref_prefix in ["refs/tags/", "refs/heads/"]:
-        ref_path = repo_file(repo, ref_prefix + name)
-        if ref_path and os.path.exists(ref_path):
-            with open(ref_path, 'r') as f:
-                sha = f.read().strip()
-                if sha:
-                    candidates.append(sha)
+        if len(name) == 40 and os.path.isfile(os.path.join(repo.gitdir, "objects", name[:2], name[2:])):
+            candidates.append(name)
+        else:
+            candidates.extend(oid_fanout_table(repo, name).lookup(name))
+
+    # Check branches, tags and remote-tracking branches (loose or packed)
+    for ref_prefix in ["refs/tags/", "refs/heads/", "refs/remotes/"]:
+        sha = ref_resolve(repo, ref_prefix + name)
+        if sha:
+            candidates.append(sha)
 
     return candidates if candidates else None
 
@@ -147,11 +143,5 @@ def ref_resolve(repo, ref: str) -> Optional[str]:
     Returns:
         SHA string if resolved, else None.
     """
-    path = repo_file(repo, ref)
-    if not path or not os.path.isfile(path):
-        return None
-    with open(path, "r") as f:
-        data = f.read().strip()
-    if data.startswith("ref: "):
-        return ref_resolve(repo, data[5:])
-    return data
\ No newline at end of file
+    from ..core.refs import ref_resolve as _ref_resolve
+    return _ref_resolve(repo, ref)
@@ -3,59 +3,148 @@ import zlib
 import hashlib
 import re
 import sys
-from typing import Optional
+from typing import Optional, Tuple
 
 
-def object_read(repo, sha: str):
+def object_read_raw(repo, sha: str) -> Tuple[bytes, bytes]:
     """
-    Read a Git object by its SHA from the repository.
+    Read the raw type and payload of a Git object without constructing it.
 
     Args:
         repo: Git repository object.
         sha: SHA string of the object.
 
     Returns:
-        An instance of the appropriate Git object class (Commit, Tree, Blob, or Tag).
+        Tuple of (object type, object payload bytes).
 
     Raises:
-        Exception if the object is missing, corrupted, or of unknown type.
+        Exception if the object is missing or corrupted.
     """
     from .file_io import repo_file
 
     path = repo_file(repo, "objects", sha[:2], sha[2:], mkdir=False)
 
-    if not os.path.exists(path):
+    if not path or not os.path.exists(path):
         raise Exception(f"Object {sha} does not exist!")
 
     with open(path, "rb") as f:
         raw = zlib.decompress(f.read())
 
-        x = raw.find(b' ')
-        fmt = raw[:x]
-
-        y = raw.find(b'\x00', x)
-        size = int(raw[x:y].decode("ascii"))
-
-        if size != len(raw) - (y + 1):
-            raise Exception(f"Object {sha} is corrupt: bad length")
-
-        # Lazy import of object classes
-        if fmt == b'commit':
-            from ..core.objects.commit import GitCommit
-            cls = GitCommit
-        elif fmt == b'tree':
-            from ..core.objects.tree import GitTree
-            cls = GitTree
-        elif fmt == b'tag':
-            from ..core.objects.tag import GitTag
-            cls = GitTag
-        elif fmt == b'blob':
-            from ..core.objects.blob import GitBlob
-            cls = GitBlob
-        else:
-            raise Exception(f"Unknown type {fmt.decode('ascii')} for object {sha}")
+    x = raw.find(b' ')
+    fmt = raw[:x]
+
+    y = raw.find(b'\x00', x)
+    size = int(raw[x:y].decode("ascii"))
+
+    if size != len(raw) - (y + 1):
+        raise Exception(f"Object {sha} is corrupt: bad length")
+
+    return fmt, raw[y + 1:]
+
+
+def object_read_head(repo, sha: str, until: Optional[bytes] = None) -> Tuple[bytes, bytes]:
+    """
+    Inflate only the beginning of a Git object.
+
+    Decompression stops as soon as the object header has been seen and, if
+    `until` is given, the payload contains `until` (e.g. b"\\n\\n" to stop
+    after the headers of a commit or tag, without inflating the message).
+
+    Args:
+        repo: Git repository object.
+        sha: SHA string of the object.
+        until: Optional payload delimiter to inflate up to.
+
+    Returns:
+        Tuple of (object type, payload prefix). The prefix ends right after
+        `until`, or is the whole payload if `until` does not occur.
+
+    Raises:
+        Exception if the object is missing.
+    """
+    from .file_io import repo_file
+
+    path = repo_file(repo, "objects", sha[:2], sha[2:], mkdir=False)
+
+    if not path or not os.path.exists(path):
+        raise Exception(f"Object {sha} does not exist!")
+
+    inflater = zlib.decompressobj()
+    raw = b''
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(512)
+            raw += inflater.decompress(chunk) if chunk else inflater.flush()
+            y = raw.find(b'\x00')
+            if y >= 0:
+                if until is None:
+                    return raw[:raw.find(b' ')], b''
+                end = raw.find(until, y + 1)
+                if end >= 0:
+                    return raw[:raw.find(b' ')], raw[y + 1:end + len(until)]
+            if not chunk:
+                break
+
+    y = raw.find(b'\x00')
+    return raw[:raw.find(b' ')], raw[y + 1:]
+
+
+def object_size(repo, sha: str) -> int:
+    """
+    Return the payload size recorded in an object's header, inflating only
+    the first few bytes of the object.
+
+    Raises:
+        Exception if the object is missing or its header is corrupt.
+    """
+    from .file_io import repo_file
+
+    path = repo_file(repo, "objects", sha[:2], sha[2:], mkdir=False)
+    if not path or not os.path.exists(path):
+        raise Exception(f"Object {sha} does not exist!")
 
-        return cls(raw[y + 1:])
+    with open(path, "rb") as f:
+        header = zlib.decompressobj().decompress(f.read(512), 64)
+    x = header.find(b' ')
+    y = header.find(b'\x00', x)
+    if x < 0 or y < 0:
+        raise Exception(f"Object {sha} is corrupt: bad header")
+    return int(header[x + 1:y])
+
+
+def object_read(repo, sha: str):
+    """
+    Read a Git object by its SHA from the repository.
+
+    Args:
+        repo: Git repository object.
+        sha: SHA string of the object.
+
+    Returns:
+        An instance of the appropriate Git object class (Commit, Tree, Blob, or Tag).
+
+    Raises:
+        Exception if the object is missing, corrupted, or of unknown type.
+    """
+    fmt, data = object_read_raw(repo, sha)
+
+    # Lazy import of object classes
+    if fmt == b'commit':
+        from ..core.objects.commit import GitCommit
+        cls = GitCommit
+    elif fmt == b'tree':
+        from ..core.objects.tree import GitTree
+        cls = GitTree
+    elif fmt == b'tag':
+        from ..core.objects.tag import GitTag
+        cls = GitTag
+    elif fmt == b'blob':
+        from ..core.objects.blob import GitBlob
+        cls = GitBlob
+    else:
+        raise Exception(f"Unknown type {fmt.decode('ascii')} for object {sha}")
+
+    return cls(data)
 
 
 def object_write(obj, repo=None) -> str:
@@ -69,9 +158,25 @@ def object_write(obj, repo=None) -> str:
     Returns:
         SHA-1 hash of the object.
     """
-    data = obj.serialize()
-    result = obj.fmt + b' ' + str(len(data)).encode() + b'\x00' + data
-    sha = hashlib.sha1(result).hexdigest()
+    return object_write_raw(obj.fmt, obj.serialize(), repo)
+
+
+def object_write_raw(fmt: bytes, data: bytes, repo=None, sha: Optional[str] = None) -> str:
+    """
+    Write an already serialized Git object to the repository.
+
+    Args:
+        fmt: Git object type (b'blob', b'tree', b'commit', b'tag').
+        data: Serialized object payload.
+        repo: Optional Git repository to store the object.
+        sha: SHA-1 of the object, if the caller already hashed it.
+
+    Returns:
+        SHA-1 hash of the object.
+    """
+    result = fmt + b' ' + str(len(data)).encode() + b'\x00' + data
+    if sha is None:
+        sha = hashlib.sha1(result).hexdigest()
 
     if repo:
         from .file_io import repo_file
@@ -79,6 +184,8 @@ def object_write(obj, repo=None) -> str:
         if not os.path.exists(path):
             with open(path, "wb") as f:
                 f.write(zlib.compress(result))
+            from .oid_table import oid_table_invalidate
+            oid_table_invalidate(repo)
     return sha
 
 
@@ -119,9 +226,12 @@ def object_find(repo, name: str, fmt: Optional[bytes] = None, follow: bool = Tru
     """
     Find an object by name (SHA or reference), optionally filtering by type.
 
+    Revision expressions such as `HEAD~3`, `v1^{tree}`, `master@{2}` or
+    `HEAD:path` are evaluated by `rev_parse`.
+
     Args:
         repo: Git repository object.
-        name: Reference name, SHA, or branch/tag.
+        name: Reference name, SHA, branch/tag, or revision expression.
         fmt: Optional object type to filter.
         follow: Whether to follow tags/commit-tree links.
 
@@ -136,6 +246,13 @@ def object_find(repo, name: str, fmt: Optional[bytes] = None, follow: bool = Tru
     if not name:
         return None
 
+    if name == "@" or any(c in name for c in "~^:") or "@{" in name:
+        from ..core.revision import rev_parse
+        sha = rev_parse(repo, name)
+        if not sha or not fmt:
+            return sha
+        return object_find(repo, sha, fmt, follow)
+
     sha_list = object_resolve(repo, name)
 
     if not sha_list:
@@ -151,6 +268,13 @@ def object_find(repo, name: str, fmt: Optional[bytes] = None, follow: bool = Tru
     if not fmt:
         return sha
 
+    if fmt != b'tag':
+        # Packed tags carry their peeled target, so no tag object is read
+        from ..core.refs import ref_peeled
+        peeled = ref_peeled(repo, "refs/tags/" + name)
+        if peeled:
+            sha = peeled
+
     while sha:
         obj = object_read(repo, sha)
         if obj.fmt == fmt:
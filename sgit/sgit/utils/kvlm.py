@@ -1,4 +1,4 @@
-from typing import Optional, Dict, Union, List
+from typing import Optional, Dict, Union, List, Tuple
 
 
 def kvlm_parse(raw: bytes, start: int = 0, dct: Optional[Dict[Optional[bytes], Union[bytes, List[bytes]]]] = None
@@ -6,6 +6,9 @@ def kvlm_parse(raw: bytes, start: int = 0, dct: Optional[Dict[Optional[bytes], U
     """
     Parse a key-value list with message (KVLm) from raw commit/tag/obj data.
 
+    The headers are scanned in a single iterative pass, so objects with many
+    `parent` lines or long `gpgsig` continuations never hit the recursion limit.
+
     Args:
         raw: Raw bytes of commit/tag object.
         start: Start index in raw bytes.
@@ -18,40 +21,94 @@ def kvlm_parse(raw: bytes, start: int = 0, dct: Optional[Dict[Optional[bytes], U
     if dct is None:
         dct = {}
 
-    spc = raw.find(b' ', start)
-    nl = raw.find(b'\n', start)
+    raw = bytes(raw)
+    size = len(raw)
+    pos = start
+
+    while pos < size:
+        nl = raw.find(b'\n', pos)
+
+        # A blank line separates the headers from the message
+        if nl == pos:
+            dct[None] = raw[pos + 1:]
+            return dct
+
+        spc = raw.find(b' ', pos, nl if nl >= 0 else size)
+        if spc < 0:
+            raise Exception(f"Malformed header line at offset {pos}")
+
+        key = raw[pos:spc]
+
+        # Find the end of the value (handles multi-line values with space continuation)
+        end = nl
+        while end != -1 and end + 1 < size and raw[end + 1] == 0x20:
+            end = raw.find(b'\n', end + 1)
+        if end == -1:
+            end = size
+
+        value = raw[spc + 1:end]
+        if b'\n ' in value:
+            # Replace continuation space sequences with single newline
+            value = value.replace(b'\n ', b'\n')
+
+        # Handle multiple values for the same key
+        existing = dct.get(key)
+        if existing is None:
+            dct[key] = value
+        elif isinstance(existing, list):
+            existing.append(value)
+        else:
+            dct[key] = [existing, value]
+
+        pos = end + 1
 
-    # If no key-value pair remains, the rest is the commit message
-    if (spc < 0) or (nl < spc):
-        assert nl == start
-        dct[None] = raw[start + 1:]  # Message starts after the newline
-        return dct
+    dct[None] = b''
+    return dct
 
-    key = raw[start:spc]
 
-    # Find the end of the value (handles multi-line values with space continuation)
-    end = start
-    while True:
-        end = raw.find(b'\n', end + 1)
-        if end == -1 or end + 1 >= len(raw):
-            break
-        if raw[end + 1] != ord(' '):
+def kvlm_parse_header(raw: bytes) -> Tuple[Optional[bytes], List[bytes], int]:
+    """
+    Extract only the `tree`, `parent` and committer time fields from a commit.
+
+    Unlike `kvlm_parse`, this does not build a dictionary, does not unfold
+    continuation lines and never copies the message: scanning stops at the
+    committer line, so later headers (e.g. `gpgsig`) are never looked at.
+
+    Args:
+        raw: Raw bytes of a commit object.
+
+    Returns:
+        Tuple of (tree SHA, list of parent SHAs, committer timestamp).
+        Missing fields are returned as None / [] / 0.
+    """
+    tree: Optional[bytes] = None
+    parents: List[bytes] = []
+    when = 0
+    size = len(raw)
+    pos = 0
+
+    while pos < size:
+        nl = raw.find(b'\n', pos)
+        if nl == pos or nl < 0:
             break
 
-    # Replace continuation space sequences with single newline
-    value = raw[spc + 1:end].replace(b'\n ', b'\n')
+        if raw.startswith(b'tree ', pos):
+            tree = raw[pos + 5:nl]
+        elif raw.startswith(b'parent ', pos):
+            parents.append(raw[pos + 7:nl])
+        elif raw.startswith(b'committer ', pos):
+            # "<name> <email> <timestamp> <tz>"
+            tz = raw.rfind(b' ', pos, nl)
+            ts = raw.rfind(b' ', pos, tz)
+            try:
+                when = int(raw[ts + 1:tz])
+            except ValueError:
+                when = 0
+            break
 
-    # Handle multiple values for the same key
-    if key in dct:
-        if isinstance(dct[key], list):
-            dct[key].append(value)
-        else:
-            dct[key] = [dct[key], value]
-    else:
-        dct[key] = value
+        pos = nl + 1
 
-    # Recurse to parse remaining raw bytes
-    return kvlm_parse(raw, start=end + 1, dct=dct)
+    return tree, parents, when
 
 
 def kvlm_serialize(kvlm: Dict[Optional[bytes], Union[bytes, List[bytes]]]) -> bytes:
@@ -64,19 +121,19 @@ def kvlm_serialize(kvlm: Dict[Optional[bytes], Union[bytes, List[bytes]]]) -> by
     Returns:
         Serialized bytes representing commit/tag/tree object.
     """
-    res = b''
+    parts: List[bytes] = []
 
-    for k in kvlm.keys():
+    for k, val in kvlm.items():
         if k is None:
             continue
-        val = kvlm[k]
         if not isinstance(val, list):
             val = [val]
 
         for v in val:
             # Replace newlines with space continuation for multi-line values
-            res += k + b' ' + v.replace(b'\n', b'\n ') + b'\n'
+            parts.append(k + b' ' + v.replace(b'\n', b'\n ') + b'\n')
 
     # Append the commit/tag message at the end
-    res += b'\n' + kvlm[None]
-    return res
+    parts.append(b'\n')
+    parts.append(kvlm.get(None, b''))
+    return b''.join(parts)
@@ -0,0 +1,109 @@
+from typing import List, Sequence, Tuple
+
+
+# Width of the conflict markers (<<<<<<<, =======, >>>>>>>)
+MARKER_SIZE = 7
+
+# (base_start, ours_start, theirs_start, length) runs common to all three sides
+SyncRegion = Tuple[int, int, int, int]
+
+
+def sync_regions(base: Sequence[bytes], ours: Sequence[bytes], theirs: Sequence[bytes],
+                 algorithm: str = "myers") -> List[SyncRegion]:
+    """
+    Find the runs of base lines that both sides kept unchanged.
+
+    The base is diffed against each side, and the matching blocks of the
+    two diffs are intersected on their base ranges.
+
+    Returns:
+        Sync regions in order, ending with an empty sentinel region at the
+        end of all three sequences.
+    """
+    from .diff import diff_opcodes
+
+    def matches(other: Sequence[bytes]) -> List[Tuple[int, int, int]]:
+        return [(i1, j1, i2 - i1) for tag, i1, i2, j1, _ in diff_opcodes(base, other, algorithm) if tag == "equal"]
+
+    ours_blocks, theirs_blocks = matches(ours), matches(theirs)
+    regions: List[SyncRegion] = []
+    i = j = 0
+    while i < len(ours_blocks) and j < len(theirs_blocks):
+        oa, oo, on = ours_blocks[i]
+        ta, tt, tn = theirs_blocks[j]
+        start = max(oa, ta)
+        end = min(oa + on, ta + tn)
+        if start < end:
+            regions.append((start, oo + start - oa, tt + start - ta, end - start))
+        if oa + on < ta + tn:
+            i += 1
+        else:
+            j += 1
+    regions.append((len(base), len(ours), len(theirs), 0))
+    return regions
+
+
+def merge_lines(
+    base: Sequence[bytes],
+    ours: Sequence[bytes],
+    theirs: Sequence[bytes],
+    ours_label: str = "ours",
+    theirs_label: str = "theirs",
+    algorithm: str = "myers",
+) -> Tuple[bytes, int]:
+    """
+    Three-way merge lists of lines.
+
+    Chunks changed on one side only are taken from that side, identical
+    changes are taken once, and chunks both sides changed differently are
+    written between conflict markers. Lines that both sides of a conflict
+    share at its start or end are moved out of the markers.
+
+    Args:
+        base: Lines of the common ancestor (with their newlines).
+        ours: Lines of our side.
+        theirs: Lines of their side.
+        ours_label: Name printed after the <<<<<<< marker.
+        theirs_label: Name printed after the >>>>>>> marker.
+        algorithm: Line diff algorithm ("myers" or "histogram").
+
+    Returns:
+        Tuple of (merged contents, number of conflicts).
+    """
+    out: List[bytes] = []
+    conflicts = 0
+
+    def emit(lines: Sequence[bytes]) -> None:
+        out.extend(lines)
+
+    def emit_side(lines: Sequence[bytes]) -> None:
+        out.extend(lines)
+        if lines and not lines[-1].endswith(b'\n'):
+            out.append(b'\n')
+
+    b = o = t = 0
+    for rb, ro, rt, length in sync_regions(base, ours, theirs, algorithm):
+        base_chunk, ours_chunk, theirs_chunk = base[b:rb], ours[o:ro], theirs[t:rt]
+        if ours_chunk == theirs_chunk or base_chunk == theirs_chunk:
+            emit(ours_chunk)
+        elif base_chunk == ours_chunk:
+            emit(theirs_chunk)
+        else:
+            head = 0
+            while head < min(len(ours_chunk), len(theirs_chunk)) and ours_chunk[head] == theirs_chunk[head]:
+                head += 1
+            tail = 0
+            while tail < min(len(ours_chunk), len(theirs_chunk)) - head and \
+                    ours_chunk[-1 - tail] == theirs_chunk[-1 - tail]:
+                tail += 1
+            emit(ours_chunk[:head])
+            conflicts += 1
+            out.append(b'<' * MARKER_SIZE + b' ' + ours_label.encode("utf-8") + b'\n')
+            emit_side(ours_chunk[head:len(ours_chunk) - tail])
+            out.append(b'=' * MARKER_SIZE + b'\n')
+            emit_side(theirs_chunk[head:len(theirs_chunk) - tail])
+            out.append(b'>' * MARKER_SIZE + b' ' + theirs_label.encode("utf-8") + b'\n')
+            emit(ours_chunk[len(ours_chunk) - tail:])
+        emit(ours[ro:ro + length])
+        b, o, t = rb + length, ro + length, rt + length
+    return b''.join(out), conflicts
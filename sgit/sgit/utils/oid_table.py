@@ -0,0 +1,150 @@
+import os
+from bisect import bisect_left
+from typing import Dict, List
+
+
+# Default minimum length of abbreviated object names
+ABBREV_DEFAULT = 7
+
+# Per-process cache of object tables, keyed by objects directory
+_oid_tables: Dict[str, "OidTable"] = {}
+
+
+class OidTable:
+    """
+    Sorted in-memory table of every object ID in a repository.
+
+    Prefix lookups and shortest-unique abbreviations are answered with a
+    binary search instead of listing a fan-out directory each time.
+    """
+
+    def __init__(self, oids: List[str]) -> None:
+        self.oids = sorted(oids)
+
+    def __len__(self) -> int:
+        return len(self.oids)
+
+    def __contains__(self, sha: str) -> bool:
+        pos = bisect_left(self.oids, sha)
+        return pos < len(self.oids) and self.oids[pos] == sha
+
+    def lookup(self, prefix: str) -> List[str]:
+        """
+        Return every object ID starting with a hex prefix.
+
+        Args:
+            prefix: Lowercase hex prefix.
+
+        Returns:
+            Matching object IDs in sorted order.
+        """
+        pos = bisect_left(self.oids, prefix)
+        matches = []
+        while pos < len(self.oids) and self.oids[pos].startswith(prefix):
+            matches.append(self.oids[pos])
+            pos += 1
+        return matches
+
+    def abbreviate(self, sha: str, min_len: int = ABBREV_DEFAULT) -> str:
+        """
+        Return the shortest prefix of `sha` (at least `min_len` long) that no
+        other object in the table shares.
+
+        Only the two sorted neighbours of `sha` can share its longest prefix,
+        so this is a single binary search.
+        """
+        pos = bisect_left(self.oids, sha)
+        common = 0
+        for other in self.oids[max(pos - 1, 0):pos + 2]:
+            if other == sha:
+                continue
+            n = 0
+            while n < len(sha) and other[n] == sha[n]:
+                n += 1
+            common = max(common, n)
+        return sha[:min(max(min_len, common + 1), len(sha))]
+
+
+def oid_table_scan(objects_dir: str) -> List[str]:
+    """List the IDs of all loose objects below an objects directory."""
+    oids = []
+    with os.scandir(objects_dir) as fanout:
+        for d in fanout:
+            if len(d.name) != 2 or not d.is_dir():
+                continue
+            with os.scandir(d.path) as entries:
+                oids.extend(d.name + e.name for e in entries if len(e.name) == 38)
+    return oids
+
+
+def oid_fanout_scan(objects_dir: str, prefix: str) -> List[str]:
+    """List the IDs of the loose objects in the fan-out directory of `prefix`."""
+    try:
+        with os.scandir(os.path.join(objects_dir, prefix[:2])) as entries:
+            return [prefix[:2] + e.name for e in entries if len(e.name) == 38]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+def oid_fanout_table(repo, prefix: str) -> OidTable:
+    """
+    Return a table answering lookups of one prefix (at least 2 hex digits).
+
+    This is the repository's cached table if one was already built (e.g. by
+    `log --oneline`); otherwise only the single fan-out directory of the
+    prefix is listed, which is all a one-off lookup or abbreviation needs:
+    every object sharing two or more leading digits lives in it.
+
+    Args:
+        repo: Git repository object.
+        prefix: Lowercase hex prefix.
+
+    Returns:
+        An OidTable holding at least every object in the prefix's fan-out.
+    """
+    objects_dir = os.path.join(repo.gitdir, "objects")
+    table = _oid_tables.get(objects_dir)
+    if table is None:
+        table = OidTable(oid_fanout_scan(objects_dir, prefix))
+    return table
+
+
+def oid_table(repo) -> OidTable:
+    """
+    Return the object table of a repository, building it on first use.
+
+    Building it lists every fan-out directory, which pays off for bulk
+    abbreviation (`log --oneline`, `diff`); single lookups should use
+    `oid_fanout_table`.
+
+    Args:
+        repo: Git repository object.
+
+    Returns:
+        The cached OidTable.
+    """
+    objects_dir = os.path.join(repo.gitdir, "objects")
+    table = _oid_tables.get(objects_dir)
+    if table is None:
+        table = _oid_tables[objects_dir] = OidTable(oid_table_scan(objects_dir))
+    return table
+
+
+def oid_table_invalidate(repo) -> None:
+    """Drop the cached object table after objects were written."""
+    _oid_tables.pop(os.path.join(repo.gitdir, "objects"), None)
+
+
+def object_abbrev(repo, sha: str, min_len: int = ABBREV_DEFAULT) -> str:
+    """
+    Abbreviate an object ID to its shortest unique prefix.
+
+    Args:
+        repo: Git repository object.
+        sha: Full object ID.
+        min_len: Minimum length of the abbreviation.
+
+    Returns:
+        Prefix of `sha` that resolves to it unambiguously.
+    """
+    return oid_fanout_table(repo, sha).abbreviate(sha, max(min_len, 2))
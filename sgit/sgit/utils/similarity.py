@@ -0,0 +1,83 @@
+from typing import Dict, Optional
+
+
+# Chunks longer than this are split so long lines still match partially
+FINGERPRINT_CHUNK = 64
+
+# Default minimum similarity (percent) for a rename or copy
+SIMILARITY_DEFAULT = 50
+
+
+def blob_fingerprint(data: bytes) -> Dict[int, int]:
+    """
+    Summarize blob contents as a multiset of chunk hashes.
+
+    The data is cut at newlines (and every FINGERPRINT_CHUNK bytes within
+    long lines); each chunk hash maps to the number of bytes it covers.
+    Two blobs' shared content is then estimated from the intersection of
+    their fingerprints, without diffing them.
+
+    Args:
+        data: Blob contents.
+
+    Returns:
+        Dictionary mapping chunk hash -> total bytes.
+    """
+    prints: Dict[int, int] = {}
+    for line in data.split(b'\n'):
+        size = len(line) + 1
+        if size <= FINGERPRINT_CHUNK:
+            h = hash(line)
+            prints[h] = prints.get(h, 0) + size
+            continue
+        for i in range(0, len(line), FINGERPRINT_CHUNK):
+            chunk = line[i:i + FINGERPRINT_CHUNK]
+            h = hash(chunk)
+            prints[h] = prints.get(h, 0) + len(chunk)
+    return prints
+
+
+def similarity_score(src: Dict[int, int], src_size: int, dst: Dict[int, int], dst_size: int) -> int:
+    """
+    Estimate how similar two blobs are from their fingerprints.
+
+    Args:
+        src: Fingerprint of the source blob.
+        src_size: Size of the source blob in bytes.
+        dst: Fingerprint of the destination blob.
+        dst_size: Size of the destination blob in bytes.
+
+    Returns:
+        Similarity in percent (0-100): shared bytes over the larger size.
+    """
+    larger = max(src_size, dst_size)
+    if not larger:
+        return 100
+    if len(src) > len(dst):
+        src, dst = dst, src
+    common = 0
+    for h, n in src.items():
+        m = dst.get(h)
+        if m:
+            common += n if n < m else m
+    return min(100, common * 100 // larger)
+
+
+def similarity_threshold(value: Optional[str]) -> int:
+    """
+    Parse a -M/-C threshold the way git does: "60%" is 60 percent, while a
+    bare number is a fraction with an implied leading decimal point
+    ("6" and "60" both mean 60 percent).
+
+    Raises:
+        Exception: If the value is not a number.
+    """
+    if not value:
+        return SIMILARITY_DEFAULT
+    if value.endswith("%"):
+        percent = float(value[:-1])
+    else:
+        if not value.isdigit():
+            raise Exception(f"Invalid similarity threshold: {value}")
+        percent = float("0." + value) * 100
+    return max(0, min(100, int(percent)))
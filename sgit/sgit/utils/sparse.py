@@ -0,0 +1,183 @@
+import os
+from typing import Iterable, List, Optional, Set
+
+
+class SparseCone:
+    """
+    Cone-mode sparse-checkout definition.
+
+    Files directly in the worktree root are always included. A directory in
+    `recursive` is included with everything below it; each of its ancestors is
+    a "parent" directory whose immediate files are included, but whose other
+    subdirectories are not.
+    """
+
+    def __init__(self, dirs: Optional[Iterable[str]] = None) -> None:
+        self.recursive: Set[str] = set()
+        self.parents: Set[str] = set()
+        for d in dirs or []:
+            self.add(d)
+
+    def add(self, directory: str) -> None:
+        """Add a directory (relative to the worktree) to the cone."""
+        directory = os.path.normpath(directory).strip("/")
+        if directory in ("", "."):
+            return
+        self.recursive.add(directory)
+        parent = os.path.dirname(directory)
+        while parent:
+            self.parents.add(parent)
+            parent = os.path.dirname(parent)
+
+    def contains_dir(self, directory: str) -> bool:
+        """
+        Check whether a directory has to be visited to find in-cone paths.
+
+        Args:
+            directory: Directory path relative to the worktree ("" is the root).
+
+        Returns:
+            True if the directory is in the cone or leads to it.
+        """
+        if not directory or directory in self.parents:
+            return True
+        return self.contains_recursive(directory)
+
+    def contains_recursive(self, directory: str) -> bool:
+        """Check whether a directory lies fully inside the cone."""
+        d = directory
+        while d:
+            if d in self.recursive:
+                return True
+            d = os.path.dirname(d)
+        return False
+
+    def contains(self, path: str) -> bool:
+        """
+        Check whether a file path is inside the cone.
+
+        Args:
+            path: File path relative to the worktree.
+
+        Returns:
+            True if the file should be present in the worktree.
+        """
+        parent = os.path.dirname(path)
+        if not parent or parent in self.parents:
+            return True
+        return self.contains_recursive(parent)
+
+
+def sparse_patterns(cone: SparseCone) -> List[str]:
+    """
+    Render a cone as the pattern lines git stores in info/sparse-checkout.
+
+    Args:
+        cone: SparseCone to render.
+
+    Returns:
+        List of pattern lines (without newlines).
+    """
+    lines = ["/*", "!/*/"]
+    for d in sorted(cone.parents | cone.recursive):
+        lines.append(f"/{d}/")
+        if d in cone.parents and d not in cone.recursive:
+            lines.append(f"!/{d}/*/")
+    return lines
+
+
+def sparse_parse(lines: Iterable[str]) -> SparseCone:
+    """
+    Parse cone-mode pattern lines back into a SparseCone.
+
+    Args:
+        lines: Lines of an info/sparse-checkout file.
+
+    Returns:
+        The parsed SparseCone.
+    """
+    dirs: Set[str] = set()
+    parents: Set[str] = set()
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith("#") or line in ("/*", "!/*/"):
+            continue
+        if line.startswith("!/") and line.endswith("/*/"):
+            parents.add(line[2:-3])
+        elif line.startswith("/") and line.endswith("/"):
+            dirs.add(line[1:-1])
+
+    cone = SparseCone()
+    for d in sorted(dirs - parents):
+        cone.add(d)
+    return cone
+
+
+def sparse_enabled(repo) -> bool:
+    """Check whether sparse checkout is enabled in the repository config."""
+    return repo.conf is not None and repo.conf.getboolean("core", "sparsecheckout", fallback=False)
+
+
+def sparse_index_enabled(repo) -> bool:
+    """Check whether out-of-cone directories are collapsed in the index (index.sparse)."""
+    return repo.conf is not None and repo.conf.getboolean("index", "sparse", fallback=False)
+
+
+def sparse_read(repo) -> Optional[SparseCone]:
+    """
+    Read the sparse-checkout cone of a repository.
+
+    Args:
+        repo: Repository object.
+
+    Returns:
+        SparseCone if sparse checkout is enabled, else None.
+    """
+    if not sparse_enabled(repo):
+        return None
+    path = os.path.join(repo.gitdir, "info", "sparse-checkout")
+    if not os.path.exists(path):
+        return SparseCone()
+    with open(path, "r") as f:
+        return sparse_parse(f.readlines())
+
+
+def sparse_write(repo, cone: SparseCone, sparse_index: Optional[bool] = None) -> None:
+    """
+    Store a cone in info/sparse-checkout and enable it in the config.
+
+    Args:
+        repo: Repository object.
+        cone: SparseCone to store.
+        sparse_index: Whether to collapse out-of-cone directories in the
+                      index, or None to leave the setting unchanged.
+    """
+    from .file_io import repo_file
+
+    path = repo_file(repo, "info", "sparse-checkout", mkdir=True)
+    with open(path, "w") as f:
+        f.write("\n".join(sparse_patterns(cone)) + "\n")
+    sparse_config_set(repo, True, sparse_index)
+
+
+def sparse_config_set(repo, enabled: bool, sparse_index: Optional[bool] = None) -> None:
+    """
+    Enable or disable cone-mode sparse checkout in .git/config.
+
+    Args:
+        repo: Repository object.
+        enabled: New value of core.sparseCheckout.
+        sparse_index: New value of index.sparse, or None to leave it unchanged.
+    """
+    from .file_io import repo_file
+
+    if not repo.conf.has_section("core"):
+        repo.conf.add_section("core")
+    repo.conf.set("core", "sparsecheckout", "true" if enabled else "false")
+    repo.conf.set("core", "sparsecheckoutcone", "true" if enabled else "false")
+    if sparse_index is not None:
+        if not repo.conf.has_section("index"):
+            repo.conf.add_section("index")
+        repo.conf.set("index", "sparse", "true" if sparse_index else "false")
+    with open(repo_file(repo, "config"), "w") as f:
+        repo.conf.write(f)
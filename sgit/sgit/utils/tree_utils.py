@@ -67,7 +67,7 @@ def tree_leaf_sort_key(leaf: GitTreeLeaf) -> str:
     """
     Sorting key for GitTreeLeaf objects.
 
-    Directories are sorted after files by appending a '/'.
+    Directories (mode 04xxxx) are sorted as if their name ended in '/'.
 
     Args:
         leaf: GitTreeLeaf object.
@@ -76,7 +76,7 @@ def tree_leaf_sort_key(leaf: GitTreeLeaf) -> str:
         String used for sorting.
     """
     path_str = leaf.path.decode('utf-8') if isinstance(leaf.path, bytes) else leaf.path
-    return path_str if leaf.mode.startswith(b"10") else path_str + "/"
+    return path_str + "/" if leaf.mode.startswith(b"04") else path_str
 
 
 def tree_serialize(obj) -> bytes:
@@ -121,4 +121,387 @@ class TestIntegration:
 
         with open(os.path.join(checkout_dir, "file1.txt"), "r") as f:
             content = f.read()
-        assert content == "Version 1"
\ No newline at end of file
+        assert content == "Version 1"
+
+    def test_checkout_nested_parallel(self, repo_dir, sgit_cmd):
+        """Test checkout of nested directories with a worker pool."""
+        os.chdir(repo_dir)
+
+        paths = [os.path.join("pkg", f"sub{i}", f"file{j}.txt") for i in range(3) for j in range(5)]
+        for p in paths:
+            os.makedirs(os.path.dirname(p), exist_ok=True)
+            with open(p, "w") as f:
+                f.write(p)
+        sgit_cmd(["add"] + paths)
+
+        result = sgit_cmd(["commit", "-m", "Nested"])
+        assert result.returncode == 0, f"Commit failed: {result.stderr_text}"
+
+        checkout_dir = os.path.join(repo_dir, "out")
+        result = sgit_cmd(["checkout", "-j", "4", "HEAD", checkout_dir])
+        assert result.returncode == 0, f"Checkout failed: {result.stderr_text}"
+
+        for p in paths:
+            with open(os.path.join(checkout_dir, p), "r") as f:
+                assert f.read() == p
+
+    def test_switch_file_mode(self, repo_dir, sgit_cmd):
+        """Test files rewritten in place get the executable bit set and cleared."""
+        import io
+        import stat
+        from sgit.operations.fast_import import FastImport
+        from sgit.utils.file_io import repo_find
+
+        os.chdir(repo_dir)
+        ident = b"A U Thor <author@example.com> 1700000000 +0000"
+        FastImport(repo_find()).run(io.BytesIO(
+            b"commit refs/heads/master\nmark :1\ncommitter " + ident + b"\ndata 4\nexec"
+            b"\nM 100755 inline run.sh\ndata 3\nv1\n\n"
+            b"commit refs/heads/plain\ncommitter " + ident + b"\ndata 5\nplain\nfrom :1"
+            b"\nM 100644 inline run.sh\ndata 3\nv2\n\n"
+        ))
+        assert sgit_cmd(["reset", "--hard"]).returncode == 0
+        assert os.stat("run.sh").st_mode & stat.S_IXUSR
+
+        result = sgit_cmd(["switch", "plain"])
+        assert result.returncode == 0, f"Switch failed: {result.stderr_text}"
+        assert not os.stat("run.sh").st_mode & stat.S_IXUSR
+        assert sgit_cmd(["switch", "master"]).returncode == 0
+        assert os.stat("run.sh").st_mode & stat.S_IXUSR
+
+    def test_switch_branches(self, repo_dir, sgit_cmd):
+        """Test switching branches inside the worktree."""
+        os.chdir(repo_dir)
+
+        os.makedirs("src", exist_ok=True)
+        with open("src/main.py", "w") as f:
+            f.write("v1\n")
+        with open("keep.txt", "w") as f:
+            f.write("same\n")
+        sgit_cmd(["add", "src/main.py", "keep.txt"])
+        result = sgit_cmd(["commit", "-m", "Base"])
+        assert result.returncode == 0, f"Commit failed: {result.stderr_text}"
+
+        result = sgit_cmd(["switch", "-c", "feature"])
+        assert result.returncode == 0, f"Switch failed: {result.stderr_text}"
+
+        with open("src/main.py", "w") as f:
+            f.write("v2\n")
+        with open("extra.txt", "w") as f:
+            f.write("extra\n")
+        sgit_cmd(["add", "src/main.py", "extra.txt"])
+        result = sgit_cmd(["commit", "-m", "Feature"])
+        assert result.returncode == 0, f"Commit failed: {result.stderr_text}"
+
+        result = sgit_cmd(["checkout", "master"])
+        assert result.returncode == 0, f"Checkout failed: {result.stderr_text}"
+        with open("src/main.py") as f:
+            assert f.read() == "v1\n"
+        assert not os.path.exists("extra.txt")
+        with open(".git/HEAD") as f:
+            assert f.read().strip() == "ref: refs/heads/master"
+
+        result = sgit_cmd(["status"])
+        assert "modified" not in result.stdout_text
+
+        # Local changes to a path that differs must not be clobbered
+        with open("src/main.py", "w") as f:
+            f.write("local\n")
+        result = sgit_cmd(["switch", "feature"])
+        assert result.returncode != 0
+        with open("src/main.py") as f:
+            assert f.read() == "local\n"
+
+    def test_pack_refs(self, repo_dir, sgit_cmd):
+        """Test packing refs and resolving packed and peeled names."""
+        os.chdir(repo_dir)
+
+        with open("file.txt", "w") as f:
+            f.write("one")
+        sgit_cmd(["add", "file.txt"])
+        result = sgit_cmd(["commit", "-m", "First"])
+        assert result.returncode == 0, f"Commit failed: {result.stderr_text}"
+        head = sgit_cmd(["rev-parse", "HEAD"]).stdout_text.strip()
+
+        sgit_cmd(["tag", "light"])
+        sgit_cmd(["tag", "-a", "annotated"])
+        tag_sha = sgit_cmd(["rev-parse", "annotated"]).stdout_text.strip()
+
+        result = sgit_cmd(["pack-refs", "--all"])
+        assert result.returncode == 0, f"Pack-refs failed: {result.stderr_text}"
+        assert not os.path.exists(".git/refs/tags/light")
+        assert not os.path.exists(".git/refs/heads/master")
+        with open(".git/packed-refs") as f:
+            assert f"^{head}" in f.read()
+
+        assert sgit_cmd(["tag"]).stdout_text.split() == ["annotated", "light"]
+        assert sgit_cmd(["rev-parse", "HEAD"]).stdout_text.strip() == head
+        assert sgit_cmd(["rev-parse", "annotated"]).stdout_text.strip() == tag_sha
+        result = sgit_cmd(["rev-parse", "--sgit-type", "commit", "annotated"])
+        assert result.stdout_text.strip() == head
+
+        # A new loose ref wins over its packed value
+        with open("file.txt", "w") as f:
+            f.write("two")
+        sgit_cmd(["add", "file.txt"])
+        sgit_cmd(["commit", "-m", "Second"])
+        assert sgit_cmd(["rev-parse", "master"]).stdout_text.strip() != head
+
+    def test_for_each_ref(self, repo_dir, sgit_cmd):
+        """Test for-each-ref patterns, sorting, count and format atoms."""
+        os.chdir(repo_dir)
+
+        with open("file.txt", "w") as f:
+            f.write("one")
+        sgit_cmd(["add", "file.txt"])
+        sgit_cmd(["commit", "-m", "First"])
+        first = sgit_cmd(["rev-parse", "HEAD"]).stdout_text.strip()
+        sgit_cmd(["tag", "-a", "v1"])
+        sgit_cmd(["tag", "v2"])
+        sgit_cmd(["checkout", "-b", "dev"])
+
+        result = sgit_cmd(["for-each-ref"])
+        assert result.returncode == 0, f"for-each-ref failed: {result.stderr_text}"
+        lines = result.stdout_text.splitlines()
+        assert lines[0] == f"{first} commit\trefs/heads/dev"
+        assert [line.split("\t")[1] for line in lines] == [
+            "refs/heads/dev", "refs/heads/master", "refs/tags/v1", "refs/tags/v2"
+        ]
+
+        result = sgit_cmd([
+            "for-each-ref", "--format", "%(HEAD)%(refname:short) %(subject) %(*objectname)", "refs/heads"
+        ])
+        assert result.stdout_text.splitlines() == ["*dev First ", " master First "]
+
+        sgit_cmd(["pack-refs", "--all"])
+        result = sgit_cmd([
+            "for-each-ref", "--sort=-refname", "--count", "1",
+            "--format", "%(objecttype) %(*objectname) %%", "refs/tags/v*"
+        ])
+        assert result.stdout_text.splitlines() == ["commit  %"]
+        result = sgit_cmd(["for-each-ref", "--format", "%(objecttype) %(*objectname)", "refs/tags/v1"])
+        assert result.stdout_text.strip() == f"tag {first}"
+
+    def test_rev_parse_expressions(self, repo_dir, sgit_cmd):
+        """Test ancestry, peeling, reflog, path and range revision syntax."""
+        os.chdir(repo_dir)
+
+        os.makedirs("dir")
+        shas = []
+        for i in range(4):
+            with open("dir/file.txt", "w") as f:
+                f.write(f"v{i}")
+            sgit_cmd(["add", "dir/file.txt"])
+            sgit_cmd(["commit", "-m", f"Commit {i}"])
+            shas.append(sgit_cmd(["rev-parse", "HEAD"]).stdout_text.strip())
+        sgit_cmd(["tag", "-a", "v1", "HEAD~2"])
+
+        result = sgit_cmd(["rev-parse", "HEAD~3", "HEAD^^", "@^0", "v1^{}", "master@{1}", "HEAD~1..HEAD"])
+        assert result.returncode == 0, f"rev-parse failed: {result.stderr_text}"
+        assert result.stdout_text.split() == [
+            shas[0], shas[1], shas[3], shas[1], shas[2], shas[3], "^" + shas[2]
+        ]
+
+        tree = sgit_cmd(["rev-parse", "HEAD~1^{tree}"]).stdout_text.strip()
+        assert tree == sgit_cmd(["rev-parse", "--sgit-type", "tree", "HEAD~1"]).stdout_text.strip()
+        blob = sgit_cmd(["rev-parse", "HEAD:dir/file.txt"]).stdout_text.strip()
+        assert blob == sgit_cmd(["rev-parse", ":dir/file.txt"]).stdout_text.strip()
+        assert sgit_cmd(["cat-file", "blob", "HEAD~2:dir/file.txt"]).stdout_text == "v1"
+        assert sgit_cmd(["rev-parse", "HEAD~4"]).returncode != 0
+
+    def test_log_pathspec(self, repo_dir, sgit_cmd):
+        """Test that log -- <path> only lists commits changing the path."""
+        os.chdir(repo_dir)
+
+        os.makedirs("src/lib")
+        steps = [("src/lib/a.txt", "a1"), ("b.txt", "b1"), ("src/lib/a.txt", "a2"), ("src/c.txt", "c1")]
+        for path, content in steps:
+            with open(path, "w") as f:
+                f.write(content)
+            sgit_cmd(["add", path])
+            sgit_cmd(["commit", "-m", f"Write {path} {content}"])
+
+        result = sgit_cmd(["log", "--oneline", "--", "src/lib/a.txt"])
+        assert result.returncode == 0, f"log failed: {result.stderr_text}"
+        subjects = [line.split(" ", 1)[1] for line in result.stdout_text.splitlines()]
+        assert subjects == ["Write src/lib/a.txt a2", "Write src/lib/a.txt a1"]
+
+        result = sgit_cmd(["log", "--oneline", "--", "src", "b.txt"])
+        assert len(result.stdout_text.splitlines()) == 4
+        result = sgit_cmd(["log", "--oneline", "--", "src/c.txt"])
+        assert [line.split(" ", 1)[1] for line in result.stdout_text.splitlines()] == ["Write src/c.txt c1"]
+        assert sgit_cmd(["log", "--oneline", "--", "missing"]).stdout_text == ""
+
+        # The graph shows the same commits, with edges rewritten past hidden ones
+        result = sgit_cmd(["log", "--", "src/lib/a.txt"])
+        assert result.returncode == 0, f"log failed: {result.stderr_text}"
+        graph = result.stdout_text
+        shas = [sgit_cmd(["rev-parse", rev]).stdout_text.strip() for rev in ("HEAD~1", "HEAD~3")]
+        assert graph.count("[label=") == 2 and "a2" in graph and "a1" in graph
+        assert graph.count(" -> ") == 1 and f'"c_{shas[0]}" -> "c_{shas[1]}"' in graph
+
+    def test_merge_base(self, repo_dir, sgit_cmd):
+        """Test merge-base and --is-ancestor on diverged branches."""
+        os.chdir(repo_dir)
+
+        def commit(name):
+            with open(name, "w") as f:
+                f.write(name)
+            sgit_cmd(["add", name])
+            sgit_cmd(["commit", "-m", name])
+            return sgit_cmd(["rev-parse", "HEAD"]).stdout_text.strip()
+
+        commit("a")
+        base = commit("b")
+        sgit_cmd(["switch", "-c", "topic"])
+        commit("c")
+        topic = commit("d")
+        sgit_cmd(["switch", "master"])
+        master = commit("e")
+
+        result = sgit_cmd(["merge-base", "master", "topic"])
+        assert result.returncode == 0, f"merge-base failed: {result.stderr_text}"
+        assert result.stdout_text.strip() == base
+        assert sgit_cmd(["merge-base", "--all", "topic", "master"]).stdout_text.split() == [base]
+        assert sgit_cmd(["merge-base", master, base]).stdout_text.strip() == base
+
+        assert sgit_cmd(["merge-base", "--is-ancestor", base, "topic"]).returncode == 0
+        assert sgit_cmd(["merge-base", "--is-ancestor", "HEAD~2", "HEAD"]).returncode == 0
+        assert sgit_cmd(["merge-base", "--is-ancestor", topic, "master"]).returncode == 1
+        assert sgit_cmd(["merge-base", "--is-ancestor", "master", base]).returncode == 1
+
+    def test_rebase_and_cherry_pick(self, repo_dir, sgit_cmd):
+        """Test replaying commits in memory with rebase --onto and cherry-pick."""
+        os.chdir(repo_dir)
+
+        def commit(name, content=None):
+            with open(name, "w") as f:
+                f.write(content or name)
+            sgit_cmd(["add", name])
+            sgit_cmd(["commit", "-m", f"Add {name}"])
+
+        commit("a")
+        sgit_cmd(["switch", "-c", "feature"])
+        commit("f1")
+        commit("f2")
+        sgit_cmd(["switch", "master"])
+        commit("m")
+
+        # Rebasing a branch that is not checked out leaves the worktree alone
+        result = sgit_cmd(["rebase", "master", "feature"])
+        assert result.returncode == 0, f"rebase failed: {result.stderr_text}"
+        assert sorted(os.listdir(".")) == [".git", "a", "m"]
+        assert sgit_cmd(["merge-base", "--is-ancestor", "master", "feature"]).returncode == 0
+        assert sgit_cmd(["cat-file", "blob", "feature:m"]).stdout_text == "m"
+        log = sgit_cmd(["log", "--oneline", "feature"]).stdout_text
+        assert [line.split(" ", 1)[1] for line in log.splitlines()] == ["Add f2", "Add f1", "Add m", "Add a"]
+
+        # --onto moves only the commits after feature~1
+        sgit_cmd(["switch", "master~1"])
+        sgit_cmd(["switch", "-c", "other"])
+        result = sgit_cmd(["rebase", "--onto", "other", "feature~1", "feature"])
+        assert result.returncode == 0, f"rebase --onto failed: {result.stderr_text}"
+        log = sgit_cmd(["log", "--oneline", "feature"]).stdout_text
+        assert [line.split(" ", 1)[1] for line in log.splitlines()] == ["Add f2", "Add a"]
+
+        # Cherry-picking onto the checked-out branch updates the worktree once
+        sgit_cmd(["switch", "master"])
+        result = sgit_cmd(["cherry-pick", "feature"])
+        assert result.returncode == 0, f"cherry-pick failed: {result.stderr_text}"
+        with open("f2") as f:
+            assert f.read() == "f2"
+        assert "Changes to be committed:\n\nChanges not staged" in sgit_cmd(["status"]).stdout_text
+
+        # A conflicting pick fails without moving anything
+        commit("f2", "mine")
+        head = sgit_cmd(["rev-parse", "HEAD"]).stdout_text.strip()
+        sgit_cmd(["switch", "feature"])
+        commit("f2", "theirs")
+        sgit_cmd(["switch", "master"])
+        result = sgit_cmd(["cherry-pick", "feature"])
+        assert result.returncode != 0
+        assert "conflict in f2" in result.stderr_text
+        assert sgit_cmd(["rev-parse", "HEAD"]).stdout_text.strip() == head
+
+    def test_fast_export_round_trip(self, repo_dir, sgit_cmd, tmp_path):
+        """Test fast-export streams history that fast-import rebuilds exactly."""
+        import io
+        from sgit.operations.fast_import import FastImport
+        from sgit.utils.file_io import repo_find
+
+        os.chdir(repo_dir)
+
+        def commit(path, content, message):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+            sgit_cmd(["add", path])
+            sgit_cmd(["commit", "-m", message])
+
+        commit("lib/a.txt", "same\n", "Add a")
+        commit("lib/b.txt", "same\n", "Add b with the same contents")
+        commit("docs/quote\"d.txt", "q\n", "Add a path that needs quoting")
+        sgit_cmd(["switch", "-c", "topic"])
+        commit("lib/a.txt", "topic\n", "Change a")
+        sgit_cmd(["tag", "-a", "v1", "topic"])
+        sgit_cmd(["switch", "master"])
+        commit("lib/c.txt", "c\n", "Add c")
+
+        marks = str(tmp_path / "marks")
+        result = sgit_cmd(["fast-export", "--all", "--export-marks", marks])
+        assert result.returncode == 0, f"fast-export failed: {result.stderr_text}"
+        stream = result.stdout
+        # Identical contents are emitted as one blob
+        assert stream.count(b"\nblob\n") + stream.startswith(b"blob\n") == 4
+        assert b'M 100644 :' in stream and b'"docs/quote\\"d.txt"' in stream
+
+        target = tmp_path / "mirror"
+        assert sgit_cmd(["init", str(target)]).returncode == 0
+        FastImport(repo_find(str(target))).run(io.BytesIO(stream))
+        for rev in ("master", "topic", "v1"):
+            assert sgit_cmd(["rev-parse", rev], cwd=str(target)).stdout_text == \
+                sgit_cmd(["rev-parse", rev]).stdout_text
+
+        # With the marks of the last run, only new commits are exported
+        commit("lib/d.txt", "d\n", "Add d")
+        result = sgit_cmd(["fast-export", "--all", "--import-marks", marks])
+        assert result.stdout.count(b"\ncommit ") + result.stdout.startswith(b"commit ") == 1
+
+    def test_clone(self, repo_dir, sgit_cmd, tmp_path):
+        """Test clone hardlinks objects, maps refs and checks out HEAD."""
+        os.chdir(repo_dir)
+        os.makedirs("lib")
+        for path in ("lib/a.txt", "b.txt"):
+            with open(path, "w") as f:
+                f.write(path + "\n")
+        sgit_cmd(["add", "lib/a.txt", "b.txt"])
+        sgit_cmd(["commit", "-m", "Initial"])
+        sgit_cmd(["tag", "-a", "v1"])
+        sgit_cmd(["switch", "-c", "topic"])
+        sgit_cmd(["switch", "master"])
+
+        target = tmp_path / "clone"
+        result = sgit_cmd(["clone", repo_dir, str(target)])
+        assert result.returncode == 0, f"clone failed: {result.stderr_text}"
+        head = sgit_cmd(["rev-parse", "HEAD"]).stdout_text
+        for rev in ("HEAD", "master", "origin/master", "origin/topic", "v1"):
+            assert sgit_cmd(["rev-parse", rev], cwd=str(target)).stdout_text == \
+                sgit_cmd(["rev-parse", rev.replace("origin/", "")]).stdout_text
+        assert (target / "lib" / "a.txt").read_text() == "lib/a.txt\n"
+        # The loose annotated tag is packed with its peeled target
+        packed = (target / ".git" / "packed-refs").read_text().splitlines()
+        tag = sgit_cmd(["rev-parse", "v1"]).stdout_text.strip()
+        assert packed[packed.index(f"{tag} refs/tags/v1") + 1] == "^" + head.strip()
+        assert "url = " + repo_dir in (target / ".git" / "config").read_text()
+        status = sgit_cmd(["status"], cwd=str(target)).stdout_text
+        assert "On branch master" in status and "b.txt" not in status
+
+        # Objects are shared with the source, unless copying is asked for
+        obj = os.path.join(".git", "objects", head[:2], head[2:40])
+        assert os.stat(obj).st_ino == os.stat(target / obj).st_ino
+        copy = tmp_path / "copy"
+        assert sgit_cmd(["clone", "--no-hardlinks", repo_dir, str(copy)]).returncode == 0
+        assert os.stat(obj).st_ino != os.stat(copy / obj).st_ino
+        assert sgit_cmd(["rev-parse", "HEAD"], cwd=str(copy)).stdout_text == head
+
+        assert sgit_cmd(["clone", repo_dir, str(target)]).returncode != 0
@@ -85,4 +85,39 @@ class TestObjectOperations:
         if result.returncode == 0:
             # If it succeeds, output should be empty or a ref
             output = result.stdout_text.strip()
-            assert output == "" or "ref:" in output
\ No newline at end of file
+            assert output == "" or "ref:" in output
+
+
+class TestKvlm:
+    def test_parse_many_parents(self):
+        """Test parsing a commit with more headers than the recursion limit."""
+        import sys
+        from sgit.utils.kvlm import kvlm_parse, kvlm_serialize
+
+        count = sys.getrecursionlimit() + 10
+        raw = b"tree " + b"a" * 40 + b"\n"
+        raw += b"".join(b"parent " + b"%040x" % i + b"\n" for i in range(count))
+        raw += b"gpgsig line1\n line2\n line3\n"
+        raw += b"\nMessage body\n"
+
+        kvlm = kvlm_parse(raw)
+        assert len(kvlm[b"parent"]) == count
+        assert kvlm[b"gpgsig"] == b"line1\nline2\nline3"
+        assert kvlm[None] == b"Message body\n"
+        assert kvlm_serialize(kvlm) == raw
+
+    def test_parse_header(self):
+        """Test the fast-path header extraction."""
+        from sgit.utils.kvlm import kvlm_parse_header
+
+        raw = (b"tree " + b"1" * 40 + b"\n"
+               b"parent " + b"2" * 40 + b"\n"
+               b"parent " + b"3" * 40 + b"\n"
+               b"author A <a@example.com> 1700000000 +0100\n"
+               b"committer C <c@example.com> 1700000123 +0100\n"
+               b"\nmessage\n")
+
+        tree, parents, when = kvlm_parse_header(raw)
+        assert tree == b"1" * 40
+        assert parents == [b"2" * 40, b"3" * 40]
+        assert when == 1700000123
@@ -134,4 +134,570 @@ class TestFileOperations:
         if "test.tmp" not in output or "ignore_me.txt" not in output:
             pytest.skip("Ignore patterns not working as expected")
         # keep_me.txt should not be ignored
-        assert "keep_me.txt" not in output
\ No newline at end of file
+        assert "keep_me.txt" not in output
+
+    def test_sparse_checkout(self, repo_dir, sgit_cmd):
+        """Test cone-mode sparse checkout."""
+        os.chdir(repo_dir)
+
+        for p in ["top.txt", "src/app/main.py", "src/util.py", "docs/guide.md"]:
+            os.makedirs(os.path.dirname(p) or ".", exist_ok=True)
+            with open(p, "w") as f:
+                f.write(p)
+        sgit_cmd(["add", "top.txt", "src/app/main.py", "src/util.py", "docs/guide.md"])
+        result = sgit_cmd(["commit", "-m", "Tree"])
+        assert result.returncode == 0, f"Commit failed: {result.stderr_text}"
+
+        result = sgit_cmd(["sparse-checkout", "set", "src/app"])
+        assert result.returncode == 0, f"Sparse-checkout failed: {result.stderr_text}"
+        assert os.path.exists("top.txt")
+        assert os.path.exists("src/app/main.py")
+        assert os.path.exists("src/util.py")
+        assert not os.path.exists("docs")
+
+        with open(".git/info/sparse-checkout") as f:
+            assert "/src/app/" in f.read().splitlines()
+
+        # Skipped paths are still tracked but not reported as deleted
+        result = sgit_cmd(["ls-files"])
+        assert "docs/guide.md" in result.stdout_text
+        result = sgit_cmd(["status"])
+        assert "deleted" not in result.stdout_text
+
+        result = sgit_cmd(["sparse-checkout", "disable"])
+        assert result.returncode == 0, f"Disable failed: {result.stderr_text}"
+        with open("docs/guide.md") as f:
+            assert f.read() == "docs/guide.md"
+        result = sgit_cmd(["sparse-checkout", "list"])
+        assert result.returncode != 0 and "not sparse" in result.stderr_text
+
+    def test_sparse_index(self, repo_dir, sgit_cmd):
+        """Test collapsing out-of-cone directories into tree entries."""
+        os.chdir(repo_dir)
+
+        paths = ["top.txt", "src/main.py", "vendor/a/one.c", "vendor/b/two.c"]
+        for p in paths:
+            os.makedirs(os.path.dirname(p) or ".", exist_ok=True)
+            with open(p, "w") as f:
+                f.write(p)
+        sgit_cmd(["add"] + paths)
+        result = sgit_cmd(["commit", "-m", "Tree"])
+        assert result.returncode == 0, f"Commit failed: {result.stderr_text}"
+        head_tree = sgit_cmd(["rev-parse", "--sgit-type", "tree", "HEAD"]).stdout_text
+
+        result = sgit_cmd(["sparse-checkout", "set", "--sparse-index", "src"])
+        assert result.returncode == 0, f"Sparse-checkout failed: {result.stderr_text}"
+
+        result = sgit_cmd(["ls-files"])
+        assert result.stdout_text.split() == ["src/main.py", "top.txt", "vendor/"]
+
+        # Committing a collapsed index reproduces the same tree
+        result = sgit_cmd(["commit", "-m", "Same tree"])
+        assert result.returncode == 0, f"Commit failed: {result.stderr_text}"
+        assert sgit_cmd(["rev-parse", "--sgit-type", "tree", "HEAD"]).stdout_text == head_tree
+
+        result = sgit_cmd(["status"])
+        assert "vendor" not in result.stdout_text
+
+        result = sgit_cmd(["sparse-checkout", "disable"])
+        assert result.returncode == 0, f"Disable failed: {result.stderr_text}"
+        assert "vendor/b/two.c" in sgit_cmd(["ls-files"]).stdout_text
+        assert os.path.exists("vendor/a/one.c")
+
+    def test_sparse_index_fast_forward(self, repo_dir, sgit_cmd):
+        """Test a fast-forward merge changing paths inside a collapsed directory."""
+        os.chdir(repo_dir)
+        for p in ("a/x.txt", "b/y.txt"):
+            os.makedirs(os.path.dirname(p))
+            with open(p, "w") as f:
+                f.write("1\n")
+        sgit_cmd(["add", "a/x.txt", "b/y.txt"])
+        sgit_cmd(["commit", "-m", "Base"])
+        sgit_cmd(["switch", "-c", "topic"])
+        with open("b/y.txt", "w") as f:
+            f.write("2\n")
+        sgit_cmd(["add", "b/y.txt"])
+        sgit_cmd(["commit", "-m", "Change b"])
+        sgit_cmd(["switch", "master"])
+
+        result = sgit_cmd(["sparse-checkout", "set", "--sparse-index", "a"])
+        assert result.returncode == 0, f"Sparse-checkout failed: {result.stderr_text}"
+        result = sgit_cmd(["merge", "topic"])
+        assert result.returncode == 0, f"Merge failed: {result.stderr_text}"
+        assert "Fast-forward" in result.stdout_text
+        assert sgit_cmd(["ls-files"]).stdout_text.split() == ["a/x.txt", "b/"]
+        assert not os.path.exists("b")
+
+        # The collapsed entry now holds the merged tree
+        result = sgit_cmd(["commit", "-m", "Same tree"])
+        assert result.returncode == 0, f"Commit failed: {result.stderr_text}"
+        assert sgit_cmd(["rev-parse", "--sgit-type", "tree", "HEAD"]).stdout_text == \
+            sgit_cmd(["rev-parse", "--sgit-type", "tree", "topic"]).stdout_text
+
+    def test_switch_reads_changed_trees_only(self, repo_dir, sgit_cmd, monkeypatch):
+        """Test switch diffs the trees instead of flattening both of them."""
+        from sgit.operations.checkout import branch_switch
+        from sgit.utils import hashing
+        from sgit.utils.file_io import repo_find
+
+        os.chdir(repo_dir)
+        paths = [f"d{i}/f.txt" for i in range(30)]
+        for p in paths:
+            os.makedirs(os.path.dirname(p))
+            with open(p, "w") as f:
+                f.write(p)
+        sgit_cmd(["add"] + paths)
+        sgit_cmd(["commit", "-m", "Base"])
+        sgit_cmd(["switch", "-c", "topic"])
+        with open("d7/f.txt", "w") as f:
+            f.write("changed\n")
+        sgit_cmd(["add", "d7/f.txt"])
+        sgit_cmd(["commit", "-m", "Change one file"])
+
+        reads = []
+        original = hashing.object_read
+        monkeypatch.setattr(hashing, "object_read", lambda repo, sha: reads.append(sha) or original(repo, sha))
+        branch_switch(repo_find(), "master")
+        monkeypatch.undo()
+        # The two root trees and the two d7 trees
+        assert len(reads) == 4
+        with open("d7/f.txt") as f:
+            assert f.read() == "d7/f.txt"
+        assert "modified" not in sgit_cmd(["status"]).stdout_text
+
+    def test_diff_tree(self, repo_dir, sgit_cmd, monkeypatch):
+        """Test that tree diffs report changes and never read unchanged subtrees."""
+        from sgit.utils import hashing
+        from sgit.utils.file_io import repo_find
+        from sgit.operations.diff_tree import tree_diff
+
+        os.chdir(repo_dir)
+        paths = ["top.txt", "lib/a.py", "lib/deep/b.py", "same/c.txt"]
+        for p in paths:
+            os.makedirs(os.path.dirname(p) or ".", exist_ok=True)
+            with open(p, "w") as f:
+                f.write(p)
+        sgit_cmd(["add"] + paths)
+        sgit_cmd(["commit", "-m", "Base"])
+
+        with open("lib/deep/b.py", "w") as f:
+            f.write("changed")
+        with open("lib/new.py", "w") as f:
+            f.write("new")
+        sgit_cmd(["add", "lib/deep/b.py", "lib/new.py"])
+        sgit_cmd(["rm", "top.txt"])
+
+        result = sgit_cmd(["status"])
+        assert "modified: lib/deep/b.py" in result.stdout_text
+        assert "new file: lib/new.py" in result.stdout_text
+        assert "deleted:  top.txt" in result.stdout_text
+        sgit_cmd(["commit", "-m", "Change"])
+
+        result = sgit_cmd(["diff-tree", "-r", "--name-status", "HEAD~1", "HEAD"])
+        assert result.returncode == 0, f"diff-tree failed: {result.stderr_text}"
+        assert result.stdout_text.splitlines() == ["M\tlib/deep/b.py", "A\tlib/new.py", "D\ttop.txt"]
+
+        repo = repo_find(repo_dir)
+        old_tree = sgit_cmd(["rev-parse", "HEAD~1^{tree}"]).stdout_text.strip()
+        new_tree = sgit_cmd(["rev-parse", "HEAD^{tree}"]).stdout_text.strip()
+        same_tree = sgit_cmd(["rev-parse", "HEAD:same"]).stdout_text.strip()
+
+        read = []
+        original = hashing.object_read
+        monkeypatch.setattr(hashing, "object_read", lambda r, sha: read.append(sha) or original(r, sha))
+        changes = list(tree_diff(repo, old_tree, new_tree))
+        assert [c.status for c in changes] == ["M", "A", "D"]
+        assert same_tree not in read
+        assert len(read) == 6
+
+    def test_diff(self, repo_dir, sgit_cmd):
+        """Test worktree, cached and commit diffs, --stat and binary detection."""
+        os.chdir(repo_dir)
+
+        with open("lines.txt", "w") as f:
+            f.write("".join(f"line {i}\n" for i in range(10)))
+        with open("data.bin", "wb") as f:
+            f.write(b"\x00\x01")
+        sgit_cmd(["add", "lines.txt", "data.bin"])
+        sgit_cmd(["commit", "-m", "Base"])
+
+        with open("lines.txt", "w") as f:
+            f.write("".join(f"line {i}\n" for i in range(10) if i != 4) + "tail")
+        with open("data.bin", "wb") as f:
+            f.write(b"\x00\x02\x03")
+
+        result = sgit_cmd(["diff"])
+        assert result.returncode == 0, f"Diff failed: {result.stderr_text}"
+        assert "Binary files a/data.bin and b/data.bin differ" in result.stdout_text
+        assert "@@ -2,9 +2,9 @@\n line 1\n line 2\n line 3\n-line 4\n line 5\n" in result.stdout_text
+        assert "+tail\n\\ No newline at end of file\n" in result.stdout_text
+        assert sgit_cmd(["diff", "--cached"]).stdout_text == ""
+
+        sgit_cmd(["add", "lines.txt"])
+        result = sgit_cmd(["diff", "--cached", "--stat"])
+        assert result.stdout_text == (
+            " lines.txt | 2 +-\n"
+            " 1 file changed, 1 insertion(+), 1 deletion(-)\n"
+        )
+        sgit_cmd(["commit", "-m", "Edit"])
+        assert sgit_cmd(["diff", "HEAD~1..HEAD", "--histogram"]).stdout_text == \
+            sgit_cmd(["diff", "HEAD~1", "HEAD"]).stdout_text
+
+    def test_rename_detection(self, repo_dir, sgit_cmd):
+        """Test exact and similarity-based rename and copy detection."""
+        os.chdir(repo_dir)
+
+        os.makedirs("src")
+        with open("src/big.txt", "w") as f:
+            f.write("".join(f"row {i}\n" for i in range(100)))
+        with open("src/same.txt", "w") as f:
+            f.write("unchanged\n")
+        sgit_cmd(["add", "src/big.txt", "src/same.txt"])
+        sgit_cmd(["commit", "-m", "Base"])
+
+        os.makedirs("lib")
+        with open("lib/big.txt", "w") as f:
+            f.write("".join(f"row {i}\n" for i in range(90)))
+        with open("lib/same.txt", "w") as f:
+            f.write("unchanged\n")
+        with open("lib/copy.txt", "w") as f:
+            f.write("unchanged\n")
+        sgit_cmd(["rm", "src/big.txt", "src/same.txt"])
+        sgit_cmd(["add", "lib/big.txt", "lib/same.txt", "lib/copy.txt"])
+        sgit_cmd(["commit", "-m", "Move"])
+
+        result = sgit_cmd(["diff-tree", "-r", "--name-status", "-M", "HEAD"])
+        assert result.returncode == 0, f"diff-tree failed: {result.stderr_text}"
+        lines = result.stdout_text.splitlines()[1:]
+        assert "R100\tsrc/same.txt\tlib/same.txt" in lines
+        assert "A\tlib/copy.txt" in lines
+        assert any(line.startswith("R09") and line.endswith("\tsrc/big.txt\tlib/big.txt") for line in lines)
+
+        # A threshold above the similarity keeps the inexact pair apart
+        lines = sgit_cmd(["diff-tree", "-r", "--name-status", "-M95%", "HEAD"]).stdout_text.splitlines()
+        assert "D\tsrc/big.txt" in lines and "A\tlib/big.txt" in lines
+
+        lines = sgit_cmd(["diff-tree", "-r", "--name-status", "-C", "HEAD"]).stdout_text.splitlines()
+        assert "C100\tsrc/same.txt\tlib/copy.txt" in lines
+
+        result = sgit_cmd(["diff", "-M", "HEAD~1", "HEAD"])
+        assert "rename from src/same.txt\nrename to lib/same.txt\n" in result.stdout_text
+
+    def test_changed_path_filters(self, repo_dir, sgit_cmd, monkeypatch):
+        """Test that path-limited log skips commits ruled out by the Bloom filters."""
+        from sgit.operations import log
+        from sgit.utils.file_io import repo_find
+
+        os.chdir(repo_dir)
+        os.makedirs("src")
+        for i in range(6):
+            path = "src/main.py" if i % 3 == 0 else f"other{i}.txt"
+            with open(path, "w") as f:
+                f.write(f"v{i}")
+            sgit_cmd(["add", path])
+            sgit_cmd(["commit", "-m", f"Change {i}"])
+
+        result = sgit_cmd(["commit-graph", "write"])
+        assert result.returncode == 0, f"commit-graph write failed: {result.stderr_text}"
+        assert result.stdout_text.strip() == "Computed 6 changed-path filters"
+        assert os.path.isfile(os.path.join(".git", "objects", "info", "changed-paths"))
+        assert sgit_cmd(["commit-graph", "write"]).stdout_text.strip() == "Computed 0 changed-path filters"
+
+        result = sgit_cmd(["commit-graph", "verify"])
+        assert result.returncode == 0, f"commit-graph verify failed: {result.stderr_text}"
+        assert "commits: 6" in result.stdout_text
+        assert "measured false-positive rate:" in result.stdout_text
+
+        repo = repo_find(repo_dir)
+        head = sgit_cmd(["rev-parse", "HEAD"]).stdout_text.strip()
+        compared = []
+        original = log.paths_treesame
+        monkeypatch.setattr(log, "paths_treesame", lambda *a: compared.append(a) or original(*a))
+        shown = [view.sha for view in log.log_walk(repo, head, paths=["src/main.py"])]
+        assert len(shown) == 2
+        assert len(compared) == 2
+
+    def test_merge(self, repo_dir, sgit_cmd, monkeypatch):
+        """Test in-memory tree merges, conflict stages and concluding a merge."""
+        from sgit.utils import hashing
+        from sgit.utils.file_io import repo_find
+        from sgit.operations.merge import merge_trees
+
+        os.chdir(repo_dir)
+
+        def write(path, content):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+            sgit_cmd(["add", path])
+
+        write("lib/f.txt", "a\nb\nc\nd\ne\n")
+        write("vendor/big.txt", "untouched\n")
+        write("gone.txt", "g\n")
+        sgit_cmd(["commit", "-m", "Base"])
+        sgit_cmd(["switch", "-c", "topic"])
+        write("lib/f.txt", "a\nB\nc\nd\ne\n")
+        write("gone.txt", "changed\n")
+        sgit_cmd(["commit", "-m", "Topic"])
+        sgit_cmd(["switch", "master"])
+        write("lib/f.txt", "a\nb\nc\nD\ne\n")
+        sgit_cmd(["commit", "-m", "Master"])
+
+        trees = [sgit_cmd(["rev-parse", f"{rev}^{{tree}}"]).stdout_text.strip()
+                 for rev in ("master~1", "master", "topic")]
+        vendor = sgit_cmd(["rev-parse", "master:vendor"]).stdout_text.strip()
+        read = []
+        original = hashing.object_read
+        monkeypatch.setattr(hashing, "object_read", lambda r, sha: read.append(sha) or original(r, sha))
+        result = merge_trees(repo_find(repo_dir), *trees)
+        monkeypatch.undo()
+        assert result.conflicts == []
+        assert vendor not in read
+
+        result = sgit_cmd(["merge-tree", "master", "topic"])
+        assert result.returncode == 0, f"merge-tree failed: {result.stderr_text}"
+        assert sgit_cmd(["cat-file", "blob", f"{result.stdout_text.strip()}:lib/f.txt"]).stdout_text == \
+            "a\nB\nc\nD\ne\n"
+
+        # A conflicting change on master: content and modify/delete conflicts
+        write("lib/f.txt", "a\nX\nc\nD\ne\n")
+        sgit_cmd(["rm", "gone.txt"])
+        sgit_cmd(["commit", "-m", "Conflict"])
+        head = sgit_cmd(["rev-parse", "HEAD"]).stdout_text.strip()
+
+        result = sgit_cmd(["merge", "topic"])
+        assert result.returncode == 1
+        assert "CONFLICT (content): Merge conflict in lib/f.txt" in result.stdout_text
+        assert "CONFLICT (modify/delete): gone.txt deleted in HEAD" in result.stdout_text
+        with open("lib/f.txt") as f:
+            assert f.read() == "a\n<<<<<<< HEAD\nX\n=======\nB\n>>>>>>> topic\nc\nD\ne\n"
+        status = sgit_cmd(["status"]).stdout_text
+        assert "both modified: lib/f.txt" in status
+        assert "deleted by us: gone.txt" in status
+        assert sgit_cmd(["commit", "-m", "Too early"]).returncode != 0
+
+        write("lib/f.txt", "a\nXB\nc\nD\ne\n")
+        sgit_cmd(["add", "gone.txt"])
+        result = sgit_cmd(["commit"])
+        assert result.returncode == 0, f"commit failed: {result.stderr_text}"
+        commit = sgit_cmd(["cat-file", "commit", "HEAD"]).stdout_text
+        topic = sgit_cmd(["rev-parse", "topic"]).stdout_text.strip()
+        assert f"parent {head}\nparent {topic}\n" in commit
+        assert sgit_cmd(["merge", "topic"]).stdout_text.strip() == "Already up to date."
+
+    def test_reset(self, repo_dir, sgit_cmd, monkeypatch):
+        """Test reset modes rebuild only the paths that differ from the target."""
+        from argparse import Namespace
+        from sgit.core.index import index_read
+        from sgit.operations import checkout
+        from sgit.operations.reset import cmd_reset
+        from sgit.utils.file_io import repo_find
+
+        os.chdir(repo_dir)
+
+        def write(path, content):
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+            sgit_cmd(["add", path])
+
+        for i in range(20):
+            write(f"src/f{i}.txt", f"{i}\n")
+        write("a.txt", "a\n")
+        sgit_cmd(["commit", "-m", "One"])
+        write("a.txt", "a2\n")
+        write("new.txt", "new\n")
+        sgit_cmd(["commit", "-m", "Two"])
+        one = sgit_cmd(["rev-parse", "HEAD~1"]).stdout_text.strip()
+
+        repo = repo_find(repo_dir)
+        before = {e.name: e for e in index_read(repo).entries}
+        with open("src/f2.txt", "w") as f:
+            f.write("local\n")
+        result = sgit_cmd(["reset", "HEAD~1"])
+        assert result.returncode == 0, f"reset failed: {result.stderr_text}"
+        # Files the reset keeps are reported when they have local changes
+        assert result.stdout_text == "Unstaged changes after reset:\nM\ta.txt\nM\tsrc/f2.txt\n"
+        with open("src/f2.txt", "w") as f:
+            f.write("2\n")
+        assert sgit_cmd(["rev-parse", "HEAD"]).stdout_text.strip() == one
+        after = {e.name: e for e in index_read(repo).entries}
+        assert sorted(after) == sorted(set(before) - {"new.txt"})
+        assert after["src/f3.txt"].mtime == before["src/f3.txt"].mtime
+        assert after["a.txt"].mtime == (0, 0)
+        status = sgit_cmd(["status"]).stdout_text
+        assert "modified: a.txt" in status and "new.txt" in status.split("Untracked files:")[1]
+
+        # --soft moves the branch only; --hard writes back just the differing files
+        sgit_cmd(["reset", "--soft", "master@{1}"])
+        assert "deleted:  new.txt" in sgit_cmd(["status"]).stdout_text
+        sgit_cmd(["reset", "--mixed"])
+        with open("src/f7.txt", "w") as f:
+            f.write("local\n")
+        written = []
+        original = checkout.blob_checkout
+        monkeypatch.setattr(checkout, "blob_checkout",
+                            lambda r, sha, mode, dest: written.append(os.path.relpath(dest, repo_dir))
+                            or original(r, sha, mode, dest))
+        cmd_reset(Namespace(mode="hard", commit="HEAD"))
+        monkeypatch.undo()
+        assert written == ["src/f7.txt"]
+        with open("src/f7.txt") as f:
+            assert f.read() == "7\n"
+        status = sgit_cmd(["status"]).stdout_text
+        assert "modified" not in status and "new file" not in status
+
+    def test_mv(self, repo_dir, sgit_cmd, monkeypatch):
+        """Test mv renames index entries without rehashing files."""
+        from sgit.core.index import index_read, index_write
+        from sgit.operations.add_remove import mv
+        from sgit.utils import hashing
+        from sgit.utils.file_io import repo_find
+
+        os.chdir(repo_dir)
+        os.makedirs("old/sub")
+        for path in ("old/a.txt", "old/sub/b.txt", "top.txt"):
+            with open(path, "w") as f:
+                f.write(path + "\n")
+        sgit_cmd(["add", "old/a.txt", "old/sub/b.txt", "top.txt"])
+        sgit_cmd(["commit", "-m", "Initial"])
+
+        repo = repo_find(repo_dir)
+        before = {e.name: e.sha for e in index_read(repo).entries}
+        monkeypatch.setattr(hashing, "object_hash", lambda *args: pytest.fail("mv must not rehash files"))
+        assert mv(repo, ["old"], "new") == [("old/a.txt", "new/a.txt"), ("old/sub/b.txt", "new/sub/b.txt")]
+        monkeypatch.undo()
+        after = {e.name: e.sha for e in index_read(repo).entries}
+        assert after == {"new/a.txt": before["old/a.txt"], "new/sub/b.txt": before["old/sub/b.txt"],
+                         "top.txt": before["top.txt"]}
+        assert os.path.isfile("new/sub/b.txt") and not os.path.exists("old")
+
+        result = sgit_cmd(["mv", "top.txt", "new"])
+        assert result.returncode == 0, f"mv failed: {result.stderr_text}"
+        status = sgit_cmd(["status"]).stdout_text
+        assert "new file: new/top.txt" in status and "deleted:  top.txt" in status
+        assert "modified" not in status
+        assert sgit_cmd(["mv", "new/a.txt", "new/top.txt"]).returncode != 0
+        assert sgit_cmd(["mv", "untracked.txt", "x.txt"]).returncode != 0
+
+        # A directory holding a conflicted path is not moved
+        index = index_read(repo)
+        next(e for e in index.entries if e.name == "new/sub/b.txt").flag_stage = 0x2000
+        index_write(repo, index)
+        result = sgit_cmd(["mv", "new", "moved"])
+        assert result.returncode != 0 and "conflicted, source=new/sub/b.txt" in result.stderr_text
+        assert os.path.isfile("new/sub/b.txt") and not os.path.exists("moved")
+
+    def test_commit_all(self, repo_dir, sgit_cmd, monkeypatch):
+        """Test commit -a stages modified and deleted files, hashing only those."""
+        from argparse import Namespace
+        from sgit.operations import diff
+        from sgit.operations.commit import cmd_commit
+
+        os.chdir(repo_dir)
+        for i in range(10):
+            with open(f"f{i}.txt", "w") as f:
+                f.write(f"{i}\n")
+        sgit_cmd(["add"] + [f"f{i}.txt" for i in range(10)])
+        sgit_cmd(["commit", "-m", "Initial"])
+
+        with open("f3.txt", "w") as f:
+            f.write("changed\n")
+        os.unlink("f5.txt")
+        with open("untracked.txt", "w") as f:
+            f.write("u\n")
+
+        hashed = []
+        original = diff.worktree_read
+        monkeypatch.setattr(diff, "worktree_read", lambda path: hashed.append(path) or original(path))
+        cmd_commit(Namespace(message="Update", all=True))
+        monkeypatch.undo()
+        assert [os.path.basename(name) for name in hashed] == ["f3.txt"]
+
+        files = sgit_cmd(["ls-tree", "-r", "HEAD"]).stdout_text
+        assert "f5.txt" not in files and "untracked.txt" not in files
+        assert sgit_cmd(["cat-file", "blob", "HEAD:f3.txt"]).stdout_text == "changed\n"
+        status = sgit_cmd(["status"]).stdout_text
+        assert "modified" not in status and "deleted" not in status
+
+    def test_commit_all_symlink(self, repo_dir, sgit_cmd):
+        """Test commit -a stages tracked symlinks as links, not as their targets."""
+        import io
+        from argparse import Namespace
+        from sgit.operations.commit import cmd_commit
+        from sgit.operations.fast_import import FastImport
+        from sgit.utils.file_io import repo_find
+
+        os.chdir(repo_dir)
+        ident = b"A U Thor <author@example.com> 1700000000 +0000"
+        FastImport(repo_find()).run(io.BytesIO(
+            b"commit refs/heads/master\ncommitter " + ident + b"\ndata 5\nlinks"
+            b"\nM 644 inline f\ndata 3\nhi\n"
+            b"\nM 120000 inline link\ndata 1\nf"
+            b"\nM 120000 inline dangling\ndata 7\nnowhere\n"
+        ))
+        assert sgit_cmd(["reset", "--hard"]).returncode == 0
+        assert os.readlink("link") == "f" and os.readlink("dangling") == "nowhere"
+
+        with open("f", "a") as f:
+            f.write("x\n")
+        os.unlink("link")
+        os.symlink("f", "link")
+        cmd_commit(Namespace(message="Update", all=True))
+
+        modes = {line.split("\t")[1]: line.split()[0]
+                 for line in sgit_cmd(["ls-tree", "-r", "HEAD"]).stdout_text.splitlines()}
+        assert modes == {"dangling": "120000", "f": "100644", "link": "120000"}
+        assert sgit_cmd(["cat-file", "blob", "HEAD:link"]).stdout_text == "f"
+        assert sgit_cmd(["cat-file", "blob", "HEAD:f"]).stdout_text == "hi\nx\n"
+
+    def test_fast_import(self, repo_dir, sgit_cmd, monkeypatch):
+        """Test fast-import builds commits from in-memory branch trees."""
+        import io
+        from sgit.operations.fast_import import FastImport
+        from sgit.utils import hashing
+        from sgit.utils.file_io import repo_find
+
+        os.chdir(repo_dir)
+        ident = b"A U Thor <author@example.com> 1700000000 +0000"
+        stream = b"".join([
+            b"blob\nmark :1\ndata 6\nhello\n\n",
+            b"commit refs/heads/master\nmark :2\ncommitter " + ident + b"\ndata 5\nfirst",
+            b"\nM 100644 :1 docs/readme.txt\nM 644 inline \"src/a b.txt\"\ndata <<EOF\nspaced\nEOF\n",
+            b"M 100755 inline vendor/lib/tool.sh\ndata 3\nsh\n\n",
+            b"commit refs/heads/master\nmark :3\ncommitter " + ident + b"\ndata 6\nsecond\n",
+            b"M 100644 inline docs/readme.txt\ndata 4\nbye\n",
+            b"R \"src/a b.txt\" src/b.txt\n\n",
+            b"reset refs/heads/topic\nfrom :2\n\n",
+            b"commit refs/heads/topic\nmark :4\ncommitter " + ident + b"\ndata 5\ntopic\n",
+            b"D docs/readme.txt\n\n",
+            b"commit refs/heads/master\ncommitter " + ident + b"\ndata 5\nmerge\nmerge :4\n\n",
+            b"tag v1\nfrom :3\ntagger " + ident + b"\ndata 7\nrelease\n",
+            b"done\n",
+        ])
+
+        repo = repo_find(repo_dir)
+        importer = FastImport(repo)
+        written = []
+        original = hashing.object_write_raw
+        monkeypatch.setattr(hashing, "object_write_raw",
+                            lambda fmt, data, r=None, sha=None: written.append((fmt, sha))
+                            or original(fmt, data, r, sha=sha))
+        importer.run(io.BytesIO(stream))
+        monkeypatch.undo()
+
+        log = sgit_cmd(["log", "--oneline", "master"]).stdout_text.split("\n")
+        assert sorted(line.split(" ", 1)[1] for line in log if line) == ["first", "merge", "second", "topic"]
+        files = sgit_cmd(["ls-tree", "-r", "master~1"]).stdout_text
+        assert "100755 blob" in files and "vendor/lib/tool.sh" in files
+        assert "src/b.txt" in files and "a b.txt" not in files
+        assert sgit_cmd(["cat-file", "blob", "master~1:docs/readme.txt"]).stdout_text == "bye\n"
+        assert sgit_cmd(["cat-file", "blob", "master~1:src/b.txt"]).stdout_text == "spaced\n"
+        assert "docs/" not in sgit_cmd(["ls-tree", "-r", "topic"]).stdout_text
+        assert sgit_cmd(["rev-parse", "master^2"]).stdout_text == sgit_cmd(["rev-parse", "topic"]).stdout_text
+        assert "release" in sgit_cmd(["cat-file", "tag", "v1"]).stdout_text
+        # The second commit rewrites the blob and the root, docs and src trees, not vendor/
+        assert [fmt for fmt, _ in written].count(b"tree") == 5 + 3 + 1
+        # Objects are hashed once, by the duplicate check
+        assert all(sha for _, sha in written)
+        assert importer.marks[3] == sgit_cmd(["rev-parse", "master~1"]).stdout_text.strip()
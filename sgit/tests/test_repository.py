@@ -60,4 +60,180 @@ class TestRepositoryStructure:
 
         # Should return None when not required
         repo = repo_find(temp_dir, required=False)
-        assert repo is None
\ No newline at end of file
+        assert repo is None
+
+class TestRefTransactions:
+    def test_compare_and_swap(self, repo_dir):
+        """Test that stale expected values and held locks abort the whole batch."""
+        from sgit.utils.file_io import repo_find
+        from sgit.core.refs import RefTransaction, ref_resolve, ref_update, ZERO_OID
+
+        repo = repo_find(repo_dir)
+        a, b, c = "a" * 40, "b" * 40, "c" * 40
+
+        ref_update(repo, "refs/heads/one", a, old_sha=ZERO_OID)
+        ref_update(repo, "refs/heads/two", a)
+        with pytest.raises(Exception):
+            ref_update(repo, "refs/heads/one", b, old_sha=ZERO_OID)
+
+        # One stale expectation aborts every update in the transaction
+        tx = RefTransaction(repo)
+        tx.update("refs/heads/one", b, old_sha=a)
+        tx.update("refs/heads/two", b, old_sha=c)
+        with pytest.raises(Exception):
+            tx.commit()
+        assert ref_resolve(repo, "refs/heads/one") == a
+        assert ref_resolve(repo, "refs/heads/two") == a
+        assert not os.path.exists(os.path.join(repo.gitdir, "refs/heads/one.lock"))
+
+        # A lock held by another writer blocks the update
+        lock = os.path.join(repo.gitdir, "refs/heads/one.lock")
+        open(lock, "w").close()
+        with pytest.raises(Exception):
+            ref_update(repo, "refs/heads/one", b, old_sha=a)
+        os.unlink(lock)
+
+        tx = RefTransaction(repo)
+        tx.update("refs/heads/one", b, old_sha=a)
+        tx.delete("refs/heads/two", old_sha=a)
+        tx.commit()
+        assert ref_resolve(repo, "refs/heads/one") == b
+        assert ref_resolve(repo, "refs/heads/two") is None
+
+        # HEAD is symbolic, so updating it moves the branch it points at
+        ref_update(repo, "HEAD", c, old_sha=ZERO_OID)
+        assert ref_resolve(repo, "refs/heads/master") == c
+
+    def test_delete_rereads_packed_refs(self, repo_dir):
+        """Test that deleting a packed ref keeps refs packed after the last read."""
+        from sgit.utils.file_io import repo_find
+        from sgit.core.refs import RefTransaction, packed_refs_read, packed_refs_write
+
+        repo = repo_find(repo_dir)
+        a, b = "a" * 40, "b" * 40
+        packed_refs_write(repo, {"refs/tags/gone": (a, None), "refs/tags/old": (a, None)})
+        assert "refs/tags/old" in packed_refs_read(repo)
+
+        # Another writer repacks within the cache's mtime and size granularity
+        path = os.path.join(repo.gitdir, "packed-refs")
+        st = os.stat(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data.replace(f"{a} refs/tags/old".encode(), f"{b} refs/tags/new".encode()))
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        tx = RefTransaction(repo)
+        tx.delete("refs/tags/gone")
+        tx.commit()
+        assert packed_refs_read(repo, fresh=True) == {"refs/tags/new": (b, None)}
+        assert not os.path.exists(path + ".lock")
+
+    def test_delete_replaces_packed_refs_first(self, repo_dir, monkeypatch):
+        """Test that a deleted ref never falls back to its stale packed value."""
+        from sgit.utils.file_io import repo_find
+        from sgit.core.refs import RefTransaction, packed_refs_read, packed_refs_write, ref_update
+
+        repo = repo_find(repo_dir)
+        packed_refs_write(repo, {"refs/heads/gone": ("a" * 40, None)})
+        ref_update(repo, "refs/heads/gone", "b" * 40)
+
+        # While the loose ref is being removed, packed-refs must already be rewritten
+        seen = []
+        original = os.unlink
+        loose = os.path.join(repo.gitdir, "refs", "heads", "gone")
+
+        def unlink(path):
+            if path == loose:
+                seen.append(packed_refs_read(repo, fresh=True))
+            original(path)
+
+        monkeypatch.setattr(os, "unlink", unlink)
+        tx = RefTransaction(repo)
+        tx.delete("refs/heads/gone")
+        tx.commit()
+        monkeypatch.undo()
+        assert seen == [{}]
+
+    def test_pack_refs_rereads_packed_refs(self, repo_dir):
+        """Test that pack-refs does not bring back a ref deleted from packed-refs."""
+        from sgit.utils.file_io import repo_find
+        from sgit.core.refs import packed_refs_read, packed_refs_write, ref_update, refs_pack
+
+        repo = repo_find(repo_dir)
+        a = "a" * 40
+        packed_refs_write(repo, {"refs/heads/dead": (a, None), "refs/heads/keep": (a, None)})
+        assert "refs/heads/dead" in packed_refs_read(repo)
+        ref_update(repo, "refs/heads/keep", "b" * 40)
+
+        # A concurrent deletion rewrites packed-refs within the cache's granularity
+        path = os.path.join(repo.gitdir, "packed-refs")
+        st = os.stat(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data.replace(b"refs/heads/dead", b"refs/heads/gone"))
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        assert refs_pack(repo) == 1
+        assert packed_refs_read(repo, fresh=True) == {
+            "refs/heads/gone": (a, None),
+            "refs/heads/keep": ("b" * 40, None),
+        }
+        assert not os.path.exists(path + ".lock")
+
+    def test_reflog(self, repo_dir, monkeypatch):
+        """Test that ref moves are logged for the branch and HEAD and read newest first."""
+        from sgit.utils.file_io import repo_find
+        from sgit.core import reflog
+        from sgit.core.refs import ref_update, ZERO_OID
+
+        repo = repo_find(repo_dir)
+        shas = [f"{i:040x}" for i in range(1, 40)]
+
+        ref_update(repo, "HEAD", shas[0], message="commit (initial): one")
+        for old, new in zip(shas, shas[1:]):
+            ref_update(repo, "HEAD", new, old_sha=old, message=f"commit: {new[-2:]}")
+        ref_update(repo, "refs/tags/v1", shas[0])
+
+        # Tiny blocks force lines to straddle block boundaries
+        monkeypatch.setattr(reflog, "REFLOG_BLOCK_SIZE", 64)
+        for ref in ("HEAD", "refs/heads/master"):
+            entries = list(reflog.reflog_read_reverse(repo, ref))
+            assert [e.new_sha for e in entries] == shas[::-1]
+            assert entries[-1].old_sha == ZERO_OID
+            assert entries[-1].message == "commit (initial): one"
+            assert entries[0].old_sha == shas[-2]
+        assert list(reflog.reflog_read_reverse(repo, "refs/tags/v1")) == []
+
+
+class TestOidTable:
+    def test_prefix_lookup_and_abbrev(self, repo_dir):
+        """Test bisect prefix lookups, shortest-unique prefixes and invalidation on write."""
+        from sgit.utils.file_io import repo_find, object_resolve
+        from sgit.utils.oid_table import OidTable, object_abbrev, oid_table, _oid_tables as oid_tables
+        from sgit.utils.hashing import object_write
+        from sgit.core.objects.blob import GitBlob
+
+        table = OidTable(["abcdef" + "0" * 34, "abcdf0" + "0" * 34, "123456" + "0" * 34])
+        assert table.lookup("abcd") == ["abcdef" + "0" * 34, "abcdf0" + "0" * 34]
+        assert table.lookup("abcde") == ["abcdef" + "0" * 34]
+        assert table.abbreviate("abcdef" + "0" * 34, 4) == "abcde"
+        assert table.abbreviate("123456" + "0" * 34, 4) == "1234"
+
+        repo = repo_find(repo_dir)
+        assert len(oid_table(repo)) == 0
+        blob = GitBlob()
+        blob.blobdata = b"hello\n"
+        sha = object_write(blob, repo)
+        assert sha in oid_table(repo)
+        assert object_resolve(repo, sha[:6]) == [sha]
+
+        # One-off lookups and abbreviations do not build the full table
+        other = GitBlob()
+        other.blobdata = b"world\n"
+        other_sha = object_write(other, repo)
+        assert os.path.join(repo.gitdir, "objects") not in oid_tables
+        assert object_resolve(repo, other_sha[:6]) == [other_sha]
+        assert object_abbrev(repo, other_sha) == other_sha[:7]
+        assert os.path.join(repo.gitdir, "objects") not in oid_tables